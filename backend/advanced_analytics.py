@@ -7,18 +7,94 @@ No LLM required - fully reproducible and explainable
 import os
 import json
 import re
+import heapq
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from collections import Counter, defaultdict
-from typing import List, Dict, Any, Set
+from typing import Iterable, List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
-import math
-from html.parser import HTMLParser
+import numpy as np
+import tracing
+from post_io import iter_posts, load_posts
+from post_store import ColumnarPostStore, store_path_for, write_store
+from tfidf import TfidfMatrix
+from clustering import CLUSTERING_VERSION, spherical_kmeans
+from near_duplicates import SIGNATURE_PATH, drop_near_duplicates
+from evidence import (MAX_LENGTH, META_MIN_LENGTH, MIN_LENGTH, MIN_WORDS, NEGATION_WINDOW, NEGATIONS,
+                      EvidenceMatcher, flags_of, scores_of)
+from text_normalize import NORMALIZER_VERSION, normalize_html
+from text_cache import (CACHE_PATH, GROUP_CACHE_PATH, STRENGTH, WEAKNESS, RecordCache, content_key,
+                        iter_sentences, part_tokens)
+
+# Vague/generic phrases that disqualify a sentence as strength/weakness evidence
+VAGUE_PHRASES = {
+    'one notable part', 'notable part', 'interaction was when',
+    'part of the interaction', 'overall', 'general', 'basically',
+    'it was', 'there was', 'seemed to', 'appeared to',
+    'might be', 'could be', 'would be', 'may be'
+}
+
+# Meta-commentary about the interaction (skipped unless the sentence is long)
+META_PHRASES = ['i thought', 'i found', 'it showed', 'it demonstrates']
+
+# Characters of post text shown with a representative post
+SNIPPET_LENGTH = 240
+
+# How strengths/weaknesses are picked: 'ranked' scores every evidence
+# sentence (negation-aware) and keeps the best, 'compat' keeps the first five
+# sentences mentioning a term, as before scoring existed
+EVIDENCE_MODES = ('ranked', 'compat')
+
+
+def chunk_groups(weights: List[int], workers: int, chunks_per_worker: int = 4) -> List[List[int]]:
+    """
+    Split group indices into chunks for a process pool, heaviest chunk first.
+
+    Aims for about `chunks_per_worker` chunks per worker so a few large groups
+    do not leave the other workers idle: a group heavier than the target
+    chunk weight goes alone, smaller groups are packed together in order.
+    """
+    target = max(sum(weights) // max(workers * chunks_per_worker, 1), 1)
+    chunks = []
+    chunk, chunk_weight = [], 0
+    for i, weight in enumerate(weights):
+        if weight >= target:
+            chunks.append([i])
+            continue
+        chunk.append(i)
+        chunk_weight += weight
+        if chunk_weight >= target:
+            chunks.append(chunk)
+            chunk, chunk_weight = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return sorted(chunks, key=lambda c: sum(weights[i] for i in c), reverse=True)
+
+
+# Analyzer of a pool worker process (no caches; the parent owns those)
+_worker_analyzer = None
+
+
+def _init_worker(evidence_mode: str):
+    global _worker_analyzer
+    _worker_analyzer = AdvancedAnalytics(evidence_mode=evidence_mode)
+
+
+def _analyze_group_chunk(jobs: List[Tuple[List[Dict[str, Any]], List[Optional[Dict[str, Any]]]]],
+                         partials: bool, return_texts: bool) -> List[tuple]:
+    results = []
+    for posts, texts in jobs:
+        entry, updated = _worker_analyzer.analyze_group_job(posts, texts, partials)
+        results.append((entry, updated if return_texts else []))
+    return results
 
 
 class AdvancedAnalytics:
     """Advanced text analytics without requiring LLM APIs"""
 
-    def __init__(self):
-        self.html_stripper = self._create_html_stripper()
+    def __init__(self, cache_path: Optional[str] = None, group_cache_path: Optional[str] = None,
+                 workers: int = 1, evidence_mode: str = 'ranked'):
         # Strength indicators (positive terms)
         self.strength_terms = {
             'correct', 'accurate', 'perfect', 'excellent', 'good', 'well', 'better',
@@ -62,35 +138,24 @@ class AdvancedAnalytics:
             'sonnet', 'flash', 'extended', 'written', 'oss', 'alert', 'prof'
         }
 
-    def _create_html_stripper(self):
-        """Create a simple HTML tag stripper"""
-        class HTMLStripper(HTMLParser):
-            def __init__(self):
-                super().__init__()
-                self.reset()
-                self.strict = False
-                self.convert_charrefs = True
-                self.text = []
-
-            def handle_data(self, d):
-                self.text.append(d)
-
-            def get_text(self):
-                return ''.join(self.text)
-
-        return HTMLStripper
+        # Evidence sentences are found for a whole text part at once
+        self.evidence = EvidenceMatcher(self.strength_terms, self.weakness_terms, VAGUE_PHRASES, META_PHRASES,
+                                        self.stop_words, self.tokenize)
+        if evidence_mode not in EVIDENCE_MODES:
+            raise ValueError(f"evidence_mode must be one of {EVIDENCE_MODES}, got {evidence_mode!r}")
+        self.evidence_mode = evidence_mode
+
+        # Preprocessed post text, reused across runs when a path is given
+        self.cache = RecordCache(cache_path, self.settings_fingerprint()) if cache_path else None
+        # Per HW x Model results for incremental runs (see process_data)
+        self.group_cache = (RecordCache(group_cache_path, self.settings_fingerprint(), name="group cache")
+                            if group_cache_path else None)
+        # Processes analyzing HW x Model groups (1 = in this process)
+        self.workers = max(workers, 1)
 
     def strip_html(self, html_text: str) -> str:
-        """Remove HTML tags from text"""
-        if not html_text:
-            return ""
-        stripper = self.html_stripper()
-        try:
-            stripper.feed(html_text)
-            return stripper.get_text()
-        except:
-            # Fallback to regex if HTML parsing fails
-            return re.sub(r'<[^>]+>', ' ', html_text)
+        """Plain text of HTML / Ed document markup, one block per line"""
+        return normalize_html(html_text)
 
     def tokenize(self, text: str) -> List[str]:
         """Simple tokenization"""
@@ -101,167 +166,219 @@ class AdvancedAnalytics:
         # Filter stop words
         return [w for w in words if w not in self.stop_words]
 
+    def build_tfidf(self, documents: List[str]) -> TfidfMatrix:
+        """Tokenize documents into a sparse TF-IDF matrix"""
+        return TfidfMatrix(self.tokenize(doc) for doc in documents)
+
     def compute_tf(self, tokens: List[str]) -> Dict[str, float]:
         """Compute term frequency"""
         if not tokens:
             return {}
-        counter = Counter(tokens)
-        total = len(tokens)
-        return {term: count / total for term, count in counter.items()}
+        matrix = TfidfMatrix([tokens])
+        return matrix.row(0, matrix.tf)
 
     def compute_idf(self, documents: List[List[str]]) -> Dict[str, float]:
         """Compute inverse document frequency"""
-        doc_count = len(documents)
-        if doc_count == 0:
-            return {}
-
-        # Count documents containing each term
-        doc_freq = defaultdict(int)
-        for doc in documents:
-            unique_terms = set(doc)
-            for term in unique_terms:
-                doc_freq[term] += 1
-
-        # Compute IDF
-        idf = {}
-        for term, freq in doc_freq.items():
-            idf[term] = math.log(doc_count / (1 + freq))
-
-        return idf
+        return TfidfMatrix(documents).idf_dict()
 
     def compute_tfidf(self, documents: List[str]) -> Dict[str, Dict[str, float]]:
         """Compute TF-IDF for all documents"""
-        # Tokenize all documents
-        tokenized_docs = [self.tokenize(doc) for doc in documents]
-
-        # Compute IDF
-        idf = self.compute_idf(tokenized_docs)
-
-        # Compute TF-IDF for each document
-        tfidf_scores = {}
-        for i, tokens in enumerate(tokenized_docs):
-            tf = self.compute_tf(tokens)
-            tfidf = {}
-            for term, tf_score in tf.items():
-                tfidf[term] = tf_score * idf.get(term, 0)
-            tfidf_scores[str(i)] = tfidf
-
-        return tfidf_scores
+        matrix = self.build_tfidf(documents)
+        return {str(i): matrix.row(i) for i in range(len(matrix))}
 
     def extract_top_terms(self, tfidf_scores: Dict[str, float], top_n: int = 10) -> List[tuple]:
         """Extract top N terms by TF-IDF score"""
         sorted_terms = sorted(tfidf_scores.items(), key=lambda x: x[1], reverse=True)
         return sorted_terms[:top_n]
 
-    def extract_strengths_weaknesses(self, text: str) -> Dict[str, List[str]]:
-        """Extract strength and weakness mentions from text"""
-        if not text:
-            return {'strengths': [], 'weaknesses': []}
-
-        text_lower = text.lower()
-        sentences = re.split(r'[.!?]+', text)
-
-        # Vague/generic phrases to filter out
-        vague_phrases = {
-            'one notable part', 'notable part', 'interaction was when',
-            'part of the interaction', 'overall', 'general', 'basically',
-            'it was', 'there was', 'seemed to', 'appeared to',
-            'might be', 'could be', 'would be', 'may be'
-        }
-
-        strengths = []
-        weaknesses = []
-
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            words = set(self.tokenize(sentence))
-            clean = sentence.strip()
-
-            # Skip if too short or too long
-            if not clean or len(clean) < 30 or len(clean) > 250:
-                continue
+    def top_tf_terms(self, tokens: List[str], top_n: int) -> List[tuple]:
+        """Top N terms of a single token list by term frequency"""
+        if not tokens:
+            return []
+        matrix = TfidfMatrix([tokens])
+        return matrix.top_k(0, top_n, matrix.tf)
+
+    def sentence_hits(self, sentence: str, tokens: Optional[List[str]] = None):
+        """
+        Evidence hits of one sentence (see EvidenceMatcher.evaluate); `tokens`
+        is tokenize(sentence) when already known
+        """
+        return self.evidence.hits(sentence, tokens)
+
+    def sentence_evidence(self, sentence: str, tokens: Optional[List[str]] = None) -> int:
+        """
+        STRENGTH/WEAKNESS flags for one sentence (0 if it is not usable
+        evidence); `tokens` is tokenize(sentence) when already known
+        """
+        return flags_of(self.sentence_hits(sentence, tokens), STRENGTH, WEAKNESS)
+
+    def collect_evidence(self, sentences: Iterable[Tuple[str, Optional[List[str]], Optional[List[Any]], int]]
+                         ) -> Dict[str, Any]:
+        """
+        Strength/weakness mentions from iter_sentences() output.
+
+        Sentences with known hits (evidence[j]) reuse them; the others are
+        scanned here. In 'compat' mode these are the first five mentions of
+        each kind; in 'ranked' mode the five highest-scoring distinct ones
+        (ties in text order), with their scores and supporting terms under
+        'evidence'.
+        """
+        if self.evidence_mode == 'compat':
+            strengths = []
+            weaknesses = []
+            for sentence, tokens, evidence, j in sentences:
+                hits = evidence[j] if evidence is not None else self.sentence_hits(sentence, tokens)
+                flags = flags_of(hits, STRENGTH, WEAKNESS)
+                if flags & STRENGTH:
+                    strengths.append(sentence.strip()[:200])  # Truncate long sentences
+                if flags & WEAKNESS:
+                    weaknesses.append(sentence.strip()[:200])
+                if len(strengths) >= 5 and len(weaknesses) >= 5:
+                    break
+
+            return {
+                'strengths': strengths[:5],  # Top 5 strength mentions
+                'weaknesses': weaknesses[:5]  # Top 5 weakness mentions
+            }
 
-            # Skip vague sentences
-            is_vague = any(phrase in sentence_lower for phrase in vague_phrases)
-            if is_vague:
+        candidates = {'strengths': [], 'weaknesses': []}
+        for sentence, tokens, evidence, j in sentences:
+            hits = evidence[j] if evidence is not None else self.sentence_hits(sentence, tokens)
+            if not hits:
                 continue
-
-            # Skip if sentence is just meta-commentary about the interaction
-            if any(meta in sentence_lower for meta in ['i thought', 'i found', 'it showed', 'it demonstrates']):
-                # Only skip if it doesn't have specific details (less than 50 chars of content)
-                if len(clean) < 60:
+            strength_terms, weakness_terms, negated = hits
+            pro = [t for t in strength_terms if t not in negated] + [f"not {t}" for t in weakness_terms if t in negated]
+            con = [t for t in weakness_terms if t not in negated] + [f"not {t}" for t in strength_terms if t in negated]
+            for kind, score, terms in zip(candidates, scores_of(hits), (pro, con)):
+                if terms and score > 0:
+                    candidates[kind].append((-score, len(candidates[kind]), sentence.strip()[:200], terms))
+
+        result = {'evidence': {}}
+        for kind, ranked in candidates.items():
+            ranked.sort()
+            top = []
+            seen = set()
+            for neg_score, _, text, terms in ranked:
+                if text in seen:
                     continue
-
-            # Check for strength indicators
-            if words & self.strength_terms:
-                # Must have at least one concrete noun or specific detail
-                if len(words) >= 8:  # Require substantial content
-                    strengths.append(clean[:200])  # Truncate long sentences
-
-            # Check for weakness indicators
-            if words & self.weakness_terms:
-                if len(words) >= 8:  # Require substantial content
-                    weaknesses.append(clean[:200])
-
+                seen.add(text)
+                top.append({'text': text, 'score': -neg_score, 'terms': terms})
+                if len(top) == 5:
+                    break
+            result[kind] = [item['text'] for item in top]
+            result['evidence'][kind] = top
+        return result
+
+    def extract_strengths_weaknesses(self, text: str) -> Dict[str, Any]:
+        """Extract strength and weakness mentions from text"""
+        if not text:
+            return self.collect_evidence([])
+        sentences = re.split(r'[.!?]+', text)
+        if self.evidence_mode == 'compat':
+            # Usually stops after a few sentences, so they are checked one by one
+            return self.collect_evidence((sentence, None, None, 0) for sentence in sentences)
+        hits = self.evidence.sentence_hits(text, sentences)
+        return self.collect_evidence((sentence, None, hits, j) for j, sentence in enumerate(sentences))
+
+    # -- per-post preprocessing ----------------------------------------
+
+    def settings_fingerprint(self) -> str:
+        """Hash of everything preprocessed records depend on besides the post text"""
+        settings = [sorted(self.stop_words), sorted(self.strength_terms), sorted(self.weakness_terms),
+                    sorted(VAGUE_PHRASES), META_PHRASES, NORMALIZER_VERSION, NEGATIONS, NEGATION_WINDOW,
+                    [MIN_LENGTH, MAX_LENGTH, META_MIN_LENGTH, MIN_WORDS]]
+        return hashlib.sha256(json.dumps(settings).encode('utf-8')).hexdigest()
+
+    def preprocess_text(self, text: str) -> Dict[str, Any]:
+        """
+        Sentence split of one text part with each sentence's tokens, and the
+        evidence hits of its interior sentences, found for the whole text at once
+        (the first and last sentence may be glued onto a neighbouring part's,
+        see iter_sentences). Splits fall on [.!?], never inside a word, so
+        the sentences' tokens concatenated are tokenize(text).
+        """
+        sentences = re.split(r'[.!?]+', text)
+        with tracing.tally('tokenize'):
+            tokens = [self.tokenize(s) for s in sentences]
+        with tracing.tally('evidence'):
+            evidence = self.evidence.sentence_hits(text, sentences, tokens)[1:-1] if len(sentences) > 2 else []
         return {
-            'strengths': strengths[:5],  # Top 5 strength mentions
-            'weaknesses': weaknesses[:5]  # Top 5 weakness mentions
+            'sentences': sentences,
+            'tokens': tokens,
+            'evidence': evidence,
         }
 
-    def cluster_posts(self, posts: List[Dict[str, Any]], max_clusters: int = 5) -> List[Dict[str, Any]]:
-        """Simple clustering using keyword similarity to find representative posts"""
+    def preprocess_post(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The post's text parts (title, then HTML-stripped content; only those
+        present) preprocessed once, served from the on-disk cache when the
+        post's title and content are unchanged.
+        """
+        key = None
+        if self.cache is not None:
+            key = content_key(post.get('title'), post.get('content'))
+            record = self.cache.get(key)
+            if record is not None:
+                return record
+
+        parts = []
+        if post.get('title'):
+            parts.append(self.preprocess_text(post.get('title')))
+        if post.get('content'):
+            with tracing.tally('html_strip'):
+                text = self.strip_html(post.get('content'))
+            parts.append(self.preprocess_text(text))
+        record = {'parts': parts}
+
+        if key is not None:
+            self.cache.put(key, record)
+        return record
+
+    def cluster_posts(self, posts: List[Dict[str, Any]], max_clusters: int = 5,
+                      texts: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Representative posts: the medoids of a spherical k-means clustering
+        of the posts' TF-IDF vectors (title and content), largest cluster
+        first
+        """
         if len(posts) <= max_clusters:
             return posts
+        if texts is None:
+            texts = [self.preprocess_post(p) for p in posts]
 
-        # Compute TF-IDF for all posts (using titles since content is empty)
-        documents = [p.get('title', '') for p in posts]
-        tfidf_scores = self.compute_tfidf(documents)
-
-        # Find posts with most distinctive content (highest average TF-IDF)
-        post_scores = []
-        for i, post in enumerate(posts):
-            scores = tfidf_scores.get(str(i), {})
-            avg_score = sum(scores.values()) / len(scores) if scores else 0
-            post_scores.append((i, avg_score, post))
-
-        # Sort by score and take top N
-        post_scores.sort(key=lambda x: x[1], reverse=True)
-        representative_posts = [p[2] for p in post_scores[:max_clusters]]
+        matrix = TfidfMatrix([token for part in text['parts'] for token in part_tokens(part)] for text in texts)
+        return [posts[cluster.medoid] for cluster in spherical_kmeans(matrix, max_clusters)]
 
-        return representative_posts
+    def post_snippet(self, post: Dict[str, Any], limit: int = SNIPPET_LENGTH) -> str:
+        """The start of the post's text (its title if it has none), cut at a word boundary"""
+        text = ' '.join(self.strip_html(post.get('content', '')).split()) or post.get('title', '')
+        if len(text) <= limit:
+            return text
+        return text[:limit].rsplit(' ', 1)[0].rstrip(',;:') + '…'
 
-    def analyze_hw_model_group(self, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_hw_model_group(self, posts: List[Dict[str, Any]],
+                               texts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Analyze a group of posts for the same HW and model"""
         if not posts:
             return {}
+        if texts is None:
+            texts = [self.preprocess_post(p) for p in posts]
 
-        # Combine all text from both title and content
-        all_text_parts = []
-        for p in posts:
-            # Add title
-            if p.get('title'):
-                all_text_parts.append(p.get('title'))
-            # Add content (strip HTML if present)
-            if p.get('content'):
-                clean_content = self.strip_html(p.get('content'))
-                all_text_parts.append(clean_content)
-
-        all_text = ' '.join(all_text_parts)
-
-        # Compute TF-IDF for the group
-        tokens = self.tokenize(all_text)
-        tf = self.compute_tf(tokens)
+        # All text parts (titles and stripped content) in post order
+        parts = [part for text in texts for part in text['parts']]
+        tokens = [token for part in parts for token in part_tokens(part)]
 
         # Get top terms (without IDF for single group)
-        top_terms = sorted(tf.items(), key=lambda x: x[1], reverse=True)[:15]
+        top_terms = self.top_tf_terms(tokens, 15)
 
-        # Extract strengths and weaknesses from full text
-        sw = self.extract_strengths_weaknesses(all_text)
+        # Extract strengths and weaknesses from full text (sentences of the
+        # parts joined with spaces)
+        sw = self.collect_evidence(iter_sentences(parts))
 
         # Find representative posts
-        representative = self.cluster_posts(posts, max_clusters=3)
+        representative = self.cluster_posts(posts, max_clusters=3, texts=texts)
 
-        return {
+        result = {
             'post_count': len(posts),
             'top_terms': [{'term': t[0], 'score': round(t[1], 4)} for t in top_terms],
             'strengths': sw['strengths'],
@@ -271,31 +388,284 @@ class AdvancedAnalytics:
                     'title': p.get('title', ''),
                     'author': p.get('author', ''),
                     'url': p.get('url', ''),
-                    'snippet': p.get('title', '')  # Use title as snippet since content is empty
+                    'snippet': self.post_snippet(p)
                 }
                 for p in representative[:3]
             ]
         }
+        if 'evidence' in sw:
+            # Scores and supporting terms of the ranked strengths/weaknesses
+            result['evidence'] = sw['evidence']
+        return result
+
+    def store_timeline(self, store: ColumnarPostStore) -> Dict[str, Dict[str, int]]:
+        """Posts per date per homework from a columnar store (one bincount over code pairs)"""
+        labels, date_index = store.date_labels('created_at', missing='Unknown')
+        homeworks = store.categories('homework')
+        pair = date_index * len(homeworks) + np.asarray(store.codes('homework'), dtype=np.int64)
+        counts = np.bincount(pair, minlength=len(labels) * len(homeworks))
+
+        timeline = defaultdict(dict)
+        for code in np.flatnonzero(counts):
+            date, hw = divmod(int(code), len(homeworks))
+            timeline[labels[date]][homeworks[hw]] = int(counts[code])
+        return timeline
+
+    def group_rows(self, data) -> Dict[str, Dict[str, Any]]:
+        """Row indices grouped by homework, then model (both in first-appearance order)"""
+        if isinstance(data, ColumnarPostStore):
+            return data.group_indices('homework', 'model')
 
-    def process_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Main processing function"""
-        print("Running advanced analytics...")
-
-        # Group by homework and model
         hw_model_groups = defaultdict(lambda: defaultdict(list))
-
-        for post in data:
+        for i, post in enumerate(data):
             hw = post.get('homework', 'Unknown')
             model = post.get('model', 'Unknown')
-            hw_model_groups[hw][model].append(post)
+            hw_model_groups[hw][model].append(i)
+        return hw_model_groups
+
+    def group_posts(self, data, rows) -> List[Dict[str, Any]]:
+        return data.records(rows) if isinstance(data, ColumnarPostStore) else [data[i] for i in rows]
+
+    # -- group jobs ----------------------------------------------------
+
+    def job_text(self, post: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        A post's preprocessed record for a group job. Serial runs preprocess
+        it here; with workers only cached records are looked up (None on a
+        miss) and the workers preprocess the rest.
+        """
+        if self.workers <= 1:
+            return self.preprocess_post(post)
+        if self.cache is None:
+            return None
+        return self.cache.get(content_key(post.get('title'), post.get('content')))
+
+    def analyze_group_job(self, posts: List[Dict[str, Any]], texts: List[Optional[Dict[str, Any]]],
+                          partials: bool = False) -> Tuple[Dict[str, Any], List[Tuple[int, Dict[str, Any]]]]:
+        """
+        One group's {'result'} (plus its group_partials() when `partials`),
+        and the (member, record) pairs of texts that were preprocessed here,
+        for the parent process to cache.
+        """
+        updated = [i for i, text in enumerate(texts) if text is None]
+        texts = [self.preprocess_post(p) if t is None else t for p, t in zip(posts, texts)]
+        entry = {'result': self.analyze_hw_model_group(posts, texts)}
+        if partials:
+            entry.update(self.group_partials(posts, texts))
+        return entry, [(i, texts[i]) for i in updated]
+
+    def run_group_jobs(self, jobs: List[Tuple[str, List[Dict[str, Any]], List[Optional[Dict[str, Any]]]]],
+                       partials: bool = False) -> List[Dict[str, Any]]:
+        """
+        Run (label, posts, texts) group jobs, serially or on a process pool,
+        and return their entries in job order, so the output does not depend
+        on the number of workers or on which chunk finishes first. When there
+        is a preprocess cache, records preprocessed by the workers are sent
+        back, written into the jobs' texts lists and cached; otherwise only
+        the entries cross the process boundary.
+        """
+        for label, posts, _ in jobs:
+            print(f"Analyzing {label} ({len(posts)} posts)...")
+        if self.workers <= 1 or not jobs:
+            entries = []
+            for label, posts, texts in jobs:
+                with tracing.span('group_analysis', group=label) as span:
+                    span.count(len(posts))
+                    entries.append(self.analyze_group_job(posts, texts, partials)[0])
+            return entries
+
+        entries: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        chunks = chunk_groups([len(posts) for _, posts, _ in jobs], self.workers)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(self.evidence_mode,)) as pool:
+            futures = [(chunk, pool.submit(_analyze_group_chunk, [jobs[i][1:] for i in chunk], partials,
+                                                   self.cache is not None))
+                       for chunk in chunks]
+            for chunk, future in futures:
+                for i, (entry, updated) in zip(chunk, future.result()):
+                    entries[i] = entry
+                    _, posts, texts = jobs[i]
+                    for member, record in updated:
+                        texts[member] = record
+                        post = posts[member]
+                        self.cache.put(content_key(post.get('title'), post.get('content')), record)
+        return entries
+
+    def analyze_all_groups(self, data, hw_model_groups) -> Tuple[Dict[str, Any], Dict[str, Dict[str, int]], List[tuple]]:
+        """
+        Full recompute: (group analyses, timeline, global top terms).
+
+        A serial run over a columnar store reads, preprocesses and analyzes
+        one group at a time, so memory holds a single group's posts and
+        texts rather than every post's.
+        """
+        parallel = self.workers > 1
+        by_group = not parallel and isinstance(data, ColumnarPostStore)
+        groups = [(hw, model, rows) for hw, models in hw_model_groups.items() for model, rows in models.items()]
+
+        if by_group:
+            texts = None
+            with tracing.span('analyze_groups', workers=1) as span:
+                span.count(len(groups))
+                entries = []
+                for hw, model, rows in groups:
+                    posts = self.group_posts(data, rows)
+                    job = (f"{hw} - {model}", posts, [self.job_text(post) for post in posts])
+                    entries.extend(self.run_group_jobs([job], partials=True))
+        else:
+            # Strip, tokenize and split every post once; all passes below reuse it
+            with tracing.span('preprocess') as span:
+                span.count(len(data))
+                texts = [self.job_text(post) for post in data]
+
+            # Analyze each group; with workers the global terms are merged from
+            # per-group partials instead of shipping every post's text back
+            jobs = [(f"{hw} - {model}", self.group_posts(data, rows), [texts[i] for i in rows])
+                    for hw, model, rows in groups]
+            with tracing.span('analyze_groups', workers=self.workers) as span:
+                span.count(len(jobs))
+                entries = self.run_group_jobs(jobs, partials=parallel)
+
+        analysis = {}
+        for (hw, model, _), entry in zip(groups, entries):
+            analysis.setdefault(hw, {})[model] = entry['result']
+
+        # Time series analysis
+        if isinstance(data, ColumnarPostStore):
+            timeline = self.store_timeline(data)
+        else:
+            timeline = defaultdict(lambda: defaultdict(int))
+            for post in data:
+                date = post.get('created_at', '')[:10] if post.get('created_at') else 'Unknown'
+                hw = post.get('homework', 'Unknown')
+                timeline[date][hw] += 1
+
+        # Extract global top terms from titles and content
+        if parallel or by_group:
+            global_top_terms = self.merge_top_terms([(rows, entry) for (_, _, rows), entry in zip(groups, entries)], 30)
+        else:
+            global_tokens = [token for text in texts for part in text['parts'] for token in part_tokens(part)]
+            global_top_terms = self.top_tf_terms(global_tokens, 30)
+
+        return analysis, timeline, global_top_terms
+
+    # -- incremental recompute -----------------------------------------
+
+    def group_fingerprint(self, hw: str, model: str, posts: List[Dict[str, Any]]) -> str:
+        """Hash of everything a group's result and partial aggregates depend on"""
+        members = [[p.get('title'), p.get('content'), p.get('author'), p.get('url'), p.get('created_at')]
+                   for p in posts]
+        raw = json.dumps([hw, model, self.evidence_mode, CLUSTERING_VERSION, SNIPPET_LENGTH, members], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def group_partials(self, posts: List[Dict[str, Any]], texts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        A group's share of the global statistics: per-term counts with the
+        (member index, token offset) of the term's first occurrence, the
+        token total, and posts per creation date.
+        """
+        terms = {}
+        token_total = 0
+        for member, text in enumerate(texts):
+            offset = 0
+            for part in text['parts']:
+                for token in part_tokens(part):
+                    entry = terms.get(token)
+                    if entry is None:
+                        terms[token] = [1, member, offset]
+                    else:
+                        entry[0] += 1
+                    offset += 1
+            token_total += offset
+
+        dates = Counter(p.get('created_at', '')[:10] if p.get('created_at') else 'Unknown' for p in posts)
+        return {
+            'token_total': token_total,
+            'terms': [[term, count, member, offset] for term, (count, member, offset) in terms.items()],
+            'dates': dict(dates),
+        }
 
-        # Analyze each group
+    def merge_top_terms(self, partials: List[Tuple[Any, Dict[str, Any]]], top_n: int) -> List[tuple]:
+        """
+        Global top terms by frequency from (group rows, partials) pairs.
+
+        A term's first occurrence is ordered by (row of the post, token offset
+        in the post), i.e. by position in the concatenated token stream of all
+        posts, so ties break exactly as in top_tf_terms() over that stream.
+        """
+        counts: Dict[str, int] = {}
+        first: Dict[str, Tuple[int, int]] = {}
+        token_total = 0
+        for rows, partial in partials:
+            token_total += partial['token_total']
+            for term, count, member, offset in partial['terms']:
+                key = (int(rows[member]), offset)
+                if term in counts:
+                    counts[term] += count
+                    first[term] = min(first[term], key)
+                else:
+                    counts[term] = count
+                    first[term] = key
+
+        top = heapq.nsmallest(top_n, counts, key=lambda term: (-counts[term], first[term]))
+        return [(term, counts[term] / token_total) for term in top]
+
+    def analyze_changed_groups(self, data, hw_model_groups) -> Tuple[Dict[str, Any], Dict[str, Dict[str, int]], List[tuple]]:
+        """
+        Incremental recompute: groups whose fingerprint is in the group cache
+        reuse their stored result and partial aggregates; only new or changed
+        groups are preprocessed and analyzed. Produces the same values as
+        analyze_all_groups().
+        """
         analysis = {}
+        partials = []
+        changed = []
         for hw, models in hw_model_groups.items():
             analysis[hw] = {}
-            for model, posts in models.items():
-                print(f"Analyzing {hw} - {model} ({len(posts)} posts)...")
-                analysis[hw][model] = self.analyze_hw_model_group(posts)
+            for model, rows in models.items():
+                posts = self.group_posts(data, rows)
+                key = self.group_fingerprint(hw, model, posts)
+                entry = self.group_cache.get(key)
+                if entry is None:
+                    changed.append((len(partials), key, (f"{hw} - {model}", posts,
+                                                         [self.job_text(p) for p in posts])))
+                # Changed groups are filled in below, in their place
+                analysis[hw][model] = entry['result'] if entry is not None else None
+                partials.append((hw, model, rows, entry))
+
+        with tracing.span('analyze_groups', workers=self.workers, reused=len(partials) - len(changed)) as span:
+            span.count(len(changed))
+            entries = self.run_group_jobs([job for _, _, job in changed], partials=True)
+        for (index, key, _), entry in zip(changed, entries):
+            hw, model, rows, _ = partials[index]
+            self.group_cache.put(key, entry)
+            analysis[hw][model] = entry['result']
+            partials[index] = (hw, model, rows, entry)
+
+        timeline = defaultdict(lambda: defaultdict(int))
+        for hw, _, _, partial in partials:
+            for date, count in partial['dates'].items():
+                timeline[date][hw] += count
+
+        global_top_terms = self.merge_top_terms([(rows, partial) for _, _, rows, partial in partials], 30)
+
+        self.group_cache.save()
+        print(self.group_cache.report())
+        return analysis, timeline, global_top_terms
+
+    def process_data(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Main processing function"""
+        print("Running advanced analytics...")
+
+        # Group by homework and model
+        with tracing.span('group_rows') as span:
+            span.count(len(data))
+            hw_model_groups = self.group_rows(data)
+
+        if self.group_cache is not None:
+            analysis, timeline, global_top_terms = self.analyze_changed_groups(data, hw_model_groups)
+        else:
+            analysis, timeline, global_top_terms = self.analyze_all_groups(data, hw_model_groups)
 
         # Create heatmap data
         all_hws = sorted(hw_model_groups.keys())
@@ -313,13 +683,6 @@ class AdvancedAnalytics:
                 count = len(hw_model_groups[hw].get(model, []))
                 heatmap_data['matrix'][hw][model] = count
 
-        # Time series analysis
-        timeline = defaultdict(lambda: defaultdict(int))
-        for post in data:
-            date = post.get('created_at', '')[:10] if post.get('created_at') else 'Unknown'
-            hw = post.get('homework', 'Unknown')
-            timeline[date][hw] += 1
-
         timeline_data = {
             'dates': sorted(timeline.keys()),
             'series': {}
@@ -333,18 +696,11 @@ class AdvancedAnalytics:
         # Overall statistics
         total_combinations = sum(1 for hw in analysis for model in analysis[hw])
 
-        # Extract global top terms from titles and content
-        all_posts_text_parts = []
-        for p in data:
-            if p.get('title'):
-                all_posts_text_parts.append(p.get('title'))
-            if p.get('content'):
-                clean_content = self.strip_html(p.get('content'))
-                all_posts_text_parts.append(clean_content)
-        all_posts_text = ' '.join(all_posts_text_parts)
-        global_tokens = self.tokenize(all_posts_text)
-        global_tf = self.compute_tf(global_tokens)
-        global_top_terms = sorted(global_tf.items(), key=lambda x: x[1], reverse=True)[:30]
+        if self.cache is not None:
+            # Incremental runs only look at changed groups' posts; keep the rest
+            with tracing.span('cache_save', cat='io'):
+                self.cache.save(prune=self.group_cache is None)
+            print(self.cache.report())
 
         return {
             'generated_at': datetime.now().isoformat(),
@@ -366,6 +722,33 @@ class AdvancedAnalytics:
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Deterministic TF-IDF / evidence analytics")
+    parser.add_argument('--columnar', action='store_true',
+                        help="read the memory-mapped .cols store written next to the posts JSON")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"preprocess every post from scratch instead of reusing {CACHE_PATH}")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"only re-analyze HW x Model groups whose posts changed (state in {GROUP_CACHE_PATH})")
+    parser.add_argument('--evidence', choices=EVIDENCE_MODES, default='ranked',
+                        help="rank strength/weakness sentences by score, or keep the first five found (compat)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="analyze HW x Model groups on this many processes (0 = one per CPU)")
+    parser.add_argument('--dedupe', action='store_true',
+                        help=f"collapse near-duplicate posts to their earliest copy first (signatures in {SIGNATURE_PATH})")
+    parser.add_argument('--stream', action='store_true',
+                        help="read posts one at a time into the columnar store, then analyze it group by group "
+                             "(bounded memory; skips the preprocess cache, which is held in memory)")
+    tracing.add_profile_argument(parser, 'advanced_analytics')
+    args = parser.parse_args()
+    if args.stream and (args.columnar or args.dedupe or args.incremental or args.workers != 1):
+        parser.error("--stream analyzes the store one group at a time in this process; "
+                     "it cannot be combined with --columnar, --dedupe, --incremental or --workers")
+
+    with tracing.profiled(args.profile, 'advanced_analytics'):
+        run(args)
+
+
+def run(args):
     print("=" * 60)
     print("CS182 Blue Team - Advanced Analytics")
     print("=" * 60)
@@ -375,25 +758,42 @@ def main():
     if not os.path.exists(input_path):
         print(f"Warning: {input_path} not found, trying fallback...")
         input_path = "data/special_participation_a.json"
+        # Streaming scrapes (scraper.py --stream) only produce JSONL
+        if not os.path.exists(input_path) and os.path.exists("data/special_participation_a.jsonl"):
+            input_path = "data/special_participation_a.jsonl"
         if not os.path.exists(input_path):
             print(f"Error: No data file found!")
             print("Please run merge_settled_with_content.py first.")
             return
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with tracing.span('load', cat='io', path=input_path) as span:
+        if args.columnar:
+            data = ColumnarPostStore.open(store_path_for(input_path))
+        elif args.stream:
+            data = ColumnarPostStore.open(write_store(iter_posts(input_path), store_path_for(input_path)))
+        else:
+            data = load_posts(input_path)
+        span.count(len(data))
 
     print(f"Loaded {len(data)} posts")
+    if args.dedupe:
+        with tracing.span('dedupe'):
+            data = drop_near_duplicates(data)
 
     # Run analytics
-    analyzer = AdvancedAnalytics()
-    results = analyzer.process_data(data)
+    analyzer = AdvancedAnalytics(cache_path=None if args.no_cache or args.stream else CACHE_PATH,
+                                 group_cache_path=GROUP_CACHE_PATH if args.incremental else None,
+                                 workers=args.workers or os.cpu_count() or 1,
+                                 evidence_mode=args.evidence)
+    with tracing.span('process_data') as span:
+        span.count(len(data))
+        results = analyzer.process_data(data)
 
     # Save results
     output_path = "data/advanced_analytics.json"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with tracing.span('serialize', cat='io', path=output_path), open(output_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
 
     print(f"\nAdvanced analytics saved to {output_path}")
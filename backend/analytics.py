@@ -5,10 +5,19 @@ Generates insights, trends, and summaries using AI
 
 import os
 import json
-from collections import Counter, defaultdict
-from typing import List, Dict, Any
+import argparse
+import itertools
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
 import openai
+import numpy as np
+import tracing
 from dotenv import load_dotenv
+from post_io import iter_posts, load_posts
+from post_store import ColumnarPostStore, store_path_for
+from near_duplicates import SIGNATURE_PATH, drop_near_duplicates
+from post_stats import aggregate_posts
+from summarizer import BATCH_SIZE, CONCURRENCY, DEFAULT_MODEL, SUMMARY_CACHE_PATH, Summarizer
 
 load_dotenv()
 
@@ -19,91 +28,82 @@ class AnalyticsProcessor:
             print("Warning: OPENAI_API_KEY not found. AI features will be limited.")
 
     def load_data(self, json_path: str) -> List[Dict[str, Any]]:
-        """Load processed data from JSON"""
-        with open(json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def calculate_statistics(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate comprehensive statistics from the data"""
-        stats = {
-            "total_posts": len(data),
-            "total_authors": len(set(item['author'] for item in data)),
-            "models": {},
-            "homeworks": {},
-            "timeline": defaultdict(int),
-            "top_contributors": [],
-            "model_homework_matrix": defaultdict(lambda: defaultdict(int))
+        """Load processed data from JSON (array), JSONL (one post per line) or a columnar store directory"""
+        if os.path.isdir(json_path):
+            return ColumnarPostStore.open(json_path)
+        return load_posts(json_path)
+
+    def calculate_statistics(self, data: List[Dict[str, Any]], sketch: bool = False) -> Dict[str, Any]:
+        """
+        Calculate comprehensive statistics from the data, in one pass (see
+        post_stats.StatsAggregator). With `sketch`, distinct authors and top
+        contributors are estimated in fixed memory.
+        """
+        if isinstance(data, ColumnarPostStore) and not sketch:
+            return self.calculate_statistics_columnar(data)
+        return aggregate_posts(data, sketch=sketch).result()
+
+    def calculate_statistics_columnar(self, store: ColumnarPostStore) -> Dict[str, Any]:
+        """Same statistics as calculate_statistics, computed with array operations over category codes"""
+        author_counts = store.value_counts('author')
+
+        labels, date_index = store.date_labels('created_at')
+        dated = date_index[date_index >= 0]
+        date_counts = np.bincount(dated, minlength=len(labels))
+        timeline = {labels[j]: int(c) for j, c in enumerate(date_counts) if c}
+
+        return {
+            "total_posts": len(store),
+            "total_authors": len(author_counts),
+            "models": store.value_counts('model'),
+            "homeworks": store.value_counts('homework'),
+            "timeline": dict(sorted(timeline.items())),
+            "top_contributors": [
+                {"author": author, "posts": count}
+                for author, count in list(author_counts.items())[:10]
+            ],
+            "model_homework_matrix": {
+                model: {hw: len(rows) for hw, rows in hws.items()}
+                for model, hws in store.group_indices('model', 'homework').items()
+            },
         }
 
-        # Count models
-        model_counter = Counter(item['model'] for item in data)
-        stats["models"] = dict(model_counter.most_common())
-
-        # Count homeworks
-        hw_counter = Counter(item['homework'] for item in data)
-        stats["homeworks"] = dict(hw_counter.most_common())
-
-        # Timeline analysis
-        for item in data:
-            if item['created_at']:
-                date = item['created_at'][:10]  # Extract date part
-                stats["timeline"][date] += 1
-
-        # Top contributors
-        author_counter = Counter(item['author'] for item in data)
-        stats["top_contributors"] = [
-            {"author": author, "posts": count}
-            for author, count in author_counter.most_common(10)
-        ]
-
-        # Model-Homework matrix
-        for item in data:
-            stats["model_homework_matrix"][item['model']][item['homework']] += 1
-
-        # Convert defaultdict to dict for JSON serialization
-        stats["model_homework_matrix"] = {
-            model: dict(hw_dict)
-            for model, hw_dict in stats["model_homework_matrix"].items()
-        }
-
-        stats["timeline"] = dict(sorted(stats["timeline"].items()))
-
-        return stats
-
-    def generate_summaries(self, data: List[Dict[str, Any]], sample_size: int = 10) -> List[Dict[str, Any]]:
-        """Generate AI summaries for sample posts"""
-        if not openai.api_key:
+    def generate_summaries(self, data: List[Dict[str, Any]], sample_size: Optional[int] = 10,
+                           summarizer: Optional[Summarizer] = None) -> List[Dict[str, Any]]:
+        """
+        Generate AI summaries (item['ai_summary']) for the first sample_size
+        posts, or all of them with sample_size=None; see summarizer.Summarizer
+        for batching, concurrency and the summary cache.
+        """
+        if summarizer is None and not openai.api_key:
             print("Skipping AI summaries - no API key")
             return data
 
-        print(f"Generating AI summaries for up to {sample_size} posts...")
-
-        # Sample posts for summarization
-        sample = data[:sample_size]
-
-        for i, item in enumerate(sample):
-            if item.get('content'):
-                try:
-                    print(f"Summarizing post {i+1}/{len(sample)}...")
-
-                    response = openai.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You are a helpful assistant that creates concise, informative summaries of student posts about LLM performance on homework assignments."},
-                            {"role": "user", "content": f"Summarize this post in 1-2 sentences, focusing on key findings and observations:\n\n{item['content'][:2000]}"}
-                        ],
-                        max_tokens=150,
-                        temperature=0.7
-                    )
-
-                    item['ai_summary'] = response.choices[0].message.content.strip()
-
-                except Exception as e:
-                    print(f"Error generating summary for post {i+1}: {e}")
-                    item['ai_summary'] = "Summary unavailable"
+        sample = data[:sample_size] if sample_size is not None else data
+        print(f"Generating AI summaries for up to {len(sample)} posts...")
+        summarizer = summarizer or Summarizer(api_key=openai.api_key)
+        for item, summary in zip(sample, summarizer.summarize(sample)):
+            if summary is not None:
+                item['ai_summary'] = summary
+        print(summarizer.report())
 
         return data
 
+    def save_summaries(self, posts: List[Dict[str, Any]], path: str, summarizer: Optional[Summarizer] = None):
+        """Write the posts' ai_summary values as {id: {title, summary}}"""
+        summaries = {
+            str(post.get('id')): {"title": post.get('title', ''), "summary": post['ai_summary']}
+            for post in posts if 'ai_summary' in post
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with tracing.span('serialize', cat='io', path=path), open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "generated_at": __import__('datetime').datetime.now().isoformat(),
+                "model": summarizer.model if summarizer is not None else DEFAULT_MODEL,
+                "summaries": summaries,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Saved {len(summaries)} summaries to {path}")
+
     def generate_model_insights(self, advanced_analytics: Dict[str, Any]) -> Dict[str, Any]:
         """Generate deterministic model-focused insights from advanced analytics"""
         model_insights = {}
@@ -144,7 +144,7 @@ class AnalyticsProcessor:
                 'total_homeworks': len(model_hw_coverage[model]),
                 'strengths': model_strengths[model][:5],  # Top 5 strengths
                 'weaknesses': model_weaknesses[model][:5],  # Top 5 weaknesses
-                'distinctive_terms': list(set(model_top_terms[model]))[:10]  # Top 10 unique terms
+                'distinctive_terms': list(dict.fromkeys(model_top_terms[model]))[:10]  # Top 10 unique terms, first seen first
             }
 
             # Generate summary
@@ -228,37 +228,66 @@ class AnalyticsProcessor:
 
         return insights
 
-    def process(self, input_path: str, output_path: str = "data/analytics.json", advanced_analytics_path: str = "data/advanced_analytics.json"):
-        """Main processing function"""
+    def process(self, input_path: str, output_path: str = "data/analytics.json", advanced_analytics_path: str = "data/advanced_analytics.json",
+                dedupe: bool = False, sketch: bool = False, stream: bool = False,
+                summaries: Optional[int] = None, summarizer: Optional[Summarizer] = None,
+                summaries_path: str = "data/summaries.json"):
+        """
+        Main processing function. With `stream`, posts are read one at a
+        time from the JSON / JSONL file and counted as they arrive, so the
+        dataset is never held in memory. With `summaries`, that many posts
+        (0 = all) are summarized and written to summaries_path.
+        """
         print("=" * 60)
         print("CS182 Blue Team - Analytics Processor")
         print("=" * 60)
 
-        # Load data
-        data = self.load_data(input_path)
-        print(f"Loaded {len(data)} posts")
-
-        # Calculate statistics
-        print("\nCalculating statistics...")
-        stats = self.calculate_statistics(data)
+        if stream:
+            print(f"Streaming posts from {input_path}")
+            print("\nCalculating statistics...")
+            with tracing.span('calculate_statistics', path=input_path) as span:
+                stats = self.calculate_statistics(iter_posts(input_path), sketch=sketch)
+                span.count(stats['total_posts'])
+            print(f"Counted {stats['total_posts']} posts")
+        else:
+            # Load data
+            with tracing.span('load', cat='io', path=input_path) as span:
+                data = self.load_data(input_path)
+                span.count(len(data))
+            print(f"Loaded {len(data)} posts")
+            if dedupe:
+                with tracing.span('dedupe'):
+                    data = drop_near_duplicates(data)
+
+            # Calculate statistics
+            print("\nCalculating statistics...")
+            with tracing.span('calculate_statistics') as span:
+                span.count(len(data))
+                stats = self.calculate_statistics(data, sketch=sketch)
 
         # Load advanced analytics if available
         advanced_analytics = None
         if os.path.exists(advanced_analytics_path):
             print(f"\nLoading advanced analytics from {advanced_analytics_path}...")
             try:
-                with open(advanced_analytics_path, 'r', encoding='utf-8') as f:
+                with tracing.span('load_advanced', cat='io', path=advanced_analytics_path), \
+                        open(advanced_analytics_path, 'r', encoding='utf-8') as f:
                     advanced_analytics = json.load(f)
                 print("Advanced analytics loaded successfully")
             except Exception as e:
                 print(f"Warning: Could not load advanced analytics: {e}")
 
         # Generate summaries (optional)
-        # data = self.generate_summaries(data, sample_size=5)
+        if summaries is not None:
+            posts = list(itertools.islice(iter_posts(input_path) if stream else data, summaries or None))
+            self.generate_summaries(posts, sample_size=None, summarizer=summarizer)
+            if any('ai_summary' in post for post in posts):
+                self.save_summaries(posts, summaries_path, summarizer)
 
         # Generate insights
         print("\nGenerating insights...")
-        insights = self.generate_insights(stats, advanced_analytics)
+        with tracing.span('generate_insights'):
+            insights = self.generate_insights(stats, advanced_analytics)
 
         # Combine results
         analytics = {
@@ -269,7 +298,7 @@ class AnalyticsProcessor:
 
         # Save analytics
         os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with tracing.span('serialize', cat='io', path=output_path), open(output_path, 'w', encoding='utf-8') as f:
             json.dump(analytics, f, indent=2, ensure_ascii=False)
 
         print(f"\nAnalytics saved to {output_path}")
@@ -278,18 +307,61 @@ class AnalyticsProcessor:
         return analytics
 
 def main():
+    parser = argparse.ArgumentParser(description="Compute dashboard statistics and insights")
+    parser.add_argument('--columnar', action='store_true',
+                        help="read the memory-mapped .cols store written next to the posts JSON")
+    parser.add_argument('--dedupe', action='store_true',
+                        help=f"count near-duplicate posts once, as their earliest copy (signatures in {SIGNATURE_PATH})")
+    parser.add_argument('--stream', action='store_true',
+                        help="read and count posts one at a time instead of loading the whole file (bounded memory)")
+    parser.add_argument('--sketch', action='store_true',
+                        help="estimate distinct authors / top contributors in fixed memory (HyperLogLog, Misra-Gries)")
+    parser.add_argument('--summaries', type=int, metavar='N',
+                        help="summarize the first N posts with the LLM (0 = all) into data/summaries.json; "
+                             "set OPENAI_BASE_URL to use a local OpenAI-compatible server")
+    parser.add_argument('--summary-model', default=DEFAULT_MODEL, help="chat model for --summaries")
+    parser.add_argument('--summary-batch', type=int, default=BATCH_SIZE, help="posts packed into one request")
+    parser.add_argument('--summary-concurrency', type=int, default=CONCURRENCY, help="requests in flight at once")
+    parser.add_argument('--deterministic', action='store_true',
+                        help="summarize with temperature 0 and a fixed seed")
+    parser.add_argument('--no-summary-cache', action='store_true',
+                        help=f"request every summary again instead of reusing {SUMMARY_CACHE_PATH}")
+    tracing.add_profile_argument(parser, 'analytics')
+    args = parser.parse_args()
+    if args.stream and (args.columnar or args.dedupe):
+        parser.error("--stream reads the JSON / JSONL posts file; it cannot be combined with --columnar or --dedupe")
+    if args.summaries is not None and args.summaries < 0:
+        parser.error("--summaries takes a number of posts (0 = all)")
+
     processor = AnalyticsProcessor()
     # Use merged file with full content if available
     input_path = "data/special_participation_a_merged.json"
     if not os.path.exists(input_path):
         print(f"Warning: {input_path} not found, using fallback...")
         input_path = "data/special_participation_a.json"
-
-    processor.process(
-        input_path=input_path,
-        output_path="data/analytics.json",
-        advanced_analytics_path="data/advanced_analytics.json"
-    )
+        # Streaming scrapes (scraper.py --stream) only produce JSONL
+        if not os.path.exists(input_path) and os.path.exists("data/special_participation_a.jsonl"):
+            input_path = "data/special_participation_a.jsonl"
+    if args.columnar:
+        input_path = store_path_for(input_path)
+
+    summarizer = None
+    if args.summaries is not None and os.getenv('OPENAI_API_KEY'):
+        summarizer = Summarizer(model=args.summary_model, batch_size=args.summary_batch,
+                                concurrency=args.summary_concurrency, deterministic=args.deterministic,
+                                cache_path=None if args.no_summary_cache else SUMMARY_CACHE_PATH)
+
+    with tracing.profiled(args.profile, 'analytics'):
+        processor.process(
+            input_path=input_path,
+            output_path="data/analytics.json",
+            advanced_analytics_path="data/advanced_analytics.json",
+            dedupe=args.dedupe,
+            sketch=args.sketch,
+            stream=args.stream,
+            summaries=args.summaries,
+            summarizer=summarizer
+        )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,206 @@
+"""
+CS182 Blue Team - Frontend data artifacts
+Splits the posts and analytics outputs into minified JSON shards the web app
+can fetch as it needs them: posts and HW x Model analysis per homework,
+model comparisons per model, related posts per homework, and one small core
+shard with the dashboard statistics. Shard file names carry a hash of their bytes, so a CDN can cache
+them forever; manifest.json (the one file that changes in place) maps each
+homework / model to its shard. Every shard also gets .gz and .br copies for
+servers that send precompressed files.
+"""
+
+import os
+import re
+import json
+import gzip
+import hashlib
+import argparse
+from typing import List, Dict, Any, Optional
+
+try:
+    import brotli
+except ImportError:  # .br copies are skipped without the brotli package
+    brotli = None
+
+from post_io import load_posts
+
+MANIFEST_VERSION = 1
+SHARD_DIR = "shards"
+MANIFEST_NAME = "manifest.json"
+
+# Post fields the web app never reads
+DROPPED_POST_FIELDS = ('content_raw', 'updated_at')
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def compact_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def slug(key: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', str(key).lower()).strip('-') or 'unknown'
+
+
+class ShardWriter:
+    """
+    Writes content-addressed shards (plus .gz / .br copies) into one
+    directory and records them; prune() removes files of earlier runs that
+    the new manifest no longer mentions.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.directory = os.path.join(root, SHARD_DIR)
+        self.files: set = set()
+        self.raw_bytes = 0
+        self.gzip_bytes = 0
+        self.brotli_bytes = 0
+
+    def write(self, kind: str, key: Optional[str], value: Any) -> str:
+        """Path of the shard (relative to root) holding the value"""
+        data = compact_json(value)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        name = f"{kind}.{slug(key)}.{digest}.json" if key is not None else f"{kind}.{digest}.json"
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        compressed = {'': data, '.gz': gzip.compress(data, GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            compressed['.br'] = brotli.compress(data, quality=BROTLI_QUALITY)
+        for suffix, payload in compressed.items():
+            self.files.add(name + suffix)
+            # Same name means same bytes; never rewrite a published shard
+            if not os.path.exists(path + suffix):
+                with open(path + suffix + '.tmp', 'wb') as f:
+                    f.write(payload)
+                os.replace(path + suffix + '.tmp', path + suffix)
+        self.raw_bytes += len(data)
+        self.gzip_bytes += len(compressed['.gz'])
+        self.brotli_bytes += len(compressed.get('.br', b''))
+        return f"{SHARD_DIR}/{name}"
+
+    def prune(self) -> int:
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name not in self.files:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
+
+
+def group_posts(posts: List[Dict[str, Any]], field: str) -> Dict[str, Dict[str, list]]:
+    """
+    Posts by a field's value (first-appearance order), without the fields the
+    app ignores, as {'rows': positions in the dataset, 'posts': [...]} so the
+    app can put the full list back in its original order.
+    """
+    groups: Dict[str, Dict[str, list]] = {}
+    for i, post in enumerate(posts):
+        group = groups.setdefault(post.get(field, 'Unknown'), {'rows': [], 'posts': []})
+        group['rows'].append(i)
+        group['posts'].append({k: v for k, v in post.items() if k not in DROPPED_POST_FIELDS})
+    return groups
+
+
+def group_related(posts: List[Dict[str, Any]], related: Dict[str, Any]) -> Dict[str, Dict[str, list]]:
+    """
+    related_posts.json regrouped like the posts: per homework, post id ->
+    [[neighbour id, cosine], ...] for the listed posts, keeping only
+    neighbours that are listed too.
+    """
+    ids = related.get('ids', [])
+    listed = {str(post.get('id')) for post in posts}
+    by_id = {
+        post_id: [[ids[r], s] for r, s in zip(rows, scores) if ids[r] in listed]
+        for post_id, rows, scores in zip(ids, related.get('neighbours', []), related.get('scores', []))
+    }
+    groups: Dict[str, Dict[str, list]] = {}
+    for post in posts:
+        neighbours = by_id.get(str(post.get('id')))
+        if neighbours:
+            groups.setdefault(post.get('homework', 'Unknown'), {})[str(post.get('id'))] = neighbours
+    return groups
+
+
+def build_artifacts(posts: List[Dict[str, Any]], analytics: Optional[Dict[str, Any]],
+                    advanced: Optional[Dict[str, Any]], root: str,
+                    related: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Write all shards and manifest.json under root; returns the manifest"""
+    writer = ShardWriter(root)
+    manifest: Dict[str, Any] = {
+        'version': MANIFEST_VERSION,
+        'total_posts': len(posts),
+        'posts': {hw: writer.write('posts', hw, group) for hw, group in group_posts(posts, 'homework').items()},
+    }
+
+    core: Dict[str, Any] = {}
+    if analytics is not None:
+        insights = {k: v for k, v in analytics.get('insights', {}).items() if k != 'model_comparison'}
+        core['analytics'] = {'generated_at': analytics.get('generated_at'),
+                             'statistics': analytics.get('statistics', {}), 'insights': insights}
+        manifest['model_comparison'] = {
+            model: writer.write('model', model, insight)
+            for model, insight in analytics.get('insights', {}).get('model_comparison', {}).items()
+        }
+    if advanced is not None:
+        core['advanced_analytics'] = {k: v for k, v in advanced.items() if k != 'hw_model_analysis'}
+        manifest['hw_model_analysis'] = {
+            hw: writer.write('analysis', hw, models) for hw, models in advanced.get('hw_model_analysis', {}).items()
+        }
+    if related is not None:
+        manifest['related'] = {hw: writer.write('related', hw, group)
+                               for hw, group in group_related(posts, related).items()}
+    manifest['core'] = writer.write('core', None, core)
+
+    with open(os.path.join(root, MANIFEST_NAME + '.tmp'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    os.replace(os.path.join(root, MANIFEST_NAME + '.tmp'), os.path.join(root, MANIFEST_NAME))
+
+    removed = writer.prune()
+    sizes = f"{writer.raw_bytes / 1024:.0f} KiB minified, {writer.gzip_bytes / 1024:.0f} KiB gzip"
+    if brotli is not None:
+        sizes += f", {writer.brotli_bytes / 1024:.0f} KiB brotli"
+    else:
+        sizes += " (brotli not installed, no .br copies)"
+    print(f"Wrote {len(writer.files)} shard files ({sizes}); removed {removed} stale")
+    return manifest
+
+
+def load_optional(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        print(f"Note: {path} not found, skipping its shards")
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write sharded, precompressed data files for the web app")
+    parser.add_argument('--posts', help="posts JSON / JSONL the app lists (default: the merged dataset)")
+    parser.add_argument('--analytics', default="data/analytics.json")
+    parser.add_argument('--advanced', default="data/advanced_analytics.json")
+    parser.add_argument('--related', default="data/related_posts.json")
+    parser.add_argument('--out', default="../frontend/public/data",
+                        help=f"directory for {MANIFEST_NAME} and {SHARD_DIR}/")
+    args = parser.parse_args()
+
+    input_path = args.posts
+    if input_path is None:
+        # Same fallbacks as the analytics scripts (the scrape's listing has no post content)
+        for candidate in ("data/special_participation_a_merged.json", "data/special_participation_a.json",
+                          "data/special_participation_a.jsonl"):
+            if os.path.exists(candidate):
+                input_path = candidate
+                break
+        else:
+            print("Error: No data file found!")
+            return
+    posts = load_posts(input_path)
+    manifest = build_artifacts(posts, load_optional(args.analytics), load_optional(args.advanced), args.out,
+                               load_optional(args.related))
+    print(f"{len(manifest['posts'])} homework post shards; manifest saved to {os.path.join(args.out, MANIFEST_NAME)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled TitleClassifier vs the per-pattern re.search loop.
+
+Checks that both give identical model/homework labels on every synthetic
+title and reports throughput.
+
+Usage (from backend/):
+    python3 benchmarks/bench_classifier.py --titles 1000000
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_titles
+from title_classifier import TitleClassifier, PATTERNS_PATH
+import json
+
+
+def make_loop_classifier(path: str = PATTERNS_PATH):
+    """The pre-compiled-classifier implementation: one re.search per pattern, in order"""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    model_patterns = [(e["pattern"], e["name"]) for e in spec["models"]]
+    hw_patterns = spec["homework"]
+
+    def classify(title):
+        metadata = {"model": "Unknown", "homework": "Unknown"}
+        for pattern, canonical_name in model_patterns:
+            if re.search(pattern, title, re.IGNORECASE):
+                metadata["model"] = canonical_name
+                break
+        for pattern in hw_patterns:
+            match = re.search(pattern, title, re.IGNORECASE)
+            if match:
+                hw_num = match.group(1).lstrip('0') or '0'
+                metadata["homework"] = f"HW{hw_num}"
+                break
+        return metadata
+
+    return classify
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.titles, seed=args.seed)
+    loop = make_loop_classifier()
+    compiled = TitleClassifier.from_file()
+
+    start = time.perf_counter()
+    expected = [loop(t) for t in titles]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [compiled.classify(t) for t in titles]
+    compiled_time = time.perf_counter() - start
+
+    mismatches = [(t, e, a) for t, e, a in zip(titles, expected, actual) if e != a]
+
+    print(f"titles={len(titles):,}")
+    print(f"  re.search loop:     {loop_time:7.2f}s  ({len(titles) / loop_time:,.0f} titles/s)")
+    print(f"  TitleClassifier:    {compiled_time:7.2f}s  ({len(titles) / compiled_time:,.0f} titles/s)")
+    print(f"  speedup:            {loop_time / compiled_time:7.2f}x")
+    print(f"  mismatches:         {len(mismatches)}")
+    for t, e, a in mismatches[:10]:
+        print(f"    {t!r}: loop={e} compiled={a}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
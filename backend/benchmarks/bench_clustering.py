@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: representative-post selection on one very large HW x Model group.
+
+Times cluster_posts() (spherical k-means over content TF-IDF, medoids) with
+its peak traced memory, next to the title-TF-IDF ranking it replaced. On a
+subsample, the medoids are checked against a brute-force search over the
+full pairwise cosine-similarity matrix (the quadratic approach the linear
+medoid avoids).
+
+Usage (from backend/):
+    python3 benchmarks/bench_clustering.py --posts 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from advanced_analytics import AdvancedAnalytics
+from clustering import CosineRows, spherical_kmeans
+from text_cache import part_tokens
+from tfidf import TfidfMatrix
+
+
+def title_ranking(analyzer, posts, texts, k):
+    """cluster_posts() before k-means: highest mean title TF-IDF first"""
+    matrix = TfidfMatrix(part_tokens(t['parts'][0]) if p.get('title') else [] for p, t in zip(posts, texts))
+    order = np.lexsort((np.arange(len(posts)), -matrix.row_means()))
+    return [posts[i] for i in order[:k]]
+
+
+def brute_force_medoids(rows: CosineRows, clusters):
+    dense = np.zeros((rows.n_docs, rows.n_terms))
+    dense[rows.row_of, rows.indices] = rows.values
+    similarity = dense @ dense.T
+    return [int(c.members[np.argmax(similarity[np.ix_(c.members, c.members)].sum(axis=1))]) for c in clusters]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--clusters", type=int, default=3)
+    parser.add_argument("--check", type=int, default=2000, help="posts in the brute-force medoid check")
+    args = parser.parse_args()
+
+    analyzer = AdvancedAnalytics()
+    posts = list(synthetic_posts(args.posts))
+    texts = [analyzer.preprocess_post(p) for p in posts]
+    print(f"posts={len(posts):,}  tokens={sum(len(part_tokens(part)) for t in texts for part in t['parts']):,}")
+
+    start = time.perf_counter()
+    title_ranking(analyzer, posts, texts, args.clusters)
+    title_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    representative = analyzer.cluster_posts(posts, max_clusters=args.clusters, texts=texts)
+    cluster_time = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"  title TF-IDF ranking (old):  {title_time:7.2f}s")
+    print(f"  spherical k-means + medoids: {cluster_time:7.2f}s  peak {peak / 2**20:.1f} MiB "
+          f"(a dense similarity matrix would be {len(posts) ** 2 * 8 / 2**30:.1f} GiB)")
+    for post in representative:
+        print(f"    {analyzer.post_snippet(post, 90)}")
+
+    sample = texts[:args.check]
+    matrix = TfidfMatrix([token for part in t['parts'] for token in part_tokens(part)] for t in sample)
+    clusters = spherical_kmeans(matrix, args.clusters)
+    print(f"  cluster sizes ({len(sample):,}-post sample): {[len(c.members) for c in clusters]}")
+    expected = brute_force_medoids(CosineRows(matrix), clusters)
+    mismatched = sum(1 for c, e in zip(clusters, expected) if c.medoid != e)
+    print(f"  medoids differing from the brute-force search: {mismatched}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
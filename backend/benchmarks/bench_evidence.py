@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: whole-text EvidenceMatcher vs per-sentence evidence checks.
+
+The reference is the evidence code before EvidenceMatcher: split the text,
+then for every sentence lowercase it, search the vague and meta phrase
+patterns, tokenize it and intersect the tokens with the strength/weakness
+sets. Both sides evaluate every sentence of large synthetic Ed write-ups
+(as ranked mode needs), from raw text and with the sentence tokens already
+known (as in preprocessing, where tokenizing is shared with TF-IDF), and
+compat-mode extract_strengths_weaknesses() is timed against the old
+first-five loop. Flags and selections must match.
+
+Usage (from backend/):
+    python3 benchmarks/bench_evidence.py --docs 2000 --blocks 100
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_document
+from advanced_analytics import AdvancedAnalytics, VAGUE_PHRASES, META_PHRASES
+from evidence import flags_of
+from text_cache import STRENGTH, WEAKNESS
+
+VAGUE_PATTERN = re.compile('|'.join(re.escape(phrase) for phrase in sorted(VAGUE_PHRASES)))
+META_PATTERN = re.compile('|'.join(re.escape(phrase) for phrase in META_PHRASES))
+
+
+def reference_flags(analyzer: AdvancedAnalytics, sentence: str, tokens=None) -> int:
+    """sentence_evidence() before EvidenceMatcher"""
+    sentence_lower = sentence.lower()
+    clean = sentence.strip()
+    if not clean or len(clean) < 30 or len(clean) > 250:
+        return 0
+    if VAGUE_PATTERN.search(sentence_lower) is not None:
+        return 0
+    if META_PATTERN.search(sentence_lower) and len(clean) < 60:
+        return 0
+    words = set(analyzer.tokenize(sentence) if tokens is None else tokens)
+    if len(words) < 8:
+        return 0
+    flags = 0
+    if words & analyzer.strength_terms:
+        flags |= STRENGTH
+    if words & analyzer.weakness_terms:
+        flags |= WEAKNESS
+    return flags
+
+
+def reference_extract(analyzer: AdvancedAnalytics, text: str):
+    """extract_strengths_weaknesses() before EvidenceMatcher (first five of each)"""
+    strengths, weaknesses = [], []
+    for sentence in re.split(r'[.!?]+', text):
+        flags = reference_flags(analyzer, sentence)
+        if flags & STRENGTH:
+            strengths.append(sentence.strip()[:200])
+        if flags & WEAKNESS:
+            weaknesses.append(sentence.strip()[:200])
+        if len(strengths) >= 5 and len(weaknesses) >= 5:
+            break
+    return {'strengths': strengths[:5], 'weaknesses': weaknesses[:5]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--blocks", type=int, default=100, help="top-level blocks per document")
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    analyzer = AdvancedAnalytics(evidence_mode='compat')
+    rng = random.Random(args.seed)
+    texts = [analyzer.strip_html(synthetic_document(rng, args.blocks)) for _ in range(args.docs)]
+    sentences = [re.split(r'[.!?]+', text) for text in texts]
+    print(f"docs={len(texts):,}  sentences={sum(map(len, sentences)):,}  text={sum(map(len, texts)) / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    expected = [[reference_flags(analyzer, s) for s in doc] for doc in sentences]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = [analyzer.evidence.sentence_hits(text, doc) for text, doc in zip(texts, sentences)]
+    scan_time = time.perf_counter() - start
+    actual = [[flags_of(h, STRENGTH, WEAKNESS) for h in doc] for doc in hits]
+
+    # Preprocessing already has every sentence's tokens; both sides reuse them
+    tokens = [[analyzer.tokenize(s) for s in doc] for doc in sentences]
+    start = time.perf_counter()
+    for doc, doc_tokens in zip(sentences, tokens):
+        for sentence, sentence_tokens in zip(doc, doc_tokens):
+            reference_flags(analyzer, sentence, sentence_tokens)
+    reference_tokens_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text, doc, doc_tokens in zip(texts, sentences, tokens):
+        analyzer.evidence.sentence_hits(text, doc, doc_tokens)
+    scan_tokens_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected_first = [reference_extract(analyzer, text) for text in texts]
+    reference_first_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual_first = [analyzer.extract_strengths_weaknesses(text) for text in texts]
+    compat_time = time.perf_counter() - start
+
+    ranked = AdvancedAnalytics(evidence_mode='ranked')
+    start = time.perf_counter()
+    for text in texts:
+        ranked.extract_strengths_weaknesses(text)
+    ranked_time = time.perf_counter() - start
+
+    mismatched = sum(1 for e, a in zip(expected, actual) for x, y in zip(e, a) if x != y)
+    mismatched_first = sum(1 for e, a in zip(expected_first, actual_first) if e != a)
+    negated = sum(1 for doc in hits for h in doc if h and h[2])
+    print(f"  every sentence, per-sentence checks: {reference_time:7.2f}s")
+    print(f"  every sentence, one pass per text:   {scan_time:7.2f}s  ({reference_time / scan_time:.1f}x)")
+    print(f"  ... with tokens known, per-sentence: {reference_tokens_time:7.2f}s")
+    print(f"  ... with tokens known, one pass:     {scan_tokens_time:7.2f}s  "
+          f"({reference_tokens_time / scan_tokens_time:.1f}x)")
+    print(f"  first five (old early-exit loop):    {reference_first_time:7.2f}s")
+    print(f"  first five (compat mode):            {compat_time:7.2f}s  ({reference_first_time / compat_time:.1f}x)")
+    print(f"  ranked mode (all sentences scored):  {ranked_time:7.2f}s")
+    print(f"  evidence sentences with negated terms: {negated:,}")
+    print(f"  mismatched sentence flags: {mismatched}")
+    print(f"  mismatched first-five selections: {mismatched_first}")
+    if mismatched or mismatched_first:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs concurrent thread-detail fetching.
+
+Runs merge_settled_with_content.merge_threads against a local stand-in Ed
+server, checks that the concurrent run produces exactly the sequential output,
+and reports the speedup. Then fills a thread detail cache, edits one thread
+on the server and reruns with the listing's (now stale) updated_at values
+as hints: the edited thread must be downloaded again and every other one
+revalidated with a 304.
+
+Usage (from backend/):
+    python3 benchmarks/bench_fetch.py --threads 200 --latency 0.05 --max-in-flight 8
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "data"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("ED_API_TOKEN", "stub-token")
+
+from stub_ed_server import StubEdServer, make_threads
+from merge_settled_with_content import EdClient, ThreadDetailCache, merge_threads, COURSE_ID
+
+
+def settled_rows(threads):
+    return {
+        t["id"]: {
+            "id": str(t["id"]),
+            "title": t["title"],
+            "author": t["user"]["name"],
+            "model": "Unknown",
+            "homework": "Unknown",
+            "created_at": t["created_at"],
+            "url": f"https://edstem.org/us/courses/{COURSE_ID}/discussion/{t['id']}",
+            "likes": str(t["votes"]),
+            "comments": str(t["comment_count"]),
+        }
+        for t in threads
+    }
+
+
+def timed_run(server, settled, max_in_flight, rate):
+    client = EdClient(COURSE_ID, base_url=server.base_url, pool_size=max_in_flight)
+    start = time.perf_counter()
+    merged, failures = merge_threads(client, settled, max_in_flight=max_in_flight, rate=rate)
+    elapsed = time.perf_counter() - start
+    print(client.transport.report())
+    return merged, failures, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=200.0, help="token-bucket rate (req/s)")
+    parser.add_argument("--throttle-every", type=int, default=0,
+                        help="answer every Nth request with 429 (0 disables)")
+    args = parser.parse_args()
+
+    threads = make_threads(args.threads)
+    settled = settled_rows(threads)
+
+    with StubEdServer(threads, latency=args.latency, throttle_every=args.throttle_every) as server:
+        seq, seq_fail, seq_time = timed_run(server, settled, 1, args.rate)
+        con, con_fail, con_time = timed_run(server, settled, args.max_in_flight, args.rate)
+        throttled = server.throttled
+
+    print(f"threads={args.threads} latency={args.latency}s rate={args.rate}/s throttled={throttled}")
+    print(f"  sequential:              {seq_time:7.2f}s  failures={seq_fail}")
+    print(f"  max_in_flight={args.max_in_flight:<3}       {con_time:7.2f}s  failures={con_fail}")
+    print(f"  speedup:                 {seq_time / con_time:7.2f}x")
+
+    if seq != con:
+        print("MISMATCH: concurrent output differs from sequential output")
+        sys.exit(1)
+    print("  output identical to sequential run: yes")
+    check_cache(threads, settled, args)
+
+
+def check_cache(threads, settled, args):
+    hints = {t["id"]: t["updated_at"] for t in threads}
+    edited = threads[-1]["id"]
+    with tempfile.TemporaryDirectory() as tmp, StubEdServer(threads, latency=args.latency) as server:
+        def cached_run():
+            cache = ThreadDetailCache(tmp)
+            client = EdClient(COURSE_ID, base_url=server.base_url, cache=cache, pool_size=args.max_in_flight)
+            merged, _ = merge_threads(client, settled, max_in_flight=args.max_in_flight, rate=args.rate,
+                                      updated_at=hints)
+            return merged, cache
+
+        cached_run()
+        server.edit(edited, "2025-12-31T12:00:00.000000+11:00",
+                    document="<document><paragraph>Edited after the listing was scraped.</paragraph></document>")
+        merged, cache = cached_run()
+
+    content = next(p["content"] for p in merged if p["id"] == edited)
+    print(f"  cached rerun after an edit: {cache.report()}")
+    if cache.misses != 1 or cache.revalidated != len(threads) - 1 or "Edited" not in content:
+        print("STALE: the edited thread was served from the cache")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental HW x Model recompute vs a full process_data run.
+
+Primes the group cache on a synthetic corpus, then applies a typical
+between-runs change (a few new posts prepended, like an incremental scrape,
+one post edited and one deleted) and runs process_data incrementally and in
+full. The serialized outputs must be byte-identical apart from generated_at.
+
+Usage (from backend/):
+    python3 benchmarks/bench_incremental.py --posts 20000 --new 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from advanced_analytics import AdvancedAnalytics
+
+
+def serialize(results) -> str:
+    """advanced_analytics.json as main() writes it, minus generated_at"""
+    results = dict(results)
+    results.pop('generated_at')
+    return json.dumps(results, indent=2, ensure_ascii=False)
+
+
+def timed_run(analyzer: AdvancedAnalytics, data):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        results = analyzer.process_data(data)
+        return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--new", type=int, default=5, help="posts prepended between runs")
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    corpus = list(synthetic_posts(args.posts + args.new, seed=args.seed))
+    before = corpus[args.new:]
+    after = corpus[:args.new] + before
+    after[len(after) // 2] = dict(after[len(after) // 2], content="<paragraph>Edited: it was wrong again.</paragraph>")
+    del after[len(after) // 3]
+    print(f"posts={len(before):,} -> {len(after):,}  (+{args.new} new, 1 edited, 1 deleted)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        groups = os.path.join(tmp, "groups.jsonl")
+        preprocessed = os.path.join(tmp, "preprocessed.jsonl")
+
+        _, prime_time = timed_run(AdvancedAnalytics(cache_path=preprocessed, group_cache_path=groups), before)
+        full, full_time = timed_run(AdvancedAnalytics(), after)
+        full_cached, full_cached_time = timed_run(AdvancedAnalytics(cache_path=preprocessed), after)
+        analyzer = AdvancedAnalytics(cache_path=preprocessed, group_cache_path=groups)
+        incremental, incremental_time = timed_run(analyzer, after)
+
+    print(f"  priming run (full + state):     {prime_time:7.2f}s")
+    print(f"  full recompute:                 {full_time:7.2f}s")
+    print(f"  full, warm preprocess cache:    {full_cached_time:7.2f}s")
+    print(f"  incremental:                    {incremental_time:7.2f}s  "
+          f"({full_time / incremental_time:.1f}x; re-analyzed {analyzer.group_cache.misses} "
+          f"of {analyzer.group_cache.hits + analyzer.group_cache.misses} groups)")
+
+    identical = serialize(full) == serialize(incremental) == serialize(full_cached)
+    print(f"  byte-identical output: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: MinHash / LSH near-duplicate clustering.
+
+Builds a synthetic corpus of distinct write-ups and reposts a share of them
+with a few words edited, then times SignatureStore.clusters() cold (every
+post signed) and warm (signatures loaded from disk, a few new posts signed),
+and checking single new posts with matches(). On a subsample, the pairs found
+are compared with an exact all-pairs Jaccard search over the shingle sets.
+
+Usage (from backend/):
+    python3 benchmarks/bench_near_duplicates.py --posts 50000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from itertools import combinations
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import TOPIC_TERMS, TOPIC_WEIGHTS, synthetic_posts
+from near_duplicates import THRESHOLD, SignatureStore, shingle_hashes
+from text_normalize import normalize_html
+
+
+def corpus(count: int, repost_rate: float, seed: int):
+    """Posts with varied bodies; a share are reposts of an earlier post with ~1% of words replaced"""
+    rng = random.Random(seed)
+    posts, reposts = [], []
+    for i, post in enumerate(synthetic_posts(count, seed=seed)):
+        if posts and rng.random() < repost_rate:
+            source = rng.randrange(len(posts))
+            words = posts[source]['content'][len('<document><paragraph>'):-len('</paragraph></document>')].split()
+            for _ in range(max(1, len(words) // 100)):
+                words[rng.randrange(len(words))] = rng.choice(TOPIC_TERMS)
+            reposts.append((source, i))
+        else:
+            words = rng.choices(TOPIC_TERMS, weights=TOPIC_WEIGHTS, k=rng.randint(80, 400))
+        post['content'] = '<document><paragraph>' + ' '.join(words) + '</paragraph></document>'
+        posts.append(post)
+    return posts, reposts
+
+
+def exact_pairs(posts):
+    shingles = [set(shingle_hashes(normalize_html(p['content'])).tolist()) for p in posts]
+    return {(i, j) for i, j in combinations(range(len(posts)), 2)
+            if shingles[i] and len(shingles[i] & shingles[j]) / len(shingles[i] | shingles[j]) >= THRESHOLD}
+
+
+def clustered_pairs(clusters):
+    return {pair for rows in clusters for pair in combinations(rows, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--reposts", type=float, default=0.05, help="share of posts that repost an earlier one")
+    parser.add_argument("--new", type=int, default=20, help="posts added before the warm run")
+    parser.add_argument("--check", type=int, default=1500, help="posts in the exact all-pairs comparison")
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    posts, reposts = corpus(args.posts + args.new, args.reposts, args.seed)
+    old, new = posts[:args.posts], posts[args.posts:]
+    print(f"posts={len(old):,} (+{len(new)} new)  reposts={len(reposts):,}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "minhash.npz")
+        start = time.perf_counter()
+        store = SignatureStore(path)
+        clusters = store.clusters(old)
+        store.save()
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = SignatureStore(path)
+        warm_clusters = store.clusters(old + new)
+        warm = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for post in new:
+            store.matches(post)
+        check = (time.perf_counter() - start) / max(len(new), 1)
+
+    found = clustered_pairs(clusters)
+    expected = [pair for pair in reposts if pair[1] < args.posts]
+    recall = sum(1 for pair in expected if pair in found) / max(len(expected), 1)
+    print(f"  cold (sign all):       {cold:7.2f}s  {len(clusters):,} clusters, repost recall {recall:.1%}")
+    print(f"  warm (+{len(new)} posts):      {warm:7.2f}s  {len(warm_clusters):,} clusters, {store.computed} signed")
+    print(f"  matches() per new post: {check * 1000:6.2f}ms")
+
+    sample = old[:args.check]
+    with tempfile.TemporaryDirectory() as tmp:
+        lsh = clustered_pairs(SignatureStore(os.path.join(tmp, "minhash.npz")).clusters(sample))
+    exact = exact_pairs(sample)
+    print(f"  exact pairs >= {THRESHOLD} in {len(sample):,}-post sample: {len(exact)}, "
+          f"found {len(exact & lsh)}, extra {len(lsh - exact)}")
+
+
+if __name__ == "__main__":
+    main()
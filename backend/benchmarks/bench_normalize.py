@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: normalize_html vs the two HTML-to-text paths it replaces.
+
+  - HTMLParser: AdvancedAnalytics.strip_html before text_normalize (a new
+    HTMLParser subclass instance per call, text nodes joined with '')
+  - BeautifulSoup: merge_settled_with_content.html_to_text before
+    text_normalize (get_text("\\n", strip=True)); skipped if bs4 is missing
+
+on large synthetic Ed documents. Apart from whitespace, normalize_html must
+produce exactly the HTMLParser text: the same characters, with entities
+decoded, in the same order.
+
+Usage (from backend/):
+    python3 benchmarks/bench_normalize.py --docs 2000 --blocks 200
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_document
+from text_normalize import normalize_html
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+class HTMLStripper(HTMLParser):
+    """The former AdvancedAnalytics HTML stripper"""
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+        self.strict = False
+        self.convert_charrefs = True
+        self.text = []
+
+    def handle_data(self, d):
+        self.text.append(d)
+
+    def get_text(self):
+        return ''.join(self.text)
+
+
+def htmlparser_text(html_text: str) -> str:
+    if not html_text:
+        return ""
+    stripper = HTMLStripper()
+    try:
+        stripper.feed(html_text)
+        return stripper.get_text()
+    except:
+        return re.sub(r'<[^>]+>', ' ', html_text)
+
+
+def bs4_text(html: str) -> str:
+    return BeautifulSoup(html, "html.parser").get_text("\n", strip=True)
+
+
+def timed(convert, docs):
+    start = time.perf_counter()
+    texts = [convert(doc) for doc in docs]
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--blocks", type=int, default=200, help="top-level blocks per document")
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = [synthetic_document(rng, args.blocks) for _ in range(args.docs)]
+    megabytes = sum(map(len, docs)) / 1e6
+    print(f"docs={len(docs):,}  avg={megabytes * 1e6 / len(docs) / 1024:.1f} KiB  total={megabytes:.1f} MB")
+
+    texts, seconds = timed(normalize_html, docs)
+    timings = {"normalize_html": seconds}
+    _, timings["normalize_html (drop_code)"] = timed(lambda doc: normalize_html(doc, drop_code=True), docs)
+    reference, timings["HTMLParser"] = timed(htmlparser_text, docs)
+    if BeautifulSoup is not None:
+        _, timings["BeautifulSoup"] = timed(bs4_text, docs)
+    else:
+        print("  (bs4 not installed; BeautifulSoup path skipped)")
+
+    for name, seconds in timings.items():
+        print(f"  {name:<27} {seconds:7.2f}s  {megabytes / seconds:6.1f} MB/s  "
+              f"({seconds / timings['normalize_html']:.1f}x normalize_html time)")
+
+    squeeze = re.compile(r'\s+')
+    mismatched = sum(1 for a, b in zip(texts, reference) if squeeze.sub('', a) != squeeze.sub('', b))
+    print(f"  documents whose text differs from HTMLParser beyond whitespace: {mismatched}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
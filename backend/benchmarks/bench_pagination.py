@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs sliding-window (prefetch) pagination in EdScraper.
+
+Pages through a local stand-in Ed server with per-request latency, checks
+that the prefetching run yields exactly the serial thread list, and reports
+the speedup and the number of speculative requests past the last page.
+Then publishes a new thread and edits the oldest one (it stays on the last
+page of the default listing, which is ordered by creation) and checks that
+an incremental crawl from the full crawl's cursor returns exactly those two
+with far fewer requests than a full crawl.
+
+Usage (from backend/):
+    python3 benchmarks/bench_pagination.py --threads 3000 --latency 0.05 --prefetch 8
+"""
+
+import os
+import sys
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("ED_API_TOKEN", "stub-token")
+
+from stub_ed_server import StubEdServer, make_threads
+from scraper import EdScraper
+
+
+def timed_crawl(server, prefetch, cursor=None):
+    scraper = EdScraper()
+    scraper.transport.base_url = scraper.base_url = server.base_url
+    before = server.request_count
+    start = time.perf_counter()
+    threads = scraper.get_threads(cursor=cursor, prefetch=prefetch)
+    return threads, time.perf_counter() - start, server.request_count - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--prefetch", type=int, default=8)
+    args = parser.parse_args()
+
+    with StubEdServer(make_threads(args.threads), latency=args.latency) as server:
+        serial, serial_time, serial_requests = timed_crawl(server, 1)
+        window, window_time, window_requests = timed_crawl(server, args.prefetch)
+
+        cursor = EdScraper.build_cursor(serial)
+        new_thread = {**make_threads(1)[0], "id": max(t["id"] for t in serial) + 1,
+                      "created_at": "2025-12-01T10:00:00.000000+11:00",
+                      "updated_at": "2025-12-01T10:00:00.000000+11:00"}
+        server.publish(new_thread)
+        oldest = serial[-1]["id"]
+        server.edit(oldest, "2025-12-02T09:00:00.000000+11:00", title=serial[-1]["title"] + " (edited)")
+        changed, _, incremental_requests = timed_crawl(server, args.prefetch, cursor)
+
+    print(f"threads={args.threads} latency={args.latency}s")
+    print(f"  serial:        {serial_time:7.2f}s  requests={serial_requests}")
+    print(f"  prefetch={args.prefetch:<4} {window_time:7.2f}s  requests={window_requests} "
+          f"(speculative extra={window_requests - serial_requests})")
+    print(f"  speedup:       {serial_time / window_time:7.2f}x")
+
+    if [t["id"] for t in serial] != [t["id"] for t in window]:
+        print("MISMATCH: prefetching crawl differs from serial crawl")
+        sys.exit(1)
+    print("  thread list identical to serial crawl: yes")
+
+    expected = {new_thread["id"], oldest}
+    print(f"  incremental:   requests={incremental_requests}  changed threads={len(changed)} "
+          f"(new + edited oldest: {'found' if {t['id'] for t in changed} == expected else 'MISSED'})")
+    if {t["id"] for t in changed} != expected or len(changed) != len(expected):
+        sys.exit(1)
+    if incremental_requests >= window_requests:
+        print("  incremental crawl did not stop early")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
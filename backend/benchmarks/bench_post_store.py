@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON list vs memory-mapped columnar store for basic statistics.
+
+Writes a synthetic corpus both as a JSON array and as a columnar store, then
+loads each in a fresh child process and runs calculate_statistics(), reporting
+load time, statistics time and peak RSS. The two statistics must be identical
+(compared as serialized JSON, so key order counts).
+
+Usage (from backend/):
+    python3 benchmarks/bench_post_store.py --posts 200000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from post_store import write_store
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process image. VmHWM is used where
+    available because ru_maxrss survives exec and would include the parent's
+    peak (which holds the whole synthetic corpus).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(path: str, out_path: str):
+    """Load `path` and compute statistics; prints timings and peak RSS as JSON"""
+    from analytics import AnalyticsProcessor
+
+    processor = AnalyticsProcessor()
+    start = time.perf_counter()
+    data = processor.load_data(path)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = processor.calculate_statistics(data)
+    stats_time = time.perf_counter() - start
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f)
+    print(json.dumps({
+        "load_s": load_time,
+        "stats_s": stats_time,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def measure(path: str, out_path: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", path, "--child-out", out_path],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=182)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.child_out)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "posts.json")
+        store_path = os.path.join(tmp, "posts.cols")
+
+        start = time.perf_counter()
+        posts = list(synthetic_posts(args.posts, seed=args.seed))
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(posts, f, indent=2, ensure_ascii=False)
+        write_store(posts, store_path)
+        del posts
+        print(f"posts={args.posts:,}  (corpus written in {time.perf_counter() - start:.1f}s)")
+
+        results = {}
+        for name, path in (("json", json_path), ("columnar", store_path)):
+            results[name] = measure(path, os.path.join(tmp, f"{name}.stats.json"))
+            r = results[name]
+            print(f"  {name:<9} load={r['load_s']:6.2f}s  stats={r['stats_s']:6.2f}s  peak_rss={r['peak_rss_mb']:7.1f} MB")
+
+        j, c = results["json"], results["columnar"]
+        print(f"  speedup (load+stats): {(j['load_s'] + j['stats_s']) / (c['load_s'] + c['stats_s']):.1f}x"
+              f"  memory: {j['peak_rss_mb'] / c['peak_rss_mb']:.1f}x less")
+
+        with open(os.path.join(tmp, "json.stats.json")) as a, open(os.path.join(tmp, "columnar.stats.json")) as b:
+            identical = a.read() == b.read()
+        print(f"  identical statistics: {identical}")
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
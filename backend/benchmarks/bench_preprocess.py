@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-post preprocessing cache vs re-deriving text in every pass.
+
+The reference path does what process_data did before preprocessing was
+shared: strip HTML and tokenize each post once for its HW x Model group and
+again for the global terms, and re-split/re-tokenize the joined group text
+for strengths/weaknesses. The new path is run cold (empty cache) and warm
+(cache file from the cold run). All three must give identical group
+analyses and global top terms.
+
+Usage (from backend/):
+    python3 benchmarks/bench_preprocess.py --posts 20000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from advanced_analytics import AdvancedAnalytics
+from clustering import spherical_kmeans
+from tfidf import TfidfMatrix
+
+
+def reference_analysis(analyzer: AdvancedAnalytics, data):
+    """Group analyses and global top terms, re-deriving all text in each pass"""
+    groups = defaultdict(lambda: defaultdict(list))
+    for post in data:
+        groups[post.get('homework', 'Unknown')][post.get('model', 'Unknown')].append(post)
+
+    analysis = {}
+    for hw, models in groups.items():
+        analysis[hw] = {}
+        for model, posts in models.items():
+            parts = []
+            for p in posts:
+                if p.get('title'):
+                    parts.append(p.get('title'))
+                if p.get('content'):
+                    parts.append(analyzer.strip_html(p.get('content')))
+            all_text = ' '.join(parts)
+            top_terms = analyzer.top_tf_terms(analyzer.tokenize(all_text), 15)
+            sw = analyzer.extract_strengths_weaknesses(all_text)
+            representative = posts
+            if len(posts) > 3:
+                matrix = TfidfMatrix(analyzer.tokenize(p.get('title') or '')
+                                     + analyzer.tokenize(analyzer.strip_html(p.get('content') or ''))
+                                     for p in posts)
+                representative = [posts[cluster.medoid] for cluster in spherical_kmeans(matrix, 3)]
+            analysis[hw][model] = {
+                'top_terms': [[t, round(s, 4)] for t, s in top_terms],
+                'strengths': sw['strengths'],
+                'weaknesses': sw['weaknesses'],
+                'representative': [p['url'] for p in representative[:3]],
+            }
+
+    parts = []
+    for p in data:
+        if p.get('title'):
+            parts.append(p.get('title'))
+        if p.get('content'):
+            parts.append(analyzer.strip_html(p.get('content')))
+    global_top = analyzer.top_tf_terms(analyzer.tokenize(' '.join(parts)), 30)
+    return analysis, [[t, round(s, 4)] for t, s in global_top]
+
+
+def shared_analysis(analyzer: AdvancedAnalytics, data):
+    """The same results from AdvancedAnalytics.process_data"""
+    result = analyzer.process_data(data)
+    analysis = {
+        hw: {
+            model: {
+                'top_terms': [[t['term'], t['score']] for t in group['top_terms']],
+                'strengths': group['strengths'],
+                'weaknesses': group['weaknesses'],
+                'representative': [p['url'] for p in group['representative_posts']],
+            }
+            for model, group in models.items()
+        }
+        for hw, models in result['hw_model_analysis'].items()
+    }
+    global_top = [[t['term'], t['frequency']] for t in result['statistics']['global_top_terms']]
+    return analysis, global_top
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    data = list(synthetic_posts(args.posts, seed=args.seed))
+    print(f"posts={len(data):,}")
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        cache_path = os.path.join(tmp, "preprocessed.jsonl")
+        timings = {}
+        results = {}
+
+        start = time.perf_counter()
+        results["reference"] = reference_analysis(AdvancedAnalytics(), data)
+        timings["reference"] = time.perf_counter() - start
+
+        for run in ("cold cache", "warm cache"):
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                start = time.perf_counter()
+                analyzer = AdvancedAnalytics(cache_path=cache_path)
+                results[run] = shared_analysis(analyzer, data)
+                timings[run] = time.perf_counter() - start
+            finally:
+                sys.stdout = stdout
+
+    for run, seconds in timings.items():
+        print(f"  {run:<11} {seconds:7.2f}s  ({timings['reference'] / seconds:.1f}x)")
+    identical = all(json.dumps(r) == json.dumps(results["reference"]) for r in results.values())
+    print(f"  identical results: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
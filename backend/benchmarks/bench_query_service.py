@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: indexed post queries vs a filter-and-sort scan of the posts list.
+
+Indexes a synthetic corpus with QueryIndex, then runs a mix of Browse-style
+queries (model / homework / date / word filters, each sort order, first and
+later pages) against the index and against a plain Python scan that filters
+and sorts every post, as the app does client-side. Every page of results
+must match. Finally times the same queries over HTTP against a QueryService
+on a local port, cold and from its response cache.
+
+Usage (from backend/):
+    python3 benchmarks/bench_query_service.py --posts 50000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from query_service import QueryIndex, QueryService
+
+
+def scan(posts, params):
+    """Filter and sort the whole list, like Browse.jsx"""
+    def keep(p):
+        for field in ('model', 'homework'):
+            if field in params and p.get(field) not in params[field]:
+                return False
+        date = (p.get('created_at') or '')[:10]
+        if 'since' in params and not (date and date >= params['since'][0]):
+            return False
+        if 'until' in params and not (date and date <= params['until'][0]):
+            return False
+        return True
+
+    rows = [i for i, p in enumerate(posts) if keep(p)]
+    if 'q' in params:
+        words = params['q'][0].lower().split()
+        def text_words(p):
+            text = ' '.join([p['title'], re.sub(r'<[^>]+>', ' ', p['content']), p['author'], p['model'], p['homework']])
+            return set(re.findall(r'\w+', text.lower()))
+        rows = [i for i in rows if all(w in text_words(posts[i]) for w in words)]
+    sort = params.get('sort', ['recent'])[0]
+    if sort in ('recent', 'oldest'):
+        rows.sort(key=lambda i: datetime.fromisoformat(posts[i]['created_at']).timestamp(), reverse=sort == 'recent')
+    elif sort == 'popular':
+        rows.sort(key=lambda i: -(posts[i]['likes'] + posts[i]['comments']))
+    page, per_page = int(params.get('page', ['1'])[0]), 20
+    return len(rows), rows[(page - 1) * per_page:page * per_page]
+
+
+def queries(posts, count, seed):
+    rng = random.Random(seed)
+    models = sorted({p['model'] for p in posts})
+    homeworks = sorted({p['homework'] for p in posts})
+    result = []
+    for _ in range(count):
+        params = {'sort': [rng.choice(['recent', 'oldest', 'popular'])], 'page': [str(rng.choice([1, 1, 2, 10]))]}
+        if rng.random() < 0.6:
+            params['model'] = [rng.choice(models)]
+        if rng.random() < 0.6:
+            params['homework'] = [rng.choice(homeworks)]
+        if rng.random() < 0.3:
+            params['since'], params['until'] = ['2025-10-01'], ['2025-11-15']
+        if rng.random() < 0.2:
+            params['q'] = [rng.choice(['gradient', 'attention', 'hallucinated theorem', 'proof'])]
+        result.append(params)
+    return result
+
+
+async def fetch_all(port, targets):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for target in targets:
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nAccept-Encoding: gzip\r\n\r\n".encode())
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def http_timings(index, targets):
+    server = await asyncio.start_server(QueryService(index).handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    timings = []
+    async with server:
+        for _ in range(2):
+            start = time.perf_counter()
+            await fetch_all(port, targets)
+            timings.append(time.perf_counter() - start)
+        # Let the server see the connections close before it shuts down
+        await asyncio.sleep(0.05)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    posts = list(synthetic_posts(args.posts, seed=args.seed))
+    start = time.perf_counter()
+    index = QueryIndex(posts)
+    print(f"posts={len(posts):,}  index built in {time.perf_counter() - start:.2f}s")
+
+    mix = queries(posts, args.queries, args.seed)
+    start = time.perf_counter()
+    expected = [scan(posts, params) for params in mix]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [index.query_posts(params) for params in mix]
+    index_time = time.perf_counter() - start
+
+    mismatched = 0
+    for (total, rows), page in zip(expected, actual):
+        if total != page['total'] or [posts[i]['id'] for i in rows] != [p['id'] for p in page['posts']]:
+            mismatched += 1
+    print(f"  scan + sort per query:  {scan_time / len(mix) * 1000:8.2f}ms")
+    print(f"  indexed per query:      {index_time / len(mix) * 1000:8.2f}ms")
+    print(f"  mismatched pages: {mismatched}")
+
+    targets = ['/api/posts?' + urlencode(params, doseq=True) for params in mix]
+    cold, warm = asyncio.run(http_timings(index, targets))
+    print(f"  HTTP per query (gzip):  {cold / len(mix) * 1000:8.2f}ms cold, {warm / len(mix) * 1000:.2f}ms cached")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
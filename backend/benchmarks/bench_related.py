@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: related posts index (hashed TF-IDF, random projection, IVF).
+
+Builds RelatedIndex on a synthetic corpus, then times all_neighbours() for a
+few probe counts and compares each post's neighbours with an exact search
+(every post scored against all others) on a sample of posts. Also times
+saving / loading the index and ad-hoc text queries answered from the loaded
+index, and reports the size of the neighbours artifact.
+
+Usage (from backend/):
+    python3 benchmarks/bench_related.py --posts 100000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from related_posts import PROBES, TOP_K, RelatedIndex, describe_neighbours
+
+
+def exact_neighbours(index: RelatedIndex, rows: np.ndarray, k: int):
+    """Exact top-k rows of the sampled posts, and seconds per post"""
+    start = time.perf_counter()
+    similarity = index.vectors[rows] @ index.vectors.T
+    similarity[np.arange(len(rows)), rows] = -np.inf
+    top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    return top, (time.perf_counter() - start) / max(len(rows), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--probes", default=f"4,{PROBES},16", help="comma-separated probe counts")
+    parser.add_argument("--check", type=int, default=500, help="posts compared with the exact search")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    posts = list(synthetic_posts(args.posts, seed=args.seed))
+    start = time.perf_counter()
+    index = RelatedIndex.build(posts)
+    print(f"posts={len(posts):,}  build {time.perf_counter() - start:.2f}s  ({len(index.centroids)} lists)")
+
+    rng = np.random.RandomState(args.seed)
+    sample = rng.choice(len(posts), min(args.check, len(posts)), replace=False)
+    exact, per_post = exact_neighbours(index, sample, args.k)
+    print(f"  exact search:   {per_post * 1000:6.2f}ms per post (~{per_post * len(posts):.0f}s for all)")
+
+    for probes in [int(p) for p in args.probes.split(",")]:
+        start = time.perf_counter()
+        neighbours, scores = index.all_neighbours(args.k, probes)
+        seconds = time.perf_counter() - start
+        recall = np.mean([len(set(e) & set(neighbours[i])) / args.k for e, i in zip(exact, sample)])
+        print(f"  all_neighbours probes={probes:<3} {seconds:7.2f}s  recall@{args.k} {recall:.3f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "related_index.npz")
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = RelatedIndex.load(path)
+        print(f"  save {saved:.2f}s ({os.path.getsize(path) / 2**20:.0f} MB)  load {time.perf_counter() - start:.2f}s")
+
+    texts = [f"{posts[i]['title']} {posts[i]['content'][:300]}" for i in rng.choice(len(posts), args.queries)]
+    start = time.perf_counter()
+    for text in texts:
+        loaded.query(text, args.k)
+    print(f"  query:          {(time.perf_counter() - start) / len(texts) * 1000:6.2f}ms per text")
+
+    artifact = json.dumps(describe_neighbours(index, neighbours, scores), separators=(',', ':'))
+    print(f"  artifact:       {len(artifact) / 2**20:.1f} MB for k={args.k}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one-pass, mergeable dashboard statistics vs the multi-pass version.
+
+Runs the previous calculate_statistics (a pass and a Counter per statistic)
+and StatsAggregator on a synthetic corpus, and checks that their results are
+identical (compared as serialized JSON, so key order counts), also when the
+corpus is aggregated in shards on a process pool and the partials merged.
+Then gives every post its own author out of --authors and compares the
+sketched distinct-author count and top contributors with the exact ones.
+
+Usage (from backend/):
+    python3 benchmarks/bench_statistics.py --posts 200000 --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from post_stats import StatsAggregator, aggregate_posts
+
+
+def multi_pass(data):
+    """calculate_statistics as it was: one walk over the posts per statistic"""
+    stats = {
+        "total_posts": len(data),
+        "total_authors": len(set(item['author'] for item in data)),
+        "models": dict(Counter(item['model'] for item in data).most_common()),
+        "homeworks": dict(Counter(item['homework'] for item in data).most_common()),
+    }
+    timeline = defaultdict(int)
+    for item in data:
+        if item['created_at']:
+            timeline[item['created_at'][:10]] += 1
+    stats["timeline"] = dict(sorted(timeline.items()))
+    stats["top_contributors"] = [{"author": author, "posts": count}
+                                 for author, count in Counter(item['author'] for item in data).most_common(10)]
+    matrix = defaultdict(lambda: defaultdict(int))
+    for item in data:
+        matrix[item['model']][item['homework']] += 1
+    stats["model_homework_matrix"] = {model: dict(hws) for model, hws in matrix.items()}
+    return stats
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def sharded(posts, workers, sketch=False):
+    size = -(-len(posts) // workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(aggregate_posts, [posts[i:i + size] for i in range(0, len(posts), size)],
+                              [sketch] * workers))
+    total = StatsAggregator(sketch=sketch)
+    for part in parts:
+        total.merge(part)
+    return total.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--authors", type=int, default=50000, help="distinct authors for the sketch comparison")
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    posts = list(synthetic_posts(args.posts, seed=args.seed))
+    expected, multi_time = timed(multi_pass, posts)
+    single, single_time = timed(lambda p: aggregate_posts(p).result(), posts)
+    merged, merged_time = timed(sharded, posts, args.workers)
+    print(f"posts={len(posts):,}")
+    print(f"  multi-pass:           {multi_time:7.3f}s")
+    print(f"  one pass:             {single_time:7.3f}s  identical: {json.dumps(single) == json.dumps(expected)}")
+    print(f"  {args.workers} shards + merge:     {merged_time:7.3f}s  identical: {json.dumps(merged) == json.dumps(expected)}"
+          f"  (includes pool start-up and pickling)")
+
+    # Skewed authorship over many authors: a few prolific, most posting once or twice
+    for i, post in enumerate(posts):
+        post['author'] = f"author-{i % args.authors if i % 4 else i % 25}"
+    exact = aggregate_posts(posts).result()
+    sketched, sketch_time = timed(lambda p: aggregate_posts(p, sketch=True).result(), posts)
+    error = abs(sketched['total_authors'] - exact['total_authors']) / exact['total_authors']
+    exact_top = [(c['author'], c['posts']) for c in exact['top_contributors']]
+    sketch_top = [(c['author'], c['posts']) for c in sketched['top_contributors']]
+    undercount = max(e[1] - s[1] for e, s in zip(exact_top, sketch_top))
+    print(f"  sketched:             {sketch_time:7.3f}s  distinct authors {sketched['total_authors']:,} "
+          f"vs {exact['total_authors']:,} ({error:.2%} off)")
+    print(f"  top contributors same order: {[a for a, _ in sketch_top] == [a for a, _ in exact_top]}, "
+          f"largest undercount {undercount} posts")
+    if json.dumps(single) != json.dumps(expected) or json.dumps(merged) != json.dumps(expected):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: loading the posts file vs streaming it, for the dashboard statistics.
+
+Writes a synthetic corpus as an indented JSON array and as JSONL, then in a
+fresh child process per file and mode computes calculate_statistics() either
+on load_posts() (the whole file parsed into a list) or on iter_posts() (one
+post at a time), reporting time and peak RSS. All four statistics must be
+identical (compared as serialized JSON, so key order counts). The first
+posts are also re-read with tiny chunk sizes, so elements split across
+chunks at every position are checked against json.load.
+
+Usage (from backend/):
+    python3 benchmarks/bench_streaming.py --posts 200000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import itertools
+import subprocess
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from post_io import iter_json_array
+from tracing import peak_mib
+
+MODES = ("load", "stream")
+
+
+def run_child(path: str, mode: str, out_path: str):
+    """Compute statistics from `path` in `mode`; prints time and peak RSS as JSON"""
+    from analytics import AnalyticsProcessor
+    from post_io import iter_posts, load_posts
+
+    processor = AnalyticsProcessor()
+    start = time.perf_counter()
+    posts = load_posts(path) if mode == "load" else iter_posts(path)
+    stats = processor.calculate_statistics(posts)
+    seconds = time.perf_counter() - start
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f)
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_mib()}))
+
+
+def measure(path: str, mode: str, out_path: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", path, "--mode", mode, "--child-out", out_path],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def write_corpus(json_path: str, jsonl_path: str, count: int, seed: int):
+    """The same posts as a JSON array (json.dump's indent=2 layout) and as JSONL, streamed"""
+    with open(json_path, 'w', encoding='utf-8') as array, open(jsonl_path, 'w', encoding='utf-8') as lines:
+        array.write("[")
+        for i, post in enumerate(synthetic_posts(count, seed=seed)):
+            element = json.dumps(post, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            array.write(("," if i else "") + "\n  " + element)
+            lines.write(json.dumps(post, ensure_ascii=False) + "\n")
+        array.write("\n]" if count else "]")
+
+
+def check_chunking(json_path: str, posts: int = 50) -> bool:
+    """The first `posts` elements, re-read with chunks of 1 to 64 characters"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        head = f.read(200_000)
+    sample_path = json_path + ".sample"
+    sample = json.loads(head[:head.rindex("\n  },") + 4] + "\n]")[:posts]
+    with open(sample_path, 'w', encoding='utf-8') as f:
+        json.dump(sample, f, indent=2, ensure_ascii=False)
+    return all(list(iter_json_array(sample_path, chunk_size=size)) == sample for size in range(1, 65))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=182)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.mode, args.child_out)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "posts.json")
+        jsonl_path = os.path.join(tmp, "posts.jsonl")
+
+        start = time.perf_counter()
+        write_corpus(json_path, jsonl_path, args.posts, args.seed)
+        print(f"posts={args.posts:,}  (corpus written in {time.perf_counter() - start:.1f}s, "
+              f"JSON {os.path.getsize(json_path) / 2**20:.0f} MB)")
+
+        outputs = []
+        for (name, path), mode in itertools.product((("json", json_path), ("jsonl", jsonl_path)), MODES):
+            outputs.append(os.path.join(tmp, f"{name}.{mode}.stats.json"))
+            r = measure(path, mode, outputs[-1])
+            print(f"  {name:<5} {mode:<6}  {r['seconds']:6.2f}s  peak_rss={r['peak_rss_mb']:7.1f} MB")
+
+        stats = set()
+        for path in outputs:
+            with open(path, encoding='utf-8') as f:
+                stats.add(f.read())
+        chunked = check_chunking(json_path)
+        print(f"  identical statistics: {len(stats) == 1}  chunk boundaries: {'ok' if chunked else 'MISMATCH'}")
+        if len(stats) != 1 or not chunked:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs concurrent vs batched post summarization.
+
+Runs summarizer.Summarizer against a local stand-in chat completions server
+on synthetic posts, one post per request one at a time (as generate_summaries
+used to), then with concurrent requests, then with several posts packed into
+each request, and reports time and requests sent. Every configuration must
+produce the same summaries. A final run over the same posts with the cache
+written by the batched run must send no requests.
+
+Usage (from backend/):
+    python3 benchmarks/bench_summaries.py --posts 400 --latency 0.2 --concurrency 8 --batch 8
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from stub_llm_server import StubLLMServer
+from summarizer import Summarizer
+
+
+def run(server: StubLLMServer, posts, cache_path=None, **settings):
+    summarizer = Summarizer(api_key="stub-key", base_url=server.base_url, deterministic=True,
+                            cache_path=cache_path, **settings)
+    before, server.max_in_flight = server.request_count, 0
+    start = time.perf_counter()
+    summaries = summarizer.summarize(posts)
+    return summaries, time.perf_counter() - start, server.request_count - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub server seconds per request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with 429")
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    posts = list(synthetic_posts(args.posts, seed=args.seed))
+    configs = [
+        ("serial", dict(concurrency=1, batch_size=1)),
+        (f"{args.concurrency} concurrent", dict(concurrency=args.concurrency, batch_size=1)),
+        (f"{args.concurrency} x batch {args.batch}", dict(concurrency=args.concurrency, batch_size=args.batch)),
+    ]
+    print(f"posts={len(posts):,}  latency={args.latency * 1000:.0f}ms")
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubLLMServer(latency=args.latency, throttle_every=args.throttle_every) as server:
+        cache_path = os.path.join(tmp, "summaries.jsonl")
+        results = []
+        for i, (name, settings) in enumerate(configs):
+            summaries, seconds, requests = run(server, posts, cache_path if i == len(configs) - 1 else None,
+                                               **settings)
+            results.append(summaries)
+            print(f"  {name:<20} {seconds:7.2f}s  requests={requests:<5} max in flight={server.max_in_flight}")
+        cached, seconds, requests = run(server, posts, cache_path, **configs[-1][1])
+        print(f"  {'cached rerun':<20} {seconds:7.2f}s  requests={requests}")
+
+        identical = all(r == results[0] for r in results[1:]) and cached == results[0]
+        complete = all(s is not None and s != "Summary unavailable" for s in results[0])
+        print(f"  identical summaries: {identical}  all summarized: {complete}  throttled: {server.throttled}")
+        if not identical or not complete or requests:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sparse TfidfMatrix vs the nested-dict TF-IDF implementation.
+
+Tokenizes a synthetic corpus once, then builds TF-IDF scores, per-document
+top-k terms and per-document mean scores both ways. Every score must be
+bit-identical (including per-document key order), as must the top-k lists
+and the per-document mean ranking (what cluster_posts() used before k-means).
+
+Usage (from backend/):
+    python3 benchmarks/bench_tfidf.py --docs 200000
+"""
+
+import os
+import gc
+import sys
+import math
+import time
+import argparse
+from collections import Counter, defaultdict
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from advanced_analytics import AdvancedAnalytics
+from tfidf import TfidfMatrix
+
+
+def dict_tfidf(tokenized_docs):
+    """The pre-TfidfMatrix implementation: nested dicts keyed by str(i) and term"""
+    doc_freq = defaultdict(int)
+    for doc in tokenized_docs:
+        for term in set(doc):
+            doc_freq[term] += 1
+    idf = {term: math.log(len(tokenized_docs) / (1 + freq)) for term, freq in doc_freq.items()}
+
+    scores = {}
+    for i, tokens in enumerate(tokenized_docs):
+        tf = {term: count / len(tokens) for term, count in Counter(tokens).items()} if tokens else {}
+        scores[str(i)] = {term: tf_score * idf.get(term, 0) for term, tf_score in tf.items()}
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    analyzer = AdvancedAnalytics()
+    docs = [
+        analyzer.tokenize(p["title"] + " " + analyzer.strip_html(p["content"]))
+        for p in synthetic_posts(args.docs, seed=args.seed)
+    ]
+    print(f"docs={len(docs):,}  tokens={sum(map(len, docs)):,}")
+    # The token lists are long-lived; keep the collector from rescanning them
+    # while either implementation allocates its results
+    gc.freeze()
+
+    start = time.perf_counter()
+    expected = dict_tfidf(docs)
+    expected_top = [sorted(row.items(), key=lambda x: x[1], reverse=True)[:args.top] for row in expected.values()]
+    expected_avg = [sum(row.values()) / len(row) if row else 0 for row in expected.values()]
+    expected_rank = [i for i, _ in sorted(enumerate(expected_avg), key=lambda x: x[1], reverse=True)]
+    dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = TfidfMatrix(docs)
+    matrix.top_k_positions(args.top)
+    matrix.row_means()
+    arrays_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = TfidfMatrix(docs)
+    actual_top = matrix.top_k_rows(args.top)
+    actual_avg = matrix.row_means()
+    actual_rank = np.lexsort((np.arange(len(matrix)), -actual_avg)).tolist()
+    matrix_time = time.perf_counter() - start
+
+    mismatched_rows = sum(
+        1 for i, row in enumerate(expected.values())
+        if list(row.items()) != list(matrix.row(i).items())
+    )
+    mismatched_top = sum(1 for e, a in zip(expected_top, actual_top) if e != a)
+    rank_identical = expected_rank == actual_rank
+
+    print(f"  nested dicts:   {dict_time:7.2f}s")
+    print(f"  TfidfMatrix:    {matrix_time:7.2f}s  (vocab={len(matrix.vocab):,}, nnz={len(matrix.indices):,})")
+    print(f"  speedup:        {dict_time / matrix_time:7.2f}x")
+    print(f"  arrays only:    {arrays_time:7.2f}s  ({dict_time / arrays_time:.1f}x; no per-term Python objects)")
+    print(f"  mismatched score rows: {mismatched_rows}")
+    print(f"  mismatched top-{args.top} lists: {mismatched_top}")
+    print(f"  identical ranking:     {rank_identical}")
+    if mismatched_rows or mismatched_top or not rank_identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: process_data with HW x Model groups on 1..N worker processes.
+
+Runs a full (cache-less) process_data over a synthetic corpus with each
+worker count and reports wall time and speedup over the serial run. The
+serialized outputs must be byte-identical apart from generated_at for every
+worker count. Speedup is bounded by the CPUs actually available.
+
+Usage (from backend/):
+    python3 benchmarks/bench_workers.py --posts 50000 --max-workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_posts
+from advanced_analytics import AdvancedAnalytics
+
+
+def serialize(results) -> str:
+    """advanced_analytics.json as main() writes it, minus generated_at"""
+    results = dict(results)
+    results.pop('generated_at')
+    return json.dumps(results, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=182)
+    args = parser.parse_args()
+
+    data = list(synthetic_posts(args.posts, seed=args.seed))
+    print(f"posts={len(data):,}  cpus={len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+
+    counts = sorted({1, *(2 ** i for i in range(1, args.max_workers.bit_length())), args.max_workers})
+    expected = None
+    serial_time = None
+    identical = True
+    for workers in counts:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            results = AdvancedAnalytics(workers=workers).process_data(data)
+            seconds = time.perf_counter() - start
+        output = serialize(results)
+        if expected is None:
+            expected, serial_time = output, seconds
+        same = output == expected
+        identical &= same
+        print(f"  workers={workers:<3} {seconds:7.2f}s  ({serial_time / seconds:.2f}x)  identical={same}")
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
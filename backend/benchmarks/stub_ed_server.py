@@ -0,0 +1,154 @@
+"""
+CS182 Blue Team - Local stand-in for the Ed API
+Serves synthetic threads with configurable latency and throttling so the
+fetchers can be exercised and benchmarked without a token or network access.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any
+from urllib.parse import urlparse, parse_qs
+
+
+def make_threads(count: int, course_id: int = 84647) -> List[Dict[str, Any]]:
+    """Build `count` synthetic Special Participation A threads, newest first"""
+    models = ["ChatGPT 5.1 Thinking", "Claude Sonnet", "Gemini 1.5 Pro", "DeepSeek v3", "Kimi K2"]
+    threads = []
+    for i in range(count):
+        tid = 7000000 + count - i
+        day = 1 + (count - i) % 28
+        threads.append({
+            "id": tid,
+            "course_id": course_id,
+            "title": f"Special Participation A: {models[i % len(models)]} on HW {i % 13}",
+            "document": (
+                '<document version="2.0"><paragraph>The model solved part (a) correctly '
+                f'and gave a clear derivation for thread {tid}.</paragraph>'
+                "<paragraph>It failed on the last part and hallucinated a missing term.</paragraph></document>"
+            ),
+            "user": {"name": f"Student {i % 97}"},
+            "created_at": f"2025-11-{day:02d}T10:00:00.000000+11:00",
+            "updated_at": f"2025-11-{day:02d}T12:00:00.000000+11:00",
+            "votes": i % 5,
+            "comment_count": i % 3,
+        })
+    return threads
+
+
+class StubEdServer:
+    """
+    Threaded HTTP server mimicking the Ed endpoints the pipeline uses.
+
+    `latency` is added to every response; every `throttle_every`-th request
+    (0 disables) is answered with 429 and a Retry-After header. Thread details
+    carry an ETag and honour If-None-Match with 304. Like Ed, the listing is
+    ordered newest-created first, so edit() changes a thread's updated_at
+    without moving it; with sort=active it is ordered by updated_at instead,
+    most recent first.
+    """
+
+    def __init__(self, threads: List[Dict[str, Any]], latency: float = 0.05,
+                 throttle_every: int = 0, retry_after: float = 0.1):
+        self.threads = threads
+        self.by_id = {t["id"]: t for t in threads}
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def edit(self, thread_id: int, updated_at: str, **fields):
+        """Change a thread in place (it keeps its listing position)"""
+        with self.lock:
+            i = next(i for i, t in enumerate(self.threads) if t["id"] == thread_id)
+            self.threads[i] = self.by_id[thread_id] = {**self.threads[i], "updated_at": updated_at, **fields}
+
+    def publish(self, thread: Dict[str, Any]):
+        """Add a new thread at the top of the listing"""
+        with self.lock:
+            self.threads.insert(0, thread)
+            self.by_id[thread["id"]] = thread
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+                raw = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                with server.lock:
+                    server.request_count += 1
+                    throttle = server.throttle_every and server.request_count % server.throttle_every == 0
+                    if throttle:
+                        server.throttled += 1
+                time.sleep(server.latency)
+
+                if throttle:
+                    self._send(429, {"error": "rate limited"}, {"Retry-After": str(server.retry_after)})
+                    return
+
+                url = urlparse(self.path)
+                m = re.fullmatch(r"/api/courses/\d+/threads/(\d+)", url.path)
+                if m:
+                    thread = server.by_id.get(int(m.group(1)))
+                    if thread is None:
+                        self._send(404, {"error": "not found"})
+                        return
+                    body = {"thread": thread}
+                    etag = '"%s"' % hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                    else:
+                        self._send(200, body, {"ETag": etag})
+                    return
+
+                if re.fullmatch(r"/api/courses/\d+/threads", url.path):
+                    params = parse_qs(url.query)
+                    limit = int(params.get("limit", ["30"])[0])
+                    offset = int(params.get("offset", ["0"])[0])
+                    with server.lock:
+                        threads = list(server.threads)
+                    if params.get("sort", [""])[0] == "active":
+                        threads.sort(key=lambda t: datetime.fromisoformat(t["updated_at"]), reverse=True)
+                    self._send(200, {"threads": threads[offset:offset + limit]})
+                    return
+
+                self._send(404, {"error": "not found"})
+
+        return Handler
@@ -0,0 +1,158 @@
+"""
+CS182 Blue Team - Local stand-in for an OpenAI-compatible chat API
+Answers POST /v1/chat/completions with configurable latency and throttling,
+so the summarizer can be exercised and benchmarked without an account. A
+post's summary is its first sentence (cut to 160 characters), so it depends
+only on the post and not on how posts were batched. Batched prompts
+(summarizer.BATCH_INSTRUCTIONS) get a JSON reply with one entry per post.
+
+Run standalone for analytics.py --summaries:
+    python3 benchmarks/stub_llm_server.py --port 8183
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8183/v1 python3 analytics.py --summaries 0
+"""
+
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+POSTS_MARKER = "\n\nPosts:\n"
+
+
+def stub_summary(text: str) -> str:
+    """First sentence of the post's text after its title line"""
+    body = text.split("\n", 1)[1] if "\n" in text else text
+    body = " ".join(body.split())
+    sentence = re.split(r"(?<=[.!?])\s", body, maxsplit=1)[0]
+    return (sentence or "Empty post.")[:160]
+
+
+class StubLLMServer:
+    """
+    Threaded HTTP server mimicking the chat completions endpoint.
+
+    `latency` is added to every response; every `throttle_every`-th request
+    (0 disables) is answered with 429 and a Retry-After header. Requests,
+    posts summarized and the most requests in flight at once are counted.
+    """
+
+    def __init__(self, latency: float = 0.2, throttle_every: int = 0, retry_after: float = 0.1,
+                 port: int = 0):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.posts = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reply(self, body: Dict[str, Any]) -> str:
+        prompt = body["messages"][-1]["content"]
+        if POSTS_MARKER in prompt:
+            posts: List[Dict[str, str]] = json.loads(prompt.split(POSTS_MARKER, 1)[1])
+            with self.lock:
+                self.posts += len(posts)
+            return json.dumps({"summaries": [{"id": p["id"], "summary": stub_summary(p["text"])} for p in posts]})
+        with self.lock:
+            self.posts += 1
+        return stub_summary(prompt.split("\n\n", 1)[1] if "\n\n" in prompt else prompt)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+                raw = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server.lock:
+                    server.request_count += 1
+                    throttle = server.throttle_every and server.request_count % server.throttle_every == 0
+                    if throttle:
+                        server.throttled += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.latency)
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+                if throttle:
+                    self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                               {"Retry-After": str(server.retry_after)})
+                    return
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+
+                content = server.reply(body)
+                prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+                self._send(200, {
+                    "id": f"chatcmpl-stub-{server.request_count}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                              "total_tokens": (prompt_chars + len(content)) // 4},
+                })
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8183)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every response")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+
+    server = StubLLMServer(latency=args.latency, throttle_every=args.throttle_every, port=args.port)
+    print(f"Stub chat completions API on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
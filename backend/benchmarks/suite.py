@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: how each backend pipeline stage scales with the corpus.
+
+Writes a seeded synthetic corpus per size (Ed API threads with realistic
+titles, model-name typos and document markup, and the posts the scraper
+makes of them), then times every stage at every size in a fresh process:
+
+    extract_metadata       EdScraper.extract_metadata on every thread title
+    process_threads        EdScraper.process_threads on the thread listing
+    calculate_statistics   AnalyticsProcessor.calculate_statistics
+    process_data           AdvancedAnalytics.process_data (no caches)
+    generate_insights      AnalyticsProcessor.generate_insights
+
+Each result records wall time and peak memory, i.e. the highest resident
+size during the stage minus the size before it (inputs are loaded first and
+not counted). Results are written as JSON; with --check, any stage / size
+that is slower or larger than the stored baseline by more than the
+tolerance fails the run.
+
+Usage (from backend/):
+    python3 benchmarks/suite.py --sizes 1000,10000,100000,1000000
+    python3 benchmarks/suite.py --sizes 1000,10000 --check
+    python3 benchmarks/suite.py --sizes 1000,10000 --update-baseline
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault("ED_API_TOKEN", "stub-token")
+
+from tracing import rss_mib, reset_peak, peak_mib
+
+STAGES = ('extract_metadata', 'process_threads', 'calculate_statistics', 'process_data', 'generate_insights')
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+RESULTS_PATH = os.path.join(BENCH_DIR, "suite_results.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "suite_baseline.json")
+
+# A stage regresses when it exceeds the baseline by this factor plus the
+# absolute slack (small runs are dominated by timer and allocator noise)
+TIME_TOLERANCE = 1.5
+TIME_SLACK = 0.05            # seconds
+MEMORY_TOLERANCE = 1.5
+MEMORY_SLACK = 8.0           # MiB
+
+
+# -- corpus ------------------------------------------------------------
+
+def corpus_paths(workdir: str, size: int, seed: int):
+    return (os.path.join(workdir, f"threads-{size}-{seed}.jsonl"),
+            os.path.join(workdir, f"posts-{size}-{seed}.jsonl"))
+
+
+def write_corpus(workdir: str, size: int, seed: int):
+    """Threads and the scraper's posts for them, as JSONL (streamed, flat memory)"""
+    from synthetic import synthetic_threads
+    from scraper import EdScraper
+
+    threads_path, posts_path = corpus_paths(workdir, size, seed)
+    if os.path.exists(threads_path) and os.path.exists(posts_path):
+        return
+    scraper = EdScraper()
+    with open(threads_path, "w", encoding="utf-8") as threads_file, \
+            open(posts_path, "w", encoding="utf-8") as posts_file:
+        for thread in synthetic_threads(size, seed=seed):
+            threads_file.write(json.dumps(thread, ensure_ascii=False) + "\n")
+            for post in scraper.iter_processed([thread]):
+                posts_file.write(json.dumps(post, ensure_ascii=False) + "\n")
+
+
+# -- stages (run in a child process) -------------------------------------
+
+def prepare(stage: str, workdir: str, size: int, seed: int):
+    """Inputs of a stage and the function that runs it on them"""
+    from post_io import read_jsonl
+    threads_path, posts_path = corpus_paths(workdir, size, seed)
+
+    if stage in ('extract_metadata', 'process_threads'):
+        from scraper import EdScraper
+        scraper = EdScraper()
+        threads = list(read_jsonl(threads_path))
+        if stage == 'extract_metadata':
+            titles = [t['title'] for t in threads]
+            del threads
+            return lambda: [scraper.extract_metadata(title) for title in titles]
+        return lambda: scraper.process_threads(threads)
+
+    posts = list(read_jsonl(posts_path))
+    if stage == 'process_data':
+        from advanced_analytics import AdvancedAnalytics
+        analyzer = AdvancedAnalytics()
+
+        def run():
+            results = analyzer.process_data(posts)
+            # generate_insights reads this instead of recomputing it
+            with open(os.path.join(workdir, f"advanced-{size}-{seed}.json"), "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False)
+            return results
+        return run
+
+    from analytics import AnalyticsProcessor
+    processor = AnalyticsProcessor()
+    if stage == 'calculate_statistics':
+        return lambda: processor.calculate_statistics(posts)
+
+    stats = processor.calculate_statistics(posts)
+    del posts
+    advanced_path = os.path.join(workdir, f"advanced-{size}-{seed}.json")
+    if not os.path.exists(advanced_path):
+        raise SystemExit("generate_insights needs the process_data stage to run first at this size")
+    with open(advanced_path, encoding="utf-8") as f:
+        advanced = json.load(f)
+    return lambda: processor.generate_insights(stats, advanced)
+
+
+def run_stage(stage: str, workdir: str, size: int, seed: int) -> dict:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run = prepare(stage, workdir, size, seed)
+        gc.collect()
+        before = rss_mib()
+        exact_peak = reset_peak()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        peak = peak_mib()
+    return {'seconds': round(seconds, 4), 'peak_mib': round(max(peak - before, 0.0), 1),
+            'peak_exact': exact_peak}
+
+
+# -- suite ---------------------------------------------------------------
+
+def regressions(results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float):
+    """Messages for every stage / size worse than the baseline"""
+    found = []
+    for stage, sizes in results.items():
+        for size, result in sizes.items():
+            base = baseline.get(stage, {}).get(size)
+            if base is None:
+                continue
+            if result['seconds'] > base['seconds'] * time_tolerance + TIME_SLACK:
+                found.append(f"{stage} @ {size}: {result['seconds']:.3f}s vs baseline {base['seconds']:.3f}s")
+            if result['peak_mib'] > base['peak_mib'] * memory_tolerance + MEMORY_SLACK:
+                found.append(f"{stage} @ {size}: {result['peak_mib']:.1f} MiB vs baseline {base['peak_mib']:.1f} MiB")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated corpus sizes (threads)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--seed", type=int, default=182)
+    parser.add_argument("--workdir", help="keep generated corpora here (default: a temporary directory)")
+    parser.add_argument("--output", default=RESULTS_PATH, help="results JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON for --check / --update-baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a stage regressed past the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.workdir, args.size, args.seed)))
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    # Insights are generated from process_data's output
+    stages.sort(key=STAGES.index)
+
+    results = {stage: {} for stage in stages}
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="suite-"))
+        os.makedirs(workdir, exist_ok=True)
+        for size in sizes:
+            start = time.perf_counter()
+            write_corpus(workdir, size, args.seed)
+            print(f"size {size:,}: corpus ready in {time.perf_counter() - start:.1f}s")
+            for stage in stages:
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run-stage", stage, "--size", str(size),
+                     "--seed", str(args.seed), "--workdir", workdir],
+                    cwd=BACKEND_DIR, capture_output=True, text=True)
+                if completed.returncode != 0:
+                    print(completed.stderr, file=sys.stderr)
+                    raise SystemExit(f"{stage} @ {size} failed")
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                results[stage][str(size)] = result
+                print(f"  {stage:<22} {result['seconds']:9.3f}s  {result['peak_mib']:8.1f} MiB")
+
+    report = {
+        'meta': {
+            'generated_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.check:
+        if not os.path.exists(args.baseline):
+            raise SystemExit(f"No baseline at {args.baseline}; run with --update-baseline first")
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)['results']
+        found = regressions(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for message in found:
+            print(f"REGRESSION {message}")
+        if found:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
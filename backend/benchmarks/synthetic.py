@@ -0,0 +1,225 @@
+"""
+CS182 Blue Team - Seeded synthetic post generator
+Produces Ed-like titles (model-name variants, typos, homework spellings) and
+whole posts for benchmarks. The same seed always yields the same corpus.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Dict, Any
+
+MODEL_SPELLINGS = [
+    "ChatGPT 5.1 Thinking", "ChatGPT-5.1 Thinking extended", "GPT-5 (Thinking)", "GPT 5.1", "GPT-5",
+    "gpt4o mini", "GPT-4o", "GPT-4 Turbo", "GPT4", "GPT-3.5 turbo", "ChatGPT 5", "ChatGPT",
+    "o1-preview", "o1 mini", "o1", "Claude 3.5 Sonnet", "Claude 3 Opus", "claude sonnet 4.5",
+    "Claude Opus 4.1", "Claude", "Gemini 1.5 Pro", "Gemini 1.5 Flash", "Gemini 2.5 Pro", "gemini flash",
+    "Gemma 3", "Gemini", "DeepSeek v3.2", "Deepseek-V3", "DeepSeek R1", "Llama 3.1", "llama-3",
+    "Llama 2", "LLaMA", "Grok 4", "Kimi K2", "Kimi", "Perplexity Sonar", "Perplexity", "GPT-OSS 120b",
+    "Qwen 2.5", "Qwen2", "Qwen3-Max", "Mistral Large", "Mixtral", "Phi-3", "Phi 4",
+    # typos and unknowns that must fall through to later patterns or "Unknown"
+    "Cluade", "Gemeni 2.5", "ChatGTP", "Deep Seek", "Copilot", "Le Chat",
+]
+
+HOMEWORK_SPELLINGS = [
+    "HW {n}", "HW{n:02d}", "hw{n}", "Homework {n}", "homework-{n}", "HWK {n}", "hwk{n}",
+    "Assignment {n}", "H{n}", "HW-{n}", "HW 0{n}",
+]
+
+TEMPLATES = [
+    "Special Participation A: {model} on {hw}",
+    "Special participation A - {hw} with {model}",
+    "Special Participation A: {model} {hw} (non-coding)",
+    "[Special Participation A] {hw}: testing {model} one-shot",
+    "Special Participation A: {hw} {model}",
+    "Special Participation A: Evaluating {model} on the written parts of {hw}",
+    "Special Participation A - {model}",
+]
+
+
+def synthetic_titles(count: int, seed: int = 182) -> List[str]:
+    """`count` realistic post titles, deterministic for a given seed"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        hw = rng.choice(HOMEWORK_SPELLINGS).format(n=rng.randint(0, 12))
+        title = rng.choice(TEMPLATES).format(model=rng.choice(MODEL_SPELLINGS), hw=hw)
+        if rng.random() < 0.1:
+            title = title.lower()
+        titles.append(title)
+    return titles
+
+
+FIRST_NAMES = ["Alex", "Sam", "Priya", "Wei", "Jordan", "Maria", "Kenji", "Fatima", "Lucas", "Aisha",
+               "Noah", "Mei", "Omar", "Elena", "Ravi", "Chloe", "Diego", "Hana", "Ivan", "Zara"]
+LAST_NAMES = ["Chen", "Patel", "Garcia", "Kim", "Nguyen", "Smith", "Okafor", "Rossi", "Ivanova",
+              "Tanaka", "Haddad", "Silva", "Cohen", "Singh", "Murphy"]
+
+SENTENCES = [
+    "The model solved the derivation correctly on the first attempt.",
+    "It made an algebra mistake in part (b) but corrected itself when prompted.",
+    "Overall the explanation was clear and well structured.",
+    "It hallucinated a theorem that does not exist.",
+    "The answer to the optimization question was accurate and concise.",
+    "It struggled with the matrix calculus and needed several hints.",
+    "The reasoning about gradient descent convergence was insightful.",
+    "It confused the bias and variance terms in the decomposition.",
+    "One-shot performance was impressive on the written questions.",
+    "The proof was incomplete and skipped the key induction step.",
+]
+
+# Topic words drawn with Zipf-like weights so the vocabulary has a long tail
+TOPIC_TERMS = (
+    "gradient descent backpropagation convolution attention transformer softmax entropy "
+    "regularization dropout batchnorm eigenvalue eigenvector jacobian hessian kernel "
+    "lagrangian convexity momentum adam learning rate overfitting underfitting variance "
+    "bias initialization residual embedding tokenizer encoder decoder autoregressive "
+    "diffusion likelihood posterior prior bayesian markov sampling monte carlo "
+    "optimization stochastic minibatch vanishing exploding normalization layernorm "
+    "pooling stride padding receptive recurrent lstm gru sequence alignment contrastive "
+    "pretraining finetuning distillation quantization sparsity pruning lottery ticket "
+    "scaling law emergent chain derivation induction lemma inequality cauchy schwarz "
+    "triangle orthogonal projection subspace rank nullspace trace determinant singular "
+    "decomposition svd pca whitening covariance gaussian laplace poisson bernoulli "
+    "categorical logits calibration temperature beam search greedy decoding perplexity"
+).split()
+TOPIC_WEIGHTS = [1 / rank for rank in range(1, len(TOPIC_TERMS) + 1)]
+
+# Syllables for rare made-up jargon (names, notation), the tail of a real vocabulary
+SYLLABLES = ["ka", "lo", "mi", "zu", "ter", "von", "ax", "qui", "ral", "ben", "sor", "pha", "nyx", "dre", "tol", "gus"]
+
+
+def synthetic_posts(count: int, seed: int = 182, body_sentences: int = 12) -> Iterator[Dict[str, Any]]:
+    """
+    `count` Ed-like posts shaped like data/special_participation_a_merged.json,
+    deterministic for a given seed. Yields one post at a time so very large
+    corpora can be streamed to disk.
+    """
+    from title_classifier import get_classifier
+
+    rng = random.Random(seed)
+    classifier = get_classifier()
+    start = datetime(2025, 9, 1, tzinfo=timezone(timedelta(hours=-7)))
+    for i, title in enumerate(synthetic_titles(count, seed=seed)):
+        created = start + timedelta(seconds=rng.randint(0, 100 * 86400), microseconds=rng.randint(0, 999999))
+        sentences = [rng.choice(SENTENCES) for _ in range(rng.randint(1, body_sentences))]
+        topics = rng.choices(TOPIC_TERMS, weights=TOPIC_WEIGHTS, k=rng.randint(2, 12))
+        jargon = "".join(rng.choice(SYLLABLES) for _ in range(3))
+        sentences.append(f"It came up in the parts about {', '.join(topics)} and the {jargon} trick.")
+        body = " ".join(sentences)
+        post_id = 7000000 + i
+        yield {
+            "id": post_id,
+            "title": title,
+            "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "content": f"<document version=\"2.0\"><paragraph>{body}</paragraph></document>",
+            "content_raw": "",
+            **classifier.classify(title),
+            "created_at": created.isoformat(),
+            "updated_at": created.isoformat(),
+            "url": f"https://edstem.org/us/courses/84647/discussion/{post_id}",
+            "likes": rng.randint(0, 5),
+            "comments": rng.randint(0, 3),
+        }
+
+
+# Evidence sentences whose terms are negated
+NEGATED_SENTENCES = [
+    "The model did not fail on the convolution proofs and its reasoning about the kernel stayed detailed throughout.",
+    "Its final bound was not accurate, although the intermediate algebra for the Hessian looked plausible at first glance.",
+    "There was no error in the backpropagation derivation, which impressed me given how long the chain rule expansion got.",
+    "Its explanation of the attention scaling factor wasn't clear until several hints about the variance of dot products.",
+]
+
+CODE_LINES = [
+    "def loss(w, X, y):",
+    "    return ((X @ w - y) ** 2).mean() + lam * (w ** 2).sum()",
+    "for step in range(num_steps):",
+    "    w -= lr * grad(w)  # plain gradient descent",
+    "if abs(prev - cur) < 1e-6 and step > 0:",
+    "    break",
+]
+
+
+def synthetic_document(rng: random.Random, blocks: int) -> str:
+    """
+    An Ed document (the XML the Ed API returns) with `blocks` top-level blocks:
+    headings, paragraphs with inline markup and entities, nested lists, line
+    breaks and code snippets, like a long write-up.
+    """
+    def sentence() -> str:
+        text = rng.choice(SENTENCES)
+        roll = rng.random()
+        if roll < 0.15:
+            words = text.split(" ")
+            i = rng.randrange(len(words))
+            words[i] = f"<bold>{words[i]}</bold>"
+            text = " ".join(words)
+        elif roll < 0.25:
+            text += f" See <link href=\"https://example.com/{rng.randint(1, 999)}\">the notes</link>."
+        elif roll < 0.3:
+            text += f" It used <code>{rng.choice(TOPIC_TERMS)}_fn()</code> &amp; compared x &lt; y."
+        elif roll < 0.35:
+            text += " It wrote <math>\\nabla_w L = 2X^T(Xw - y)</math> directly."
+        elif roll < 0.4:
+            text = rng.choice(NEGATED_SENTENCES)
+        return text
+
+    def paragraph(count: int) -> str:
+        return "<paragraph>" + " ".join(sentence() for _ in range(count)) + "</paragraph>"
+
+    parts = ['<document version="2.0">']
+    for _ in range(blocks):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f'<heading level="2">{rng.choice(TOPIC_TERMS).title()} results</heading>')
+        elif roll < 0.25:
+            items = "".join(f"<list-item>{paragraph(rng.randint(1, 2))}</list-item>" for _ in range(rng.randint(2, 5)))
+            parts.append(f'<list style="bullet">{items}</list>')
+        elif roll < 0.32:
+            code = "\n".join(rng.choice(CODE_LINES) for _ in range(rng.randint(3, 8))).replace("<", "&lt;")
+            parts.append(f'<snippet language="py" runnable="false"><snippet-file id="code">{code}</snippet-file></snippet>')
+        elif roll < 0.36:
+            parts.append(f"<paragraph>{sentence()}<break/>{sentence()}</paragraph>")
+        else:
+            parts.append(paragraph(rng.randint(1, 6)))
+    parts.append("</document>")
+    return "".join(parts)
+
+
+# Other course threads the scraper must filter out
+OFF_TOPIC_TITLES = [
+    "Question about {hw} problem 3",
+    "Special Participation B: {model} on {hw}",
+    "Blue Team extra credit website feedback",
+    "Special Participation A - red team website is live",
+    "Office hours moved this week",
+]
+
+
+def synthetic_threads(count: int, seed: int = 182, max_blocks: int = 8) -> Iterator[Dict[str, Any]]:
+    """
+    `count` threads shaped like the Ed API's thread listing (title, document
+    markup, user, timestamps, votes), newest first, deterministic for a
+    given seed. About one in ten is not a Special Participation A post or is
+    a website meta-post, so the scraper's filters have work to do.
+    """
+    rng = random.Random(seed)
+    titles = synthetic_titles(count, seed=seed)
+    start = datetime(2025, 12, 15, tzinfo=timezone(timedelta(hours=11)))
+    for i, title in enumerate(titles):
+        if rng.random() < 0.1:
+            title = rng.choice(OFF_TOPIC_TITLES).format(
+                model=rng.choice(MODEL_SPELLINGS), hw=rng.choice(HOMEWORK_SPELLINGS).format(n=rng.randint(0, 12)))
+        created = start - timedelta(seconds=i * 60 + rng.randint(0, 59), microseconds=rng.randint(0, 999999))
+        updated = created + timedelta(seconds=rng.randint(0, 3 * 86400)) if rng.random() < 0.3 else created
+        yield {
+            "id": 7000000 + count - i,
+            "course_id": 84647,
+            "title": title,
+            "document": synthetic_document(rng, rng.randint(1, max_blocks)),
+            "user": {"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"},
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+            "votes": rng.randint(0, 5),
+            "comment_count": rng.randint(0, 3),
+        }
@@ -0,0 +1,127 @@
+"""
+CS182 Blue Team - Spherical k-means over sparse TF-IDF rows
+Clusters documents by cosine similarity of their TF-IDF vectors. Rows stay in
+the CSR layout of TfidfMatrix; the only dense arrays are the k centroids
+(k x vocabulary) and the document-centroid similarities (documents x k), so
+memory grows linearly with the corpus, never with its square. Seeding is
+deterministic (no random draws), so the same documents always give the same
+clusters.
+"""
+
+from typing import List, NamedTuple
+import numpy as np
+
+from tfidf import TfidfMatrix
+
+# Bump when the clusters found for the same documents change (cached group
+# results depend on it)
+CLUSTERING_VERSION = 1
+
+MAX_ITERATIONS = 25
+
+
+class Cluster(NamedTuple):
+    medoid: int
+    members: np.ndarray
+
+
+class CosineRows:
+    """
+    Unit-length TF-IDF rows of a TfidfMatrix.
+
+    Weights use the smoothed idf log((1 + N) / (1 + df)) + 1, which stays
+    positive for terms found in every document (the matrix's own idf does
+    not); documents without terms are all-zero rows.
+    """
+
+    def __init__(self, matrix: TfidfMatrix):
+        self.n_docs = len(matrix)
+        self.n_terms = max(len(matrix.vocab), 1)
+        self.indices = matrix.indices
+        self.row_of = np.repeat(np.arange(self.n_docs), matrix.row_sizes)
+        self.starts = matrix.indptr[:-1]
+        self.empty = matrix.row_sizes == 0
+
+        idf = np.log((1 + self.n_docs) / (1 + matrix.df)) + 1
+        values = matrix.tf * idf[self.indices] if len(self.indices) else np.zeros(0)
+        norms = np.sqrt(np.bincount(self.row_of, weights=values * values, minlength=self.n_docs))
+        norms[norms == 0] = 1
+        self.values = values / norms[self.row_of]
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """(documents x k) products of every row with the k rows of `dense`"""
+        products = dense[:, self.indices]
+        products *= self.values
+        # reduceat gives an empty row the element at its start; zero those
+        result = np.add.reduceat(products, np.minimum(self.starts, len(self.values) - 1), axis=1).T
+        result[self.empty] = 0
+        return result
+
+    def dense_row(self, i: int) -> np.ndarray:
+        row = np.zeros(self.n_terms)
+        members = self.row_of == i
+        row[self.indices[members]] = self.values[members]
+        return row
+
+    def sums(self, labels: np.ndarray, k: int) -> np.ndarray:
+        """(k x terms) sum of the rows labelled with each cluster"""
+        keys = labels[self.row_of] * self.n_terms + self.indices
+        return np.bincount(keys, weights=self.values, minlength=k * self.n_terms).reshape(k, self.n_terms)
+
+
+def farthest_point_seeds(rows: CosineRows, k: int) -> List[int]:
+    """
+    k seed documents: the one most similar to the corpus as a whole, then
+    repeatedly the one least similar to its closest seed (k-means++ with
+    the farthest point taken instead of a random draw); lowest index on
+    ties. Documents without terms are never seeds, so k must not exceed the
+    number of documents with terms.
+    """
+    centre = rows.sums(np.zeros(rows.n_docs, dtype=np.int64), 1)
+    seeds = [int(np.argmax(rows.dot(centre)[:, 0]))]
+    closest = rows.dot(rows.dense_row(seeds[0])[None, :])[:, 0]
+    while len(seeds) < k:
+        distance = -closest
+        distance[seeds] = -np.inf
+        distance[rows.empty] = -np.inf
+        seeds.append(int(np.argmax(distance)))
+        closest = np.maximum(closest, rows.dot(rows.dense_row(seeds[-1])[None, :])[:, 0])
+    return seeds
+
+
+def spherical_kmeans(matrix: TfidfMatrix, k: int, max_iterations: int = MAX_ITERATIONS) -> List[Cluster]:
+    """
+    Up to k clusters of the matrix's documents, largest first (ties by
+    medoid), each with its medoid: the member with the highest total cosine
+    similarity to the other members. Clusters that end up empty are dropped.
+    """
+    rows = CosineRows(matrix)
+    k = min(k, rows.n_docs - int(rows.empty.sum()))
+    if k <= 0:
+        # Nothing to compare: one cluster, if any documents at all
+        return [Cluster(0, np.arange(rows.n_docs))] if rows.n_docs else []
+
+    centroids = np.stack([rows.dense_row(i) for i in farthest_point_seeds(rows, k)])
+    labels = None
+    for _ in range(max_iterations):
+        # Each document joins its most similar centroid (lowest cluster on ties)
+        assigned = np.argmax(rows.dot(centroids), axis=1)
+        if labels is not None and np.array_equal(assigned, labels):
+            break
+        labels = assigned
+        sums = rows.sums(labels, k)
+        norms = np.linalg.norm(sums, axis=1)
+        # A cluster left empty keeps its previous centroid
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+
+    # A member's similarity to its cluster's row sum is its total similarity
+    # to all members, so the exact medoid needs no pairwise matrix
+    totals = rows.dot(rows.sums(labels, k))[np.arange(rows.n_docs), labels]
+    clusters = []
+    for c in range(k):
+        members = np.flatnonzero(labels == c)
+        if len(members):
+            clusters.append(Cluster(int(members[np.argmax(totals[members])]), members))
+    clusters.sort(key=lambda cluster: (-len(cluster.members), cluster.medoid))
+    return clusters
@@ -2,24 +2,32 @@
 """
 Merge settled CSV (canonical model/homework) + Ed API thread details (real content).
 
+Threads in the scraper's listing that are not settled yet are merged too,
+first (newest), with the scraper's model/homework, so a fresh scrape shows
+up in the merged dataset before its rows are settled.
+
 Output:
 - backend/data/special_participation_a_merged.json   (content filled)
 - backend/data/special_participation_a_merged.csv    (metadata only)
 """
 
 import os
+import sys
 import csv
 import json
 import time
-import requests
-from typing import Dict, Any, Optional
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
-# Optional: HTML -> text
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    BeautifulSoup = None
+# Shared modules live one level up in backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ed_transport import BASE_URL, EdTransport, TokenBucket, parse_timestamp
+from post_store import write_store, store_path_for
+from text_normalize import normalize_html
+import tracing
 
 load_dotenv()
 
@@ -27,18 +35,14 @@ COURSE_ID = 84647
 SETTLED_CSV = "data/special_participation_a_settled.csv"
 OUT_JSON = "data/special_participation_a_merged.json"
 OUT_CSV  = "data/special_participation_a_merged.csv"
-
-BASE_URL = "https://us.edstem.org/api"
+# Scraper output: updated_at hints, and the threads not settled yet
+LISTING_JSON = "data/special_participation_a.json"
+CACHE_DIR = "data/.cache/thread_details"
 
 
 def html_to_text(html: str) -> str:
-    if not html:
-        return ""
-    if BeautifulSoup is None:
-        # Fallback: keep raw HTML if bs4 isn't installed
-        return html
-    soup = BeautifulSoup(html, "html.parser")
-    return soup.get_text("\n", strip=True)
+    with tracing.tally('html_strip'):
+        return normalize_html(html)
 
 
 def deep_get(d: Any, path: str) -> Optional[Any]:
@@ -98,38 +102,167 @@ def pick_best_content(payload: Dict[str, Any]) -> str:
     return ""
 
 
+class ThreadDetailCache:
+    """
+    On-disk cache of thread detail payloads, one JSON file per thread id.
+
+    Each entry keeps the payload plus the validators the server sent (ETag,
+    Last-Modified) and the thread's own updated_at. A rerun revalidates an
+    entry with a conditional GET when it has validators, and only skips the
+    request for entries without them whose updated_at is current. An entry's
+    file is rewritten whenever it is validated, so its mtime is the last
+    validation: entries not validated within `max_age_days` are ignored and
+    evicted, and beyond that the least recently validated entries are
+    evicted until the cache fits `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_age_days: float = 30, max_bytes: int = 100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.hits = 0          # served without any request (no validators, updated_at unchanged)
+        self.revalidated = 0   # conditional request answered with 304
+        self.misses = 0        # full download
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, thread_id: int) -> str:
+        return os.path.join(self.cache_dir, f"{thread_id}.json")
+
+    def get(self, thread_id: int) -> Optional[Dict[str, Any]]:
+        """Cached entry for a thread, or None if absent/expired/corrupt"""
+        try:
+            with open(self._path(thread_id), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("validated_at", 0) > self.max_age:
+            return None
+        return entry
+
+    def put(self, thread_id: int, payload: Dict[str, Any], etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "updated_at": deep_get(payload, "thread.updated_at") or deep_get(payload, "updated_at"),
+            "validated_at": time.time(),
+            "payload": payload,
+        }
+        tmp = self._path(thread_id) + f".{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._path(thread_id))
+
+    def touch(self, thread_id: int, entry: Dict[str, Any]):
+        """Mark an entry as freshly validated"""
+        self.put(thread_id, entry["payload"], entry.get("etag"), entry.get("last_modified"))
+
+    @staticmethod
+    def has_validators(entry: Dict[str, Any]) -> bool:
+        return bool(entry.get("etag") or entry.get("last_modified"))
+
+    def is_current(self, entry: Dict[str, Any], updated_at: Optional[str]) -> bool:
+        """True if the cached payload is at least as new as a known updated_at"""
+        known = parse_timestamp(updated_at)
+        cached = parse_timestamp(entry.get("updated_at"))
+        return known is not None and cached is not None and cached >= known
+
+    def record(self, kind: str):
+        with self.lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+    def report(self) -> str:
+        return (f"cache hit rate {self.hit_rate():.1%} "
+                f"(hits={self.hits}, revalidated={self.revalidated}, misses={self.misses})")
+
+    def evict(self) -> int:
+        """Drop expired entries, then the stalest ones until under max_bytes; returns count removed"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for validated_at, size, path in entries:
+            if now - validated_at <= self.max_age and total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
 class EdClient:
-    def __init__(self, course_id: int):
+    def __init__(self, course_id: int, base_url: str = BASE_URL, cache: Optional[ThreadDetailCache] = None,
+                 pool_size: int = 16):
         self.course_id = course_id
+        self.base_url = base_url
+        self.cache = cache
         token = os.getenv("ED_API_TOKEN")
         if not token:
             raise ValueError("ED_API_TOKEN not found in environment variables")
-        self.headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
+        self.transport = EdTransport(token, base_url=base_url, pool_size=pool_size)
 
-    def get_thread_detail(self, thread_id: int) -> Dict[str, Any]:
+    def get_thread_detail(self, thread_id: int, limiter: Optional[TokenBucket] = None,
+                          updated_at: Optional[str] = None) -> Dict[str, Any]:
         """
         Try a few likely endpoints (Ed API has multiple shapes depending on version).
-        One of these should work with your token.
+        One of these should work with your token; the transport remembers which
+        one did, so only the first thread of a run pays for probing.
+
+        With a cache, the request is made conditional on the cached
+        ETag/Last-Modified (a 304 costs no body). Only an entry without
+        validators is returned without a request, when it is at least as new
+        as `updated_at` (the thread's last-modified time from the listing,
+        which may be older than the thread).
         """
+        entry = self.cache.get(thread_id) if self.cache else None
+        if entry and not self.cache.has_validators(entry) and self.cache.is_current(entry, updated_at):
+            self.cache.record("hits")
+            return entry["payload"]
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
         endpoints = [
-            f"{BASE_URL}/courses/{self.course_id}/threads/{thread_id}",
-            f"{BASE_URL}/courses/{self.course_id}/threads/{thread_id}?view=full",
-            f"{BASE_URL}/threads/{thread_id}",
+            ("thread.detail", f"{self.base_url}/courses/{self.course_id}/threads/{thread_id}"),
+            ("thread.detail.full", f"{self.base_url}/courses/{self.course_id}/threads/{thread_id}?view=full"),
+            ("thread.detail.global", f"{self.base_url}/threads/{thread_id}"),
         ]
 
-        last_err = None
-        for url in endpoints:
-            try:
-                r = requests.get(url, headers=self.headers, timeout=30)
-                r.raise_for_status()
-                return r.json()
-            except Exception as e:
-                last_err = e
+        try:
+            with tracing.span('http_fetch', cat='http', thread=thread_id):
+                r = self.transport.get_first("thread_detail", endpoints, headers=headers, limiter=limiter)
+            if r.status_code == 304 and entry:
+                self.cache.record("revalidated")
+                self.cache.touch(thread_id, entry)
+                return entry["payload"]
+            payload = r.json()
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch detail for thread {thread_id}: {e}")
 
-        raise RuntimeError(f"Failed to fetch detail for thread {thread_id}: {last_err}")
+        if self.cache:
+            self.cache.record("misses")
+            self.cache.put(thread_id, payload, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return payload
 
 
 def load_settled_csv(path: str) -> Dict[int, Dict[str, str]]:
@@ -145,72 +278,158 @@ def load_settled_csv(path: str) -> Dict[int, Dict[str, str]]:
     return settled
 
 
-def main():
-    settled = load_settled_csv(SETTLED_CSV)
-    print(f"Loaded settled rows: {len(settled)}")
+def load_listing(path: str) -> List[Dict[str, Any]]:
+    """The scraper's listing output (posts, newest first), or [] if absent"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def updated_at_hints(listing: List[Dict[str, Any]]) -> Dict[int, str]:
+    """Per-thread updated_at from the scraper's listing"""
+    return {p["id"]: p["updated_at"] for p in listing if p.get("id") and p.get("updated_at")}
+
+
+def with_unsettled(settled: Dict[int, Dict[str, str]], listing: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Listing threads missing from the settled CSV (listing order), then the settled rows"""
+    rows: Dict[int, Dict[str, Any]] = {p["id"]: p for p in listing if p.get("id") and p["id"] not in settled}
+    rows.update(settled)
+    return rows
+
+
+def merge_row(tid: int, row: Dict[str, str], detail: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine one settled CSV row with its fetched thread detail"""
+    # Extract title/author/time/likes/comments if available; else keep settled values
+    title = row.get("title", "")
+    author = row.get("author", "")
+
+    # Try to override title/author from detail if present
+    detail_title = deep_get(detail, "thread.title") or deep_get(detail, "title")
+    if isinstance(detail_title, str) and detail_title.strip():
+        title = detail_title.strip()
+
+    detail_author = (
+        deep_get(detail, "thread.user.name")
+        or deep_get(detail, "thread.user.full_name")
+        or deep_get(detail, "user.name")
+    )
+    if isinstance(detail_author, str) and detail_author.strip():
+        author = detail_author.strip()
+
+    raw = pick_best_content(detail)
+    content = html_to_text(raw)
+
+    return {
+        "id": tid,
+        "title": title,
+        "author": author,
+        "content": content,                 # ✅ now filled
+        "content_raw": raw if raw != content else "",  # optional (keep HTML if converted)
+        "model": row.get("model", "Unknown"),
+        "homework": row.get("homework", "Unknown"),
+        "created_at": row.get("created_at", ""),
+        "updated_at": row.get("updated_at", row.get("created_at", "")),
+        "url": row.get("url", f"https://edstem.org/us/courses/{COURSE_ID}/discussion/{tid}"),
+        "likes": int(row.get("likes", 0) or 0),
+        "comments": int(row.get("comments", 0) or 0),
+    }
+
+
+def merge_threads(client: EdClient, settled: Dict[int, Dict[str, str]],
+                  max_in_flight: int = 1, rate: float = 6.0,
+                  updated_at: Optional[Dict[int, str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Fetch every settled thread and merge it with its CSV row.
 
-    client = EdClient(COURSE_ID)
+    Up to `max_in_flight` requests run at once, all sharing one token bucket
+    of `rate` requests/second. Results are collected in settled-CSV order, so
+    the output is identical to a sequential (max_in_flight=1) run.
+    `updated_at` maps thread ids to known last-modified times for the cache.
+    """
+    updated_at = updated_at or {}
+    limiter = TokenBucket(rate, capacity=max_in_flight)
+    items = list(settled.items())
 
     merged = []
     failures = 0
 
-    for idx, (tid, row) in enumerate(settled.items(), start=1):
-        try:
-            detail = client.get_thread_detail(tid)
-
-            # Extract title/author/time/likes/comments if available; else keep settled values
-            title = row.get("title", "")
-            author = row.get("author", "")
-
-            # Try to override title/author from detail if present
-            detail_title = deep_get(detail, "thread.title") or deep_get(detail, "title")
-            if isinstance(detail_title, str) and detail_title.strip():
-                title = detail_title.strip()
-
-            detail_author = (
-                deep_get(detail, "thread.user.name")
-                or deep_get(detail, "thread.user.full_name")
-                or deep_get(detail, "user.name")
-            )
-            if isinstance(detail_author, str) and detail_author.strip():
-                author = detail_author.strip()
-
-            raw = pick_best_content(detail)
-            content = html_to_text(raw)
-
-            merged.append({
-                "id": tid,
-                "title": title,
-                "author": author,
-                "content": content,                 # ✅ now filled
-                "content_raw": raw if raw != content else "",  # optional (keep HTML if converted)
-                "model": row.get("model", "Unknown"),
-                "homework": row.get("homework", "Unknown"),
-                "created_at": row.get("created_at", ""),
-                "updated_at": row.get("updated_at", row.get("created_at", "")),
-                "url": row.get("url", f"https://edstem.org/us/courses/{COURSE_ID}/discussion/{tid}"),
-                "likes": int(row.get("likes", 0) or 0),
-                "comments": int(row.get("comments", 0) or 0),
-            })
-
-            if idx % 25 == 0:
-                print(f"[{idx}/{len(settled)}] merged... latest content_len={len(content)}")
-
-            time.sleep(0.15)  # be nice to the API
+    with tracing.span('merge_threads', max_in_flight=max_in_flight) as span, ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        futures = [
+            pool.submit(client.get_thread_detail, tid, limiter, updated_at.get(tid, row.get("updated_at")))
+            for tid, row in items
+        ]
 
-        except Exception as e:
-            failures += 1
-            print(f"[WARN] thread {tid} failed: {e}")
+        for idx, ((tid, row), future) in enumerate(zip(items, futures), start=1):
+            try:
+                item = merge_row(tid, row, future.result())
+                merged.append(item)
+
+                if idx % 25 == 0:
+                    print(f"[{idx}/{len(items)}] merged... latest content_len={len(item['content'])}")
+
+            except Exception as e:
+                failures += 1
+                print(f"[WARN] thread {tid} failed: {e}")
+        span.count(len(merged))
+
+    return merged, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge settled CSV with full thread content from Ed")
+    parser.add_argument("--max-in-flight", type=int, default=1,
+                        help="maximum concurrent detail requests (default: 1, sequential)")
+    parser.add_argument("--rate", type=float, default=6.0,
+                        help="maximum requests per second across all workers (default: 6)")
+    parser.add_argument("--no-cache", action="store_true", help="always download every thread detail")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-max-age-days", type=float, default=30)
+    parser.add_argument("--cache-max-mb", type=float, default=100)
+    tracing.add_profile_argument(parser, 'merge_settled_with_content')
+    args = parser.parse_args()
+
+    with tracing.profiled(args.profile, 'merge_settled_with_content'):
+        merge(args)
+
+
+def merge(args):
+    settled = load_settled_csv(SETTLED_CSV)
+    print(f"Loaded settled rows: {len(settled)}")
+    listing = load_listing(LISTING_JSON)
+    rows = with_unsettled(settled, listing)
+    if len(rows) > len(settled):
+        print(f"Listing threads not settled yet: {len(rows) - len(settled)}")
+
+    cache = None
+    if not args.no_cache:
+        cache = ThreadDetailCache(args.cache_dir, args.cache_max_age_days, int(args.cache_max_mb * 1024 * 1024))
+    client = EdClient(COURSE_ID, cache=cache, pool_size=max(16, args.max_in_flight))
+
+    start = time.perf_counter()
+    merged, failures = merge_threads(client, rows, max_in_flight=args.max_in_flight, rate=args.rate,
+                                     updated_at=updated_at_hints(listing))
+    print(f"Fetched {len(rows)} threads in {time.perf_counter() - start:.1f}s "
+          f"(max_in_flight={args.max_in_flight})")
+    if cache:
+        evicted = cache.evict()
+        print(f"Thread detail {cache.report()}; evicted {evicted} entries")
+    print(client.transport.report())
 
     os.makedirs(os.path.dirname(OUT_JSON), exist_ok=True)
 
-    with open(OUT_JSON, "w", encoding="utf-8") as f:
+    with tracing.span('serialize', cat='io', path=OUT_JSON), open(OUT_JSON, "w", encoding="utf-8") as f:
         json.dump(merged, f, ensure_ascii=False, indent=2)
     print(f"Wrote JSON: {OUT_JSON}  (rows={len(merged)}, failures={failures})")
 
+    # Columnar, memory-mappable copy for the analytics stages
+    with tracing.span('write_columnar', cat='io'):
+        store_path = write_store(merged, store_path_for(OUT_JSON))
+    print(f"Wrote columnar store: {store_path}")
+
     # CSV metadata only (keep it light)
     keys = ["id", "title", "author", "model", "homework", "created_at", "url", "likes", "comments"]
-    with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
+    with tracing.span('write_csv', cat='io', path=OUT_CSV), open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=keys)
         w.writeheader()
         for item in merged:
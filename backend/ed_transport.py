@@ -0,0 +1,226 @@
+"""
+CS182 Blue Team - Shared Ed API transport
+Pooled keep-alive sessions, retry/backoff, endpoint discovery and per-endpoint
+counters, used by both the scraper and the content merge script.
+"""
+
+import os
+import time
+import random
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+# Overridable so the clients can be pointed at a local stand-in server
+BASE_URL = os.getenv("ED_API_BASE_URL", "https://us.edstem.org/api")
+
+# Statuses that mean "slow down and try again" rather than "this endpoint is wrong"
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse an Ed ISO-8601 timestamp (with offset); None if missing or malformed"""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds (HTTP-date form is ignored)"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter with adaptive backoff.
+
+    Tokens refill at `rate` per second up to `capacity`. A throttled or failed
+    response (429/5xx) halves the rate and pauses the bucket (honouring
+    Retry-After when given); each success raises the rate back towards `max_rate`.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def backoff(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease after a 429/5xx response"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self.tokens = 0.0
+
+    def succeed(self):
+        """Additive increase after a successful response"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class EdTransport:
+    """
+    One pooled requests.Session shared by everything talking to Ed.
+
+    - Keep-alive connections are pooled (`pool_size` per host).
+    - 429/5xx responses and connection errors are retried up to `max_retries`
+      times with exponential backoff plus jitter, honouring Retry-After; when a
+      TokenBucket is supplied it is told about throttling instead of sleeping.
+    - get_first() probes alternative endpoint shapes once and remembers the one
+      that worked for the rest of the run.
+    - Every request is counted per endpoint name (requests, failures, retries,
+      latency); see stats() and report().
+    """
+
+    def __init__(self, token: str, base_url: str = BASE_URL, pool_size: int = 16,
+                 max_retries: int = 4, backoff_factor: float = 0.5, timeout: float = 30):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.lock = threading.Lock()
+        self.endpoint_choice: Dict[str, str] = {}
+        self.counters: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "responses": 0, "failures": 0, "retries": 0,
+                     "latency_total": 0.0, "latency_max": 0.0}
+        )
+
+    def _record(self, endpoint: str, latency: Optional[float], failed: bool, retried: bool = False):
+        with self.lock:
+            c = self.counters[endpoint]
+            c["requests"] += 1
+            c["failures"] += int(failed)
+            c["retries"] += int(retried)
+            if latency is not None:
+                c["responses"] += 1
+                c["latency_total"] += latency
+                c["latency_max"] = max(c["latency_max"], latency)
+
+    def _wait(self, attempt: int, retry_after: Optional[float], limiter: Optional[TokenBucket]):
+        if limiter is not None:
+            limiter.backoff(retry_after)
+            return
+        if retry_after is None:
+            retry_after = self.backoff_factor * (2 ** attempt) * (1 + random.random())
+        time.sleep(retry_after)
+
+    def get(self, url: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None,
+            limiter: Optional[TokenBucket] = None) -> requests.Response:
+        """
+        GET with retries. Returns the final response (which may still be an
+        error status once retries are exhausted); raises the last
+        requests.RequestException if no response was ever received.
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            if limiter is not None:
+                limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except requests.RequestException:
+                self._record(endpoint, None, failed=True, retried=not last_attempt)
+                if last_attempt:
+                    raise
+                self._wait(attempt, None, limiter)
+                continue
+            latency = time.perf_counter() - start
+
+            if response.status_code in RETRYABLE_STATUSES and not last_attempt:
+                self._record(endpoint, latency, failed=True, retried=True)
+                self._wait(attempt, parse_retry_after(response.headers.get("Retry-After")), limiter)
+                continue
+
+            self._record(endpoint, latency, failed=response.status_code >= 400)
+            if limiter is not None and response.status_code < 400:
+                limiter.succeed()
+            return response
+
+    def get_first(self, key: str, candidates: List[Tuple[str, str]], **kwargs) -> requests.Response:
+        """
+        Try (endpoint name, url) candidates in order until one answers below 400.
+
+        The winning endpoint name is cached under `key`, so later calls go
+        straight to it and only fall back to probing if it stops working.
+        """
+        chosen = self.endpoint_choice.get(key)
+        if chosen is not None:
+            candidates = sorted(candidates, key=lambda c: c[0] != chosen)
+
+        last_err: Optional[Exception] = None
+        for endpoint, url in candidates:
+            try:
+                response = self.get(url, endpoint, **kwargs)
+            except requests.RequestException as e:
+                last_err = e
+                continue
+            if response.status_code < 400:
+                if chosen != endpoint:
+                    with self.lock:
+                        self.endpoint_choice[key] = endpoint
+                return response
+            last_err = requests.HTTPError(f"HTTP {response.status_code} from {url}", response=response)
+
+        raise last_err or requests.RequestException(f"No endpoint candidates for {key}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint counters, with mean latency in seconds"""
+        with self.lock:
+            out = {}
+            for endpoint, c in sorted(self.counters.items()):
+                out[endpoint] = {
+                    **c,
+                    "latency_mean": c["latency_total"] / c["responses"] if c["responses"] else 0.0,
+                }
+            return out
+
+    def report(self) -> str:
+        lines = ["Ed API requests by endpoint:"]
+        for endpoint, c in self.stats().items():
+            lines.append(
+                f"  {endpoint:<24} requests={c['requests']:<5} failures={c['failures']:<4} "
+                f"retries={c['retries']:<4} mean={c['latency_mean'] * 1000:.0f}ms max={c['latency_max'] * 1000:.0f}ms"
+            )
+        if self.endpoint_choice:
+            chosen = ", ".join(f"{k} -> {v}" for k, v in sorted(self.endpoint_choice.items()))
+            lines.append(f"  discovered endpoints: {chosen}")
+        return "\n".join(lines)
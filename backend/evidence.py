@@ -0,0 +1,177 @@
+"""
+CS182 Blue Team - Strength/weakness evidence matcher
+Finds evidence sentences for a whole text at once instead of sentence by
+sentence: every vague/meta phrase is located with one C-level substring
+search over the whole lowercased text (hits are mapped to sentences by
+offset), and terms come from the sentences' token sets, which preprocessing
+already has. Per sentence, only the cheap length
+and set checks remain. The matcher records phrase, term and negation hits
+per sentence; ranking and the original first-five selection both work from
+those hits.
+"""
+
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+# Words that flip the polarity of a term shortly after them ("not accurate",
+# "no errors", "didn't fail")
+NEGATIONS = ['not', 'no', 'never', 'without', 'neither', 'nor', 'hardly', 'barely', "n't", 'n’t']
+
+# A negation applies to terms at most this many words after it, within the
+# same clause
+NEGATION_WINDOW = 3
+
+# Sentence length bounds (characters, stripped) and minimum distinct content
+# words for a sentence to count as evidence
+MIN_LENGTH = 30
+MAX_LENGTH = 250
+META_MIN_LENGTH = 60
+MIN_WORDS = 8
+
+# Phrase hit bits of a sentence
+VAGUE = 1
+META = 2
+
+# Sentence split keeping the separators, so piece lengths give offsets
+SENTENCE_SPLIT = re.compile(r'([.!?]+)')
+CLAUSE_END = re.compile(r'[,;:]')
+WORD = re.compile(r'\b[a-z]{3,}\b')
+
+
+class EvidenceMatcher:
+    """
+    Finds strength/weakness evidence sentences, one text at a time.
+
+    Sentences are the pieces of re.split(r'[.!?]+', text). A sentence is
+    usable evidence when it is MIN_LENGTH..MAX_LENGTH characters long, has no
+    vague phrase, is not short meta-commentary, has at least MIN_WORDS
+    distinct tokens and mentions a strength or weakness term. Phrases match
+    anywhere in the lowercased sentence, terms are tokens (so terms that are
+    also stop words never match), and a negation cue applies to terms among
+    the NEGATION_WINDOW words after it in the same clause.
+    """
+
+    def __init__(self, strength_terms: Iterable[str], weakness_terms: Iterable[str],
+                 vague_phrases: Iterable[str], meta_phrases: Iterable[str], stop_words: Iterable[str],
+                 tokenize: Callable[[str], List[str]], negations: Iterable[str] = NEGATIONS):
+        stop_words = set(stop_words)
+        self.strength_terms = frozenset(strength_terms) - stop_words
+        self.weakness_terms = frozenset(weakness_terms) - stop_words
+        self.terms = self.strength_terms | self.weakness_terms
+        self.phrases = [(phrase, VAGUE) for phrase in sorted(vague_phrases)] + \
+                       [(phrase, META) for phrase in meta_phrases]
+        self.tokenize = tokenize
+
+        words = [n for n in negations if n[0].isalpha()]
+        suffixes = [n for n in negations if not n[0].isalpha()]
+        alternatives = [r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b'] if words else []
+        if suffixes:
+            alternatives.append('(?:' + '|'.join(map(re.escape, suffixes)) + r')\b')
+        self.negation_pattern = re.compile('|'.join(alternatives) or '(?!)')
+
+    def phrase_bits(self, text: str, sentences: List[str]) -> List[int]:
+        """
+        VAGUE/META phrase bits of each sentence of `text`, from one substring
+        search per phrase over the whole lowercased text
+        """
+        lower = text.lower()
+        if len(lower) == len(text) and len(text) - sum(map(len, sentences)) == len(sentences) - 1:
+            # Every separator is a single character: offsets follow from the
+            # sentence lengths. ends[k] is the offset just past separator k.
+            ends = [end + k for k, end in enumerate(accumulate(map(len, sentences)), 1)]
+        else:
+            ends = list(accumulate(map(len, SENTENCE_SPLIT.split(lower))))[1::2]
+        bits = [0] * len(sentences)
+        for phrase, kind in self.phrases:
+            # Phrases contain no [.!?], so a hit lies inside one sentence
+            i = lower.find(phrase)
+            while i >= 0:
+                bits[bisect_right(ends, i)] |= kind
+                i = lower.find(phrase, i + 1)
+        return bits
+
+    def bits_of(self, lower_sentence: str) -> int:
+        """VAGUE/META phrase bits of one lowercased sentence"""
+        bits = 0
+        for phrase, kind in self.phrases:
+            if phrase in lower_sentence:
+                bits |= kind
+        return bits
+
+    def negated_terms(self, lower_sentence: str, present: set) -> List[str]:
+        """Terms of `present` within NEGATION_WINDOW words after a negation cue"""
+        negated = []
+        for match in self.negation_pattern.finditer(lower_sentence):
+            clause = CLAUSE_END.split(lower_sentence[match.end():], 1)[0]
+            for word in clause.split()[:NEGATION_WINDOW]:
+                for term in WORD.findall(word):
+                    if term in present and term not in negated:
+                        negated.append(term)
+        return negated
+
+    def evaluate(self, sentence: str, bits: int, tokens: Optional[List[str]] = None) -> Any:
+        """
+        Hits of one sentence with the given phrase bits: 0 if it is not
+        usable evidence, otherwise [strength terms, weakness terms, negated
+        terms], each sorted
+        """
+        if bits & VAGUE:
+            return 0
+        length = len(sentence.strip())
+        if length < MIN_LENGTH or length > MAX_LENGTH or (bits & META and length < META_MIN_LENGTH):
+            return 0
+        words = set(self.tokenize(sentence) if tokens is None else tokens)
+        if len(words) < MIN_WORDS:
+            return 0
+        present = words & self.terms
+        if not present:
+            return 0
+        lower = sentence.lower()
+        negated = self.negated_terms(lower, present) if self.negation_pattern.search(lower) else []
+        return [sorted(present & self.strength_terms), sorted(present & self.weakness_terms), sorted(negated)]
+
+    def hits(self, sentence: str, tokens: Optional[List[str]] = None) -> Any:
+        """
+        evaluate() for a lone sentence, with its phrases checked only once
+        the cheap length test has passed
+        """
+        length = len(sentence.strip())
+        if length < MIN_LENGTH or length > MAX_LENGTH:
+            return 0
+        return self.evaluate(sentence, self.bits_of(sentence.lower()), tokens)
+
+    def sentence_hits(self, text: str, sentences: Optional[List[str]] = None,
+                      tokens: Optional[List[List[str]]] = None) -> List[Any]:
+        """
+        Hits of every sentence of `text` (`sentences` and their `tokens` when
+        the split and tokenization are already known)
+        """
+        if sentences is None:
+            sentences = re.split(r'[.!?]+', text)
+        bits = self.phrase_bits(text, sentences)
+        if tokens is None:
+            return [self.evaluate(sentence, b) for sentence, b in zip(sentences, bits)]
+        return [self.evaluate(sentence, b, t) for sentence, b, t in zip(sentences, bits, tokens)]
+
+
+def flags_of(hits: Any, strength: int, weakness: int) -> int:
+    """The original STRENGTH/WEAKNESS flags: any term, negated or not"""
+    if not hits:
+        return 0
+    return (strength if hits[0] else 0) | (weakness if hits[1] else 0)
+
+
+def scores_of(hits: Any) -> Tuple[float, float]:
+    """
+    (strength score, weakness score) of a sentence. A term supports its own
+    side unless negated, in which case it supports the other ("no errors");
+    each side scores its supporting terms minus half the opposing ones.
+    """
+    if not hits:
+        return 0.0, 0.0
+    strengths, weaknesses, negated = hits
+    pro = sum(1 for t in strengths if t not in negated) + sum(1 for t in weaknesses if t in negated)
+    con = sum(1 for t in weaknesses if t not in negated) + sum(1 for t in strengths if t in negated)
+    return pro - 0.5 * con, con - 0.5 * pro
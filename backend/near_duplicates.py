@@ -0,0 +1,348 @@
+"""
+CS182 Blue Team - Near-duplicate post detection
+Cross-posted or reposted write-ups are found with MinHash signatures of each
+post's word shingles and LSH banding: posts sharing any band of their
+signature become candidate pairs, and candidates whose estimated Jaccard
+similarity clears the threshold are joined into duplicate clusters. Only
+posts that collide in a band are ever compared, so the work grows with the
+corpus rather than with its square. Signatures are kept on disk keyed by
+post, so new posts are checked against the stored corpus without shingling
+it again.
+"""
+
+import os
+import re
+import json
+import zlib
+import argparse
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from text_cache import content_key
+from text_normalize import normalize_html
+
+SIGNATURE_PATH = "data/.cache/minhash.npz"
+CLUSTERS_PATH = "data/near_duplicates.json"
+
+# Bump when the signature computed for the same text changes
+MINHASH_VERSION = 1
+
+NUM_PERM = 128
+BANDS = 16                   # 16 bands of 8 rows: pairs above ~0.7 Jaccard collide
+SHINGLE_SIZE = 5             # words per shingle
+THRESHOLD = 0.8              # estimated Jaccard similarity of a near-duplicate
+
+# Multiply-shift hashing ((a * x + b) mod 2^64) >> 32 of the shingle hashes,
+# one (a, b) per permutation
+_rng = np.random.RandomState(182)
+PERM_A = _rng.randint(1, 1 << 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+PERM_B = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+SHINGLE_MULTIPLIERS = _rng.randint(1, 1 << 62, size=SHINGLE_SIZE, dtype=np.uint64) | np.uint64(1)
+BAND_MULTIPLIERS = _rng.randint(1, 1 << 62, size=NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+
+# Shingle hashes of this many documents are permuted in one array operation
+SIGN_BATCH = 64
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class WordHashes(dict):
+    """word -> CRC-32 of its UTF-8 bytes, computed on first lookup"""
+
+    def __missing__(self, word: str) -> int:
+        value = self[word] = zlib.crc32(word.encode('utf-8'))
+        return value
+
+
+_word_hashes = WordHashes()
+
+
+def post_key(post: Dict[str, Any]) -> str:
+    """Identity of a post in the signature store: its Ed id, else its URL, else its text"""
+    if post.get('id') not in (None, ''):
+        return str(post['id'])
+    return post.get('url') or content_key(post.get('title'), post.get('content'))
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Distinct 64-bit hashes of the text's overlapping SHINGLE_SIZE-word shingles (empty if shorter)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return np.zeros(0, dtype=np.uint64)
+    tokens = np.fromiter(map(_word_hashes.__getitem__, words), dtype=np.uint64, count=len(words))
+    count = len(words) - SHINGLE_SIZE + 1
+    combined = tokens[:count] * SHINGLE_MULTIPLIERS[0]
+    for j in range(1, SHINGLE_SIZE):
+        combined += tokens[j:j + count] * SHINGLE_MULTIPLIERS[j]
+    return np.unique(combined)
+
+
+def minhash_many(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (texts x NUM_PERM) MinHash signatures and whether each text had enough
+    words to shingle; signatures of the others are all zero.
+    """
+    signatures = np.zeros((len(texts), NUM_PERM), dtype=np.uint32)
+    valid = np.zeros(len(texts), dtype=bool)
+    for start in range(0, len(texts), SIGN_BATCH):
+        shingles = [shingle_hashes(text) for text in texts[start:start + SIGN_BATCH]]
+        filled = [i for i, hashes in enumerate(shingles) if len(hashes)]
+        if not filled:
+            continue
+        offsets = np.cumsum([0] + [len(shingles[i]) for i in filled[:-1]])
+        values = np.concatenate([shingles[i] for i in filled])
+        hashed = (PERM_A[:, None] * values[None, :] + PERM_B[:, None]) >> np.uint64(32)
+        rows = start + np.array(filled)
+        signatures[rows] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        valid[rows] = True
+    return signatures, valid
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """NUM_PERM-value MinHash signature of the text's shingles, None if it has too few words"""
+    signatures, valid = minhash_many([text])
+    return signatures[0] if valid[0] else None
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """(posts x BANDS) hash of each band of each signature"""
+    bands = signatures.astype(np.uint64).reshape(len(signatures), BANDS, NUM_PERM // BANDS)
+    return (bands * BAND_MULTIPLIERS).sum(axis=2)
+
+
+def similarity(signatures: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of the signature pairs (left[i], right[i])"""
+    return (signatures[left] == signatures[right]).mean(axis=1)
+
+
+def candidate_pairs(signatures: np.ndarray) -> np.ndarray:
+    """
+    (pairs x 2) distinct row pairs, lower row first, that share a band.
+
+    Within a bucket every member is paired with its first member and with
+    the member before it, which links the whole bucket without emitting all
+    of its pairs when one text has been posted many times.
+    """
+    keys = band_keys(signatures)
+    pairs = []
+    for b in range(BANDS):
+        order = np.argsort(keys[:, b], kind='stable')
+        sorted_keys = keys[order, b]
+        same = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1]) + 1
+        if not len(same):
+            continue
+        run_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        first = order[run_start[np.searchsorted(run_start, same, side='right') - 1]]
+        pairs.append(np.stack([first, order[same]], axis=1))
+        pairs.append(np.stack([order[same - 1], order[same]], axis=1))
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return np.unique(pairs, axis=0)
+
+
+def connected_components(n: int, pairs: np.ndarray) -> List[List[int]]:
+    """Groups of two or more rows joined by the pairs, each sorted, ordered by first row"""
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs.tolist():
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [rows for _, rows in sorted(groups.items()) if len(rows) > 1]
+
+
+class SignatureStore:
+    """
+    MinHash signatures of posts in one .npz file, keyed by post_key().
+
+    Each signature is stored with the content hash of the text it was
+    computed from, so an edited post is re-hashed and an unchanged one is
+    not. A file written with other MinHash settings is ignored. Posts too
+    short to shingle are remembered too (with an all-zero signature and
+    valid=False) so they are not re-read on every run.
+    """
+
+    def __init__(self, path: str = SIGNATURE_PATH, threshold: float = THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.keys: List[str] = []
+        self.hashes: List[str] = []
+        self.signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self.valid = np.zeros(0, dtype=bool)
+        self.row_of: Dict[str, int] = {}
+        self.used: set = set()
+        self.computed = 0
+        self.dirty = False
+        self._bands: Optional[np.ndarray] = None
+        self._load()
+
+    def _header(self) -> str:
+        return json.dumps({"version": MINHASH_VERSION, "perm": NUM_PERM, "bands": BANDS, "shingle": SHINGLE_SIZE})
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                if str(saved['header']) != self._header():
+                    return
+                keys, hashes = saved['keys'].tolist(), saved['hashes'].tolist()
+                signatures, valid = saved['signatures'], saved['valid']
+        except (OSError, KeyError, ValueError):
+            return
+        self.keys, self.hashes, self.signatures, self.valid = keys, hashes, signatures, valid
+        self.row_of = {key: i for i, key in enumerate(self.keys)}
+
+    def save(self, prune: bool = True):
+        """Write back changes; with prune=False signatures of posts not seen in this run are kept"""
+        keep = [i for i, key in enumerate(self.keys) if not prune or key in self.used]
+        if not self.dirty and len(keep) == len(self.keys):
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, header=np.array(self._header()),
+                 keys=np.array([self.keys[i] for i in keep], dtype=str),
+                 hashes=np.array([self.hashes[i] for i in keep], dtype=str),
+                 signatures=self.signatures[keep], valid=self.valid[keep])
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def rows(self, posts: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """Store row of each post, signing posts that are new or whose text changed"""
+        rows, pending = [], []
+        for post in posts:
+            key = post_key(post)
+            digest = content_key(post.get('title'), post.get('content'))
+            row = self.row_of.get(key)
+            if row is None:
+                row = self.row_of[key] = len(self.keys) + len(pending)
+                pending.append((key, digest, post))
+            elif row < len(self.keys) and self.hashes[row] != digest:
+                pending.append((key, digest, post))
+            self.used.add(key)
+            rows.append(row)
+        if pending:
+            self._sign(pending)
+        return np.array(rows, dtype=np.int64)
+
+    def _sign(self, pending: List[Tuple[str, str, Dict[str, Any]]]):
+        new_rows = sum(1 for key, _, _ in pending if self.row_of[key] >= len(self.keys))
+        if new_rows:
+            self.signatures = np.concatenate([self.signatures, np.zeros((new_rows, NUM_PERM), dtype=np.uint32)])
+            self.valid = np.concatenate([self.valid, np.zeros(new_rows, dtype=bool)])
+            self.keys.extend([None] * new_rows)
+            self.hashes.extend([None] * new_rows)
+        signatures, valid = minhash_many([normalize_html(post.get('content', '')) for _, _, post in pending])
+        for (key, digest, _), signature, ok in zip(pending, signatures, valid):
+            row = self.row_of[key]
+            self.keys[row], self.hashes[row] = key, digest
+            self.signatures[row], self.valid[row] = signature, ok
+        self.computed += len(pending)
+        self.dirty = True
+        self._bands = None
+
+    def clusters(self, posts: List[Dict[str, Any]]) -> List[List[int]]:
+        """Near-duplicate clusters among the posts, as sorted lists of their indices"""
+        rows = self.rows(posts)
+        usable = np.flatnonzero(self.valid[rows])
+        signatures = self.signatures[rows[usable]]
+        pairs = candidate_pairs(signatures)
+        if len(pairs):
+            pairs = pairs[similarity(signatures, pairs[:, 0], pairs[:, 1]) >= self.threshold]
+        return [[int(usable[i]) for i in group] for group in connected_components(len(usable), pairs)]
+
+    def matches(self, post: Dict[str, Any]) -> List[Tuple[str, float]]:
+        """
+        Stored posts the post nearly duplicates, as (post key, estimated
+        similarity), most similar first. The post itself is not added.
+        """
+        signature = minhash(normalize_html(post.get('content', '')))
+        if signature is None or not len(self.keys):
+            return []
+        if self._bands is None:
+            self._bands = band_keys(self.signatures)
+        hits = (self._bands == band_keys(signature[None, :])).any(axis=1) & self.valid
+        rows = np.flatnonzero(hits)
+        scores = (self.signatures[rows] == signature).mean(axis=1)
+        own = post_key(post)
+        found = [(self.keys[r], float(s)) for r, s in zip(rows, scores) if s >= self.threshold and self.keys[r] != own]
+        return sorted(found, key=lambda match: -match[1])
+
+    def report(self) -> str:
+        return f"near-duplicate signatures: {len(self.used)} posts, {self.computed} (re)computed"
+
+
+def collapse_duplicates(posts: List[Dict[str, Any]], clusters: List[List[int]]) -> List[Dict[str, Any]]:
+    """The posts with each duplicate cluster reduced to its earliest post (ties in post order)"""
+    dropped = set()
+    for rows in clusters:
+        keep = min(rows, key=lambda i: (not posts[i].get('created_at'), posts[i].get('created_at') or '', i))
+        dropped.update(i for i in rows if i != keep)
+    return [post for i, post in enumerate(posts) if i not in dropped]
+
+
+def drop_near_duplicates(data, path: str = SIGNATURE_PATH) -> List[Dict[str, Any]]:
+    """Posts (a list or a ColumnarPostStore) with near-duplicates collapsed, for counting"""
+    posts = list(data)
+    store = SignatureStore(path)
+    clusters = store.clusters(posts)
+    store.save()
+    kept = collapse_duplicates(posts, clusters)
+    print(f"Collapsed {len(posts) - len(kept)} near-duplicate posts in {len(clusters)} clusters")
+    return kept
+
+
+def describe_clusters(posts: List[Dict[str, Any]], clusters: List[List[int]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            'size': len(rows),
+            'posts': [
+                {'id': posts[i].get('id'), 'title': posts[i].get('title', ''), 'author': posts[i].get('author', ''),
+                 'url': posts[i].get('url', ''), 'created_at': posts[i].get('created_at', '')}
+                for i in rows
+            ],
+        }
+        for rows in sorted(clusters, key=lambda rows: (-len(rows), rows[0]))
+    ]
+
+
+def main():
+    from post_io import load_posts
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate posts with MinHash / LSH")
+    parser.add_argument('--input', default="data/special_participation_a_merged.json",
+                        help="posts JSON / JSONL to scan")
+    parser.add_argument('--check', metavar='POSTS',
+                        help="only check these posts (JSON / JSONL) against the stored signatures")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="estimated Jaccard similarity at which posts count as duplicates")
+    args = parser.parse_args()
+
+    store = SignatureStore(SIGNATURE_PATH, threshold=args.threshold)
+    if args.check:
+        for post in load_posts(args.check):
+            for key, score in store.matches(post):
+                print(f"{post_key(post)}  ~  {key}  ({score:.2f})  {post.get('title', '')}")
+        return
+
+    posts = load_posts(args.input)
+    clusters = store.clusters(posts)
+    store.save()
+    print(store.report())
+    with open(CLUSTERS_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'threshold': args.threshold, 'clusters': describe_clusters(posts, clusters)},
+                  f, indent=2, ensure_ascii=False)
+    print(f"{len(clusters)} near-duplicate clusters ({sum(len(c) for c in clusters)} posts) saved to {CLUSTERS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+CS182 Blue Team - Pipeline runner
+Runs the backend stages as a dependency graph: every stage declares the
+files it reads and writes, a stage waits only for the stages producing its
+inputs, and independent stages run at the same time.
+
+A stage is skipped when its inputs, its command and the backend modules it
+imports hash the same as on its last successful run and its outputs are
+still what that run wrote. Hashes of JSON files leave out timestamps such as
+generated_at, so a rebuild from the same inputs is recognised as unchanged,
+and an output whose content did not change is put back byte for byte (old
+file, old mtime) instead of being rewritten.
+
+Usage (from backend/):
+    python3 pipeline.py                 # scrape and merge, then everything that is stale
+    python3 pipeline.py --no-scrape     # rebuild from the data already on disk
+    python3 pipeline.py --dry-run
+"""
+
+import os
+import ast
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = "data/.cache/pipeline.json"
+FRONTEND_DATA = "../frontend/public/data"
+
+# Bump when the stage keys change meaning
+STATE_VERSION = 1
+
+# Keys left out of JSON content hashes (they change on every run)
+VOLATILE_KEYS = ('generated_at',)
+
+# Posts files the analytics stages may read, in the order they look for them
+POSTS_INPUTS = ("data/special_participation_a_merged.json", "data/special_participation_a.json",
+                "data/special_participation_a.jsonl")
+
+print_lock = threading.Lock()
+
+
+# -- hashing -----------------------------------------------------------
+
+def without_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: without_volatile(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [without_volatile(v) for v in value]
+    return value
+
+
+def content_hash(path: str) -> Optional[str]:
+    """Hash of a file's content (None if missing); JSON is hashed without VOLATILE_KEYS"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.json'):
+        try:
+            value = without_volatile(json.loads(data))
+            data = json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        except ValueError:
+            pass
+    return hashlib.sha256(data).hexdigest()
+
+
+def local_imports(script: str, seen: Optional[set] = None) -> List[str]:
+    """The script and every backend module it imports, directly or not"""
+    seen = set() if seen is None else seen
+    path = os.path.join(BACKEND_DIR, script)
+    if script in seen or not os.path.exists(path):
+        return sorted(seen)
+    seen.add(script)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            local_imports(name.split('.')[0] + '.py', seen)
+    return sorted(seen)
+
+
+# -- stages ------------------------------------------------------------
+
+class Stage:
+    """
+    One pipeline step: a backend script (`command`, run from backend/) or an
+    in-process `action`, with the files it reads and writes. `external`
+    stages read something the runner cannot hash (the Ed API) and always run.
+    """
+
+    def __init__(self, name: str, inputs: Sequence[str], outputs: Sequence[str],
+                 command: Optional[List[str]] = None, action: Optional[Callable[['Stage'], None]] = None,
+                 external: bool = False):
+        self.name = name
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.command = command
+        self.action = action
+        self.external = external
+        self.code = local_imports(command[0]) if command else []
+
+    def key(self) -> str:
+        """Hash of everything the stage's outputs depend on"""
+        basis = {
+            'version': STATE_VERSION,
+            'command': self.command,
+            'inputs': {path: content_hash(path) for path in self.inputs},
+            'code': {path: content_hash(os.path.join(BACKEND_DIR, path)) for path in self.code},
+        }
+        return hashlib.sha256(json.dumps(basis, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def copy_if_changed(stage: Stage):
+    """Copy each input to the output at the same position, unless the bytes already match"""
+    for source, target in zip(stage.inputs, stage.outputs):
+        if not os.path.exists(source):
+            continue
+        if os.path.exists(target) and os.path.getsize(source) == os.path.getsize(target):
+            with open(source, 'rb') as a, open(target, 'rb') as b:
+                if a.read() == b.read():
+                    continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+        log(stage.name, f"copied {source} -> {target}")
+
+
+def frontend_copy(paths: Sequence[str]) -> List[str]:
+    return [os.path.join(FRONTEND_DATA, os.path.basename(path)) for path in paths]
+
+
+MERGED_POSTS = ["data/special_participation_a_merged.json", "data/special_participation_a_merged.csv"]
+
+
+def app_posts(scrape: bool) -> List[str]:
+    """
+    The posts JSON / CSV the app lists: the merged dataset (the scrape's
+    listing has no post content; the merge stage fills it in) when a merge
+    stage runs or its output already exists, else the scrape's output
+    """
+    if scrape or all(os.path.exists(path) for path in MERGED_POSTS):
+        return MERGED_POSTS
+    return ["data/special_participation_a.json", "data/special_participation_a.csv"]
+
+
+def build_stages(scrape: bool = True) -> List[Stage]:
+    posts = ["data/special_participation_a.json", "data/special_participation_a.csv"]
+    analytics = ["data/analytics.json", "data/advanced_analytics.json"]
+    stages = [
+        Stage("advanced_analytics", POSTS_INPUTS, ["data/advanced_analytics.json"],
+              command=["advanced_analytics.py"]),
+        # Reads advanced_analytics.json for the model comparison
+        Stage("analytics", list(POSTS_INPUTS) + ["data/advanced_analytics.json"], ["data/analytics.json"],
+              command=["analytics.py"]),
+        Stage("related_posts", POSTS_INPUTS, ["data/related_posts.json"], command=["related_posts.py"]),
+        Stage("copy_posts", app_posts(scrape), frontend_copy(posts), action=copy_if_changed),
+        Stage("copy_analytics", analytics, frontend_copy(analytics), action=copy_if_changed),
+        Stage("artifacts", list(POSTS_INPUTS) + ["data/related_posts.json"] + analytics,
+              [os.path.join(FRONTEND_DATA, "manifest.json")],
+              command=["artifacts.py", "--out", FRONTEND_DATA]),
+    ]
+    if scrape:
+        # Both fetch from Ed, so they always run; the merge fills in the
+        # content of the scraped threads (and of threads not settled yet)
+        stages[:0] = [
+            Stage("scrape", ["data/title_patterns.json"], posts, command=["scraper.py"], external=True),
+            Stage("merge", ["data/special_participation_a.json", "data/special_participation_a_settled.csv"],
+                  MERGED_POSTS, command=["data/merge_settled_with_content.py"], external=True),
+        ]
+    return stages
+
+
+def dependencies(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Stage name -> names of the stages writing one of its inputs"""
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            if path in producers:
+                raise ValueError(f"{path} is written by both {producers[path]} and {stage.name}")
+            producers[path] = stage.name
+    return {stage.name: sorted({producers[p] for p in stage.inputs if p in producers} - {stage.name})
+            for stage in stages}
+
+
+# -- running -----------------------------------------------------------
+
+def log(name: str, message: str):
+    with print_lock:
+        print(f"[{name}] {message}", flush=True)
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == STATE_VERSION:
+            return state
+    return {'version': STATE_VERSION, 'stages': {}}
+
+
+def save_state(state: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def is_current(stage: Stage, key: str, record: Optional[Dict[str, Any]]) -> bool:
+    if stage.external or record is None or record.get('key') != key:
+        return False
+    return all(content_hash(path) == digest for path, digest in record.get('outputs', {}).items())
+
+
+def run_command(stage: Stage):
+    process = subprocess.Popen([sys.executable or "python3"] + stage.command, cwd=BACKEND_DIR,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+                               env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    for line in process.stdout:
+        log(stage.name, line.rstrip())
+    if process.wait() != 0:
+        raise RuntimeError(f"{' '.join(stage.command)} exited with status {process.returncode}")
+
+
+def run_stage(stage: Stage) -> Dict[str, str]:
+    """
+    Run the stage with its previous outputs set aside; an output whose
+    content hash did not change (or any output, if the stage fails) is
+    moved back over the new file. Returns the outputs' content hashes.
+    """
+    previous = {}
+    for path in stage.outputs:
+        if os.path.exists(path) and stage.command:
+            shutil.copy2(path, path + '.prev')
+            previous[path] = content_hash(path)
+    try:
+        if stage.command:
+            run_command(stage)
+        else:
+            stage.action(stage)
+    except BaseException:
+        for path in previous:
+            os.replace(path + '.prev', path)
+        raise
+
+    hashes = {}
+    for path in stage.outputs:
+        hashes[path] = content_hash(path)
+        if path not in previous:
+            continue
+        if hashes[path] == previous[path]:
+            os.replace(path + '.prev', path)
+            log(stage.name, f"{path} unchanged")
+        else:
+            os.remove(path + '.prev')
+    return hashes
+
+
+def run_pipeline(stages: List[Stage], state_path: str = STATE_PATH, jobs: int = 2,
+                 force: bool = False, dry_run: bool = False) -> bool:
+    """Run every stale stage once its dependencies are done; False if any stage failed"""
+    deps = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    state = load_state(state_path)
+    pending = [stage.name for stage in stages]
+    done, failed = set(), set()
+    running = {}
+
+    def start(pool, name):
+        stage = by_name[name]
+        key = stage.key()
+        if not force and is_current(stage, key, state['stages'].get(name)):
+            log(name, "up to date, skipped")
+            done.add(name)
+            return
+        if dry_run:
+            log(name, "would run")
+            done.add(name)
+            return
+        log(name, "running")
+        running[pool.submit(run_stage, stage)] = (name, key)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            progress = False
+            for name in list(pending):
+                if any(dep in failed for dep in deps[name]):
+                    log(name, "not run: a dependency failed")
+                    pending.remove(name)
+                    failed.add(name)
+                    progress = True
+                elif all(dep in done for dep in deps[name]):
+                    pending.remove(name)
+                    start(pool, name)
+                    progress = True
+            if not running:
+                if not progress:
+                    raise ValueError(f"stages depend on each other in a cycle: {', '.join(pending)}")
+                # Skipped stages may have unblocked others
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, key = running.pop(future)
+                try:
+                    outputs = future.result()
+                except Exception as e:
+                    log(name, f"FAILED: {e}")
+                    failed.add(name)
+                    continue
+                # The key is taken again: a stage may not change its own inputs
+                state['stages'][name] = {'key': key if by_name[name].key() == key else None,
+                                         'outputs': outputs}
+                save_state(state, state_path)
+                done.add(name)
+                log(name, "done")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--no-scrape', action='store_true', help="use the posts already in data/ (no Ed API calls)")
+    parser.add_argument('--force', action='store_true', help="run every stage even if its inputs are unchanged")
+    parser.add_argument('--dry-run', action='store_true', help="only print which stages would run")
+    parser.add_argument('--jobs', type=int, default=2, help="stages run at the same time (default: 2)")
+    parser.add_argument('--state', default=STATE_PATH, help="hashes of the last successful run of each stage")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    stages = build_stages(scrape=not args.no_scrape)
+    if not run_pipeline(stages, args.state, args.jobs, args.force, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
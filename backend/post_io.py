@@ -0,0 +1,162 @@
+"""
+CS182 Blue Team - Post dataset I/O
+Readers and writers for the processed posts, as an indented JSON array or as
+JSONL (one post per line) that can be written and read as a stream. Both
+forms can also be read as a stream, one post at a time (iter_posts).
+"""
+
+import os
+import csv
+import json
+from typing import Iterable, Iterator, List, Dict, Any, Tuple
+
+# Bytes of a JSON array file parsed per read by iter_json_array
+READ_CHUNK = 1 << 20
+
+CSV_FIELDS = ["id", "title", "author", "model", "homework", "created_at", "url", "likes", "comments"]
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield posts from a JSONL file one line at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON line: {e}") from e
+
+
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the elements of a top-level JSON array file one at a time.
+
+    The file is read in chunks and each element decoded with raw_decode as
+    soon as it is complete, so memory holds one chunk plus one element rather
+    than the whole document.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        offset = 0          # characters of the file before buffer[0]
+        pos = 0
+        eof = not buffer
+
+        def skip(chars: str) -> bool:
+            """Advance pos past any of chars, reading more as needed; False at end of file"""
+            nonlocal buffer, offset, pos, eof
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer):
+                    return True
+                if eof:
+                    return False
+                offset += len(buffer)
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+
+        if not skip(' \t\r\n') or buffer[pos] != '[':
+            raise ValueError(f"{path}: expected a JSON array")
+        pos += 1
+        first = True
+        while True:
+            if not skip(' \t\r\n'):
+                raise ValueError(f"{path}: unterminated JSON array")
+            if buffer[pos] == ']':
+                return
+            if not first:
+                if buffer[pos] != ',':
+                    raise ValueError(f"{path}: expected ',' or ']' at character {offset + pos}")
+                pos += 1
+                if not skip(' \t\r\n'):
+                    raise ValueError(f"{path}: unterminated JSON array")
+            first = False
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise ValueError(f"{path}: invalid JSON at character {offset + pos}: {e}") from e
+                    end = None
+                # An element running into the end of the buffer (or a number
+                # cut off mid-way, "2." of "2.5") may continue in the next chunk
+                if end is not None and (eof or (end < len(buffer) and buffer[end] in ' \t\r\n,]')):
+                    break
+                more = f.read(chunk_size)
+                eof = not more
+                buffer = buffer[pos:] + more
+                offset += pos
+                pos = 0
+            pos = end
+            yield value
+
+
+def iter_posts(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield posts one at a time from a .jsonl file or a JSON array file"""
+    if path.endswith('.jsonl'):
+        return read_jsonl(path)
+    return iter_json_array(path)
+
+
+def load_posts(path: str) -> List[Dict[str, Any]]:
+    """Load posts from a .jsonl file or a JSON array file"""
+    if path.endswith('.jsonl'):
+        return list(read_jsonl(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class StreamWriter:
+    """
+    Write posts to JSONL and CSV in a single pass.
+
+    Each record is flushed to both files as it arrives, so memory use does not
+    grow with the number of posts. Files are written under temporary names and
+    moved into place on a clean close, so readers never see a partial dataset.
+    """
+
+    def __init__(self, jsonl_path: str, csv_path: str, csv_fields: List[str] = CSV_FIELDS):
+        self.jsonl_path = jsonl_path
+        self.csv_path = csv_path
+        self.csv_fields = csv_fields
+        self.count = 0
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.jsonl_path) or '.', exist_ok=True)
+        os.makedirs(os.path.dirname(self.csv_path) or '.', exist_ok=True)
+        self.jsonl_file = open(self.jsonl_path + '.tmp', 'w', encoding='utf-8')
+        self.csv_file = open(self.csv_path + '.tmp', 'w', newline='', encoding='utf-8')
+        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=self.csv_fields)
+        self.csv_writer.writeheader()
+        return self
+
+    def write(self, post: Dict[str, Any]):
+        self.jsonl_file.write(json.dumps(post, ensure_ascii=False) + '\n')
+        self.csv_writer.writerow({k: post.get(k, '') for k in self.csv_fields})
+        self.count += 1
+
+    def write_all(self, posts: Iterable[Dict[str, Any]]) -> int:
+        for post in posts:
+            self.write(post)
+        return self.count
+
+    def __exit__(self, exc_type, exc, tb):
+        self.jsonl_file.close()
+        self.csv_file.close()
+        if exc_type is None:
+            os.replace(self.jsonl_path + '.tmp', self.jsonl_path)
+            os.replace(self.csv_path + '.tmp', self.csv_path)
+        else:
+            os.remove(self.jsonl_path + '.tmp')
+            os.remove(self.csv_path + '.tmp')
+        return False
+
+
+def stream_to_disk(posts: Iterable[Dict[str, Any]], jsonl_path: str, csv_path: str) -> Tuple[str, str, int]:
+    """Write an iterable of posts to JSONL + CSV in one pass; returns (jsonl, csv, count)"""
+    with StreamWriter(jsonl_path, csv_path) as writer:
+        count = writer.write_all(posts)
+    return jsonl_path, csv_path, count
@@ -0,0 +1,188 @@
+"""
+CS182 Blue Team - Dashboard statistics aggregator
+One pass over the posts counts everything calculate_statistics reports
+(models, homeworks, authors, days, the model x homework matrix). Partial
+aggregates of consecutive slices of the dataset merge into the aggregate of
+the whole, so shards or worker processes can each count their part; merged
+in dataset order, the result is identical to a single pass.
+
+For corpora too large to keep a counter per author, sketch=True replaces the
+author counts with a HyperLogLog (distinct authors, ~1% error) and a
+Misra-Gries summary (top contributors; counts are lower bounds, off by at
+most posts / capacity). Both take fixed memory and merge like the counters.
+"""
+
+import math
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+HLL_PRECISION = 14           # 2^14 registers: ~0.8% standard error
+MG_CAPACITY = 1000           # counters kept by the Misra-Gries summary
+TOP_CONTRIBUTORS = 10
+
+
+def most_common(counts: Dict[str, int], n: Optional[int] = None) -> List[tuple]:
+    """Like Counter.most_common: by count, ties in first-seen order"""
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    return ranked if n is None else ranked[:n]
+
+
+def hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Distinct-count sketch; merging takes the register-wise maximum"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        h = hash64(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        merged = np.maximum(np.frombuffer(self.registers, dtype=np.uint8),
+                            np.frombuffer(other.registers, dtype=np.uint8))
+        self.registers = bytearray(merged.tobytes())
+
+    def count(self) -> int:
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        m = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int32))))
+        empty = int(np.count_nonzero(registers == 0))
+        # Small cardinalities: linear counting over the empty registers
+        if estimate <= 2.5 * m and empty:
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+
+
+class MisraGries:
+    """
+    Heavy-hitter summary: every item with more than n / (capacity + 1)
+    occurrences keeps a counter, which undercounts it by at most that much.
+    Counters are shrunk back to `capacity` once there are twice as many, so
+    the sort this takes is paid once per `capacity` new items.
+    """
+
+    def __init__(self, capacity: int = MG_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, value: str, count: int = 1):
+        if value in self.counts:
+            self.counts[value] += count
+        else:
+            self.counts[value] = count
+            if len(self.counts) > 2 * self.capacity:
+                self.shrink()
+
+    def shrink(self):
+        """Subtract the (capacity + 1)-th largest count from all and drop the non-positive"""
+        if len(self.counts) <= self.capacity:
+            return
+        cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {k: c - cut for k, c in self.counts.items() if c > cut}
+
+    def merge(self, other: 'MisraGries'):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.shrink()
+
+    def top(self, n: int) -> List[tuple]:
+        return most_common(self.counts, n)
+
+
+class StatsAggregator:
+    """
+    Counts of posts per model, homework, author, creation day and
+    (model, homework), built with add() / update() and combined with merge().
+    """
+
+    def __init__(self, sketch: bool = False, hll_precision: int = HLL_PRECISION,
+                 mg_capacity: int = MG_CAPACITY):
+        self.sketch = sketch
+        self.total = 0
+        self.models: Dict[str, int] = {}
+        self.homeworks: Dict[str, int] = {}
+        self.timeline: Dict[str, int] = {}
+        self.matrix: Dict[str, Dict[str, int]] = {}
+        self.authors: Dict[str, int] = {}
+        self.distinct_authors = HyperLogLog(hll_precision) if sketch else None
+        self.top_authors = MisraGries(mg_capacity) if sketch else None
+
+    def add(self, post: Dict[str, Any]):
+        model, homework, author = post['model'], post['homework'], post['author']
+        self.total += 1
+        self.models[model] = self.models.get(model, 0) + 1
+        self.homeworks[homework] = self.homeworks.get(homework, 0) + 1
+        row = self.matrix.get(model)
+        if row is None:
+            row = self.matrix[model] = {}
+        row[homework] = row.get(homework, 0) + 1
+        created = post['created_at']
+        if created:
+            date = created[:10]
+            self.timeline[date] = self.timeline.get(date, 0) + 1
+        if self.sketch:
+            self.distinct_authors.add(author)
+            self.top_authors.add(author)
+        else:
+            self.authors[author] = self.authors.get(author, 0) + 1
+
+    def update(self, posts: Iterable[Dict[str, Any]]) -> 'StatsAggregator':
+        for post in posts:
+            self.add(post)
+        return self
+
+    def merge(self, other: 'StatsAggregator') -> 'StatsAggregator':
+        """Add another aggregate (of posts after this one's, for identical ordering)"""
+        if other.sketch != self.sketch:
+            raise ValueError("cannot merge exact and sketched statistics")
+        self.total += other.total
+        for mine, theirs in ((self.models, other.models), (self.homeworks, other.homeworks),
+                             (self.timeline, other.timeline), (self.authors, other.authors)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        for model, hws in other.matrix.items():
+            row = self.matrix.setdefault(model, {})
+            for hw, count in hws.items():
+                row[hw] = row.get(hw, 0) + count
+        if self.sketch:
+            self.distinct_authors.merge(other.distinct_authors)
+            self.top_authors.merge(other.top_authors)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        """The statistics in AnalyticsProcessor.calculate_statistics' layout"""
+        if self.sketch:
+            total_authors = self.distinct_authors.count()
+            top = self.top_authors.top(TOP_CONTRIBUTORS)
+        else:
+            total_authors = len(self.authors)
+            top = most_common(self.authors, TOP_CONTRIBUTORS)
+        stats = {
+            "total_posts": self.total,
+            "total_authors": total_authors,
+            "models": dict(most_common(self.models)),
+            "homeworks": dict(most_common(self.homeworks)),
+            "timeline": dict(sorted(self.timeline.items())),
+            "top_contributors": [{"author": author, "posts": count} for author, count in top],
+            "model_homework_matrix": {model: dict(hws) for model, hws in self.matrix.items()},
+        }
+        if self.sketch:
+            stats["approximate"] = ["total_authors", "top_contributors"]
+        return stats
+
+
+def aggregate_posts(posts: Iterable[Dict[str, Any]], sketch: bool = False) -> StatsAggregator:
+    return StatsAggregator(sketch=sketch).update(posts)
@@ -0,0 +1,289 @@
+"""
+CS182 Blue Team - Columnar post store
+A compact, memory-mappable on-disk form of the posts dataset: interned
+integer codes for categorical fields, int64 timestamps, and one contiguous
+UTF-8 text buffer with offsets. Counting and grouping become array operations.
+"""
+
+import os
+import json
+import shutil
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+import numpy as np
+
+FORMAT_VERSION = 1
+
+CATEGORICAL_FIELDS = ("model", "homework", "author")
+INTEGER_FIELDS = ("id", "likes", "comments")
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+# Timestamps: microseconds since the epoch plus the original UTC offset in minutes
+MISSING_TS = np.iinfo(np.int64).min
+NAIVE_TZ = np.iinfo(np.int16).min
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+US_PER_DAY = 86400 * 1000000
+
+
+def encode_timestamp(value: str) -> Optional[Tuple[int, int]]:
+    """(epoch microseconds, offset minutes) for an ISO timestamp, or None if it won't round-trip"""
+    if not value:
+        return MISSING_TS, 0
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        us = (dt.replace(tzinfo=timezone.utc) - EPOCH) // timedelta(microseconds=1)
+        encoded = (us, NAIVE_TZ)
+    else:
+        offset = dt.utcoffset()
+        if offset % timedelta(minutes=1):
+            return None
+        us = (dt - EPOCH) // timedelta(microseconds=1)
+        encoded = (us, offset // timedelta(minutes=1))
+    return encoded if decode_timestamp(*encoded) == value else None
+
+
+def decode_timestamp(us: int, tz_minutes: int) -> str:
+    if us == MISSING_TS:
+        return ""
+    dt = EPOCH + timedelta(microseconds=int(us))
+    if tz_minutes == NAIVE_TZ:
+        return dt.replace(tzinfo=None).isoformat()
+    return dt.astimezone(timezone(timedelta(minutes=int(tz_minutes)))).isoformat()
+
+
+def write_store(posts: Iterable[Dict[str, Any]], path: str) -> str:
+    """
+    Write posts to a columnar store directory in one pass.
+
+    Category codes are assigned in order of first appearance, so code order is
+    also first-appearance order (which keeps Counter.most_common tie order).
+    The rare integer or timestamp value that would not round-trip exactly is
+    kept verbatim in meta.json, so reading a record back is lossless.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    field_order: List[str] = []
+    categories: Dict[str, Dict[str, int]] = {f: {} for f in CATEGORICAL_FIELDS}
+    codes = {f: array('i') for f in CATEGORICAL_FIELDS}
+    integers = {f: array('q') for f in INTEGER_FIELDS}
+    stamps = {f: (array('q'), array('h')) for f in TIMESTAMP_FIELDS}
+    # Text is spooled to one temporary file per field, then concatenated
+    text_files: Dict[str, Any] = {}
+    text_lengths: Dict[str, array] = {}
+    exceptions: Dict[str, Dict[str, Any]] = {f: {} for f in INTEGER_FIELDS + TIMESTAMP_FIELDS}
+    count = 0
+
+    for post in posts:
+        for key in post:
+            if key not in field_order:
+                field_order.append(key)
+                if key not in CATEGORICAL_FIELDS + INTEGER_FIELDS + TIMESTAMP_FIELDS:
+                    text_files[key] = open(os.path.join(path, f"{key}.text.tmp"), 'wb')
+                    text_lengths[key] = array('q', [0]) * count
+
+        for f in CATEGORICAL_FIELDS:
+            value = post.get(f, "")
+            codes[f].append(categories[f].setdefault(value, len(categories[f])))
+
+        for f in INTEGER_FIELDS:
+            value = post.get(f, 0)
+            if isinstance(value, int) and not isinstance(value, bool):
+                integers[f].append(value)
+            else:
+                integers[f].append(0)
+                exceptions[f][str(count)] = value
+
+        for f in TIMESTAMP_FIELDS:
+            value = post.get(f, "")
+            encoded = encode_timestamp(value) if isinstance(value, str) else None
+            if encoded is None:
+                exceptions[f][str(count)] = value
+                encoded = (MISSING_TS, 0)
+            stamps[f][0].append(encoded[0])
+            stamps[f][1].append(encoded[1])
+
+        for f, spool in text_files.items():
+            value = post.get(f, "")
+            raw = ("" if value is None else str(value)).encode('utf-8')
+            spool.write(raw)
+            text_lengths[f].append(len(raw))
+        count += 1
+
+    for f in CATEGORICAL_FIELDS:
+        np.save(os.path.join(path, f"{f}.codes.npy"), np.frombuffer(codes[f], dtype=np.int32))
+    for f in INTEGER_FIELDS:
+        np.save(os.path.join(path, f"{f}.npy"), np.frombuffer(integers[f], dtype=np.int64))
+    for f in TIMESTAMP_FIELDS:
+        np.save(os.path.join(path, f"{f}.ts.npy"), np.frombuffer(stamps[f][0], dtype=np.int64))
+        np.save(os.path.join(path, f"{f}.tz.npy"), np.frombuffer(stamps[f][1], dtype=np.int16))
+
+    # One contiguous buffer, field-major, with per-field offsets
+    position = 0
+    with open(os.path.join(path, "text.bin"), 'wb') as buf:
+        for f, spool in text_files.items():
+            spool.close()
+            with open(spool.name, 'rb') as src:
+                shutil.copyfileobj(src, buf)
+            os.remove(spool.name)
+            offsets = np.empty(count + 1, dtype=np.int64)
+            offsets[0] = position
+            np.cumsum(np.frombuffer(text_lengths[f], dtype=np.int64), out=offsets[1:])
+            offsets[1:] += position
+            position = int(offsets[-1])
+            np.save(os.path.join(path, f"{f}.offsets.npy"), offsets)
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "count": count,
+        "fields": field_order,
+        "categories": {f: list(categories[f]) for f in CATEGORICAL_FIELDS},
+        "text_fields": list(text_files),
+        "exceptions": {f: rows for f, rows in exceptions.items() if rows},
+    }
+    with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return path
+
+
+class ColumnarPostStore:
+    """Read-only, memory-mapped view of a store written by write_store()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported columnar store version {self.meta.get('version')}")
+        self.count = self.meta["count"]
+        self.fields = self.meta["fields"]
+        self._exceptions = {f: {int(i): v for i, v in rows.items()} for f, rows in self.meta["exceptions"].items()}
+        self._categories = self.meta["categories"]
+        self._codes = {f: self._load(f"{f}.codes.npy") for f in CATEGORICAL_FIELDS}
+        self._ints = {f: self._load(f"{f}.npy") for f in INTEGER_FIELDS}
+        self._stamps = {f: (self._load(f"{f}.ts.npy"), self._load(f"{f}.tz.npy")) for f in TIMESTAMP_FIELDS}
+        self._offsets = {f: self._load(f"{f}.offsets.npy") for f in self.meta["text_fields"]}
+        text_path = os.path.join(path, "text.bin")
+        self._text = np.memmap(text_path, dtype=np.uint8, mode='r') if os.path.getsize(text_path) else np.zeros(0, np.uint8)
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, name), mmap_mode='r')
+
+    @classmethod
+    def open(cls, path: str) -> "ColumnarPostStore":
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    # -- column access -------------------------------------------------
+
+    def codes(self, field: str) -> np.ndarray:
+        return self._codes[field]
+
+    def categories(self, field: str) -> List[str]:
+        return self._categories[field]
+
+    def text(self, field: str, i: int) -> str:
+        offsets = self._offsets[field]
+        return bytes(self._text[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def value(self, field: str, i: int) -> Any:
+        if field in self._exceptions and i in self._exceptions[field]:
+            return self._exceptions[field][i]
+        if field in self._codes:
+            return self._categories[field][self._codes[field][i]]
+        if field in self._ints:
+            return int(self._ints[field][i])
+        if field in self._stamps:
+            ts, tz = self._stamps[field]
+            return decode_timestamp(ts[i], tz[i])
+        return self.text(field, i)
+
+    def record(self, i: int) -> Dict[str, Any]:
+        return {f: self.value(f, i) for f in self.fields}
+
+    def records(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.record(int(i)) for i in indices]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.count):
+            yield self.record(i)
+
+    # -- array operations ----------------------------------------------
+
+    def value_counts(self, field: str) -> Dict[str, int]:
+        """Counts per category, most common first (ties in first-appearance order)"""
+        counts = np.bincount(self._codes[field], minlength=len(self._categories[field]))
+        order = np.lexsort((np.arange(len(counts)), -counts))
+        return {self._categories[field][c]: int(counts[c]) for c in order if counts[c]}
+
+    def date_labels(self, field: str, missing: Optional[str] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Per-row date of a timestamp field as (labels, row -> label index).
+
+        The date is the one written in the original string (value[:10]), i.e.
+        in the post's own UTC offset. Rows without a value map to `missing`
+        (or to -1 when `missing` is None).
+        """
+        ts, tz = self._stamps[field]
+        ts = np.asarray(ts)
+        present = ts != MISSING_TS
+        local = ts + np.where(np.asarray(tz) == NAIVE_TZ, 0, np.asarray(tz)).astype(np.int64) * 60 * 1000000
+        days = np.where(present, np.floor_divide(local, US_PER_DAY), 0)
+        unique_days, inverse = np.unique(days[present], return_inverse=True)
+        labels = [str(np.datetime64(int(d), 'D')) for d in unique_days]
+        index = np.full(self.count, -1, dtype=np.int64)
+        index[present] = inverse
+
+        # Values kept verbatim are bucketed by their own first ten characters
+        for i, value in self._exceptions.get(field, {}).items():
+            label = value[:10] if isinstance(value, str) and value else None
+            if label is None:
+                index[i] = -1
+                continue
+            if label not in labels:
+                labels.append(label)
+            index[i] = labels.index(label)
+
+        if missing is not None and (index == -1).any():
+            labels.append(missing)
+            index[index == -1] = len(labels) - 1
+        return labels, index
+
+    def group_indices(self, outer: str, inner: str) -> "OrderedDict[str, OrderedDict[str, np.ndarray]]":
+        """
+        Row indices grouped by two categorical fields.
+
+        Outer keys are in first-appearance order, inner keys in first-appearance
+        order within each outer key - the order of nested defaultdict(list)
+        grouping in a single pass over the posts.
+        """
+        outer_codes = np.asarray(self._codes[outer], dtype=np.int64)
+        inner_codes = np.asarray(self._codes[inner], dtype=np.int64)
+        pair = outer_codes * len(self._categories[inner]) + inner_codes
+        order = np.argsort(pair, kind='stable')
+        pairs, starts = np.unique(pair[order], return_index=True)
+        bounds = list(starts) + [len(order)]
+        first_row = order[starts]
+
+        groups: "OrderedDict[str, OrderedDict[str, np.ndarray]]" = OrderedDict()
+        for j in np.lexsort((first_row, pairs // len(self._categories[inner]))):
+            o, n = divmod(int(pairs[j]), len(self._categories[inner]))
+            groups.setdefault(self._categories[outer][o], OrderedDict())[self._categories[inner][n]] = \
+                order[bounds[j]:bounds[j + 1]]
+        return groups
+
+
+def store_path_for(json_path: str) -> str:
+    """
+    Conventional store location next to a JSON/JSONL dataset: x.json ->
+    x.cols, x.jsonl -> x.jsonl.cols (a streamed dataset and the JSON one of the
+    same name are different datasets)
+    """
+    root, ext = os.path.splitext(json_path)
+    return root + ".cols" if ext == ".json" else json_path + ".cols"
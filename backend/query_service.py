@@ -0,0 +1,411 @@
+"""
+CS182 Blue Team - Local query service
+A small asyncio HTTP server over the files the pipeline already writes: the
+posts and both analytics outputs are loaded once and indexed in memory by
+model, homework, author, date and word, so filtered, sorted and paginated
+post queries and HW x Model drill-downs are answered from sorted row arrays
+instead of a scan. Responses are JSON, gzip-compressed when the client
+accepts it, and carry an ETag (If-None-Match gets a 304). Runs offline with
+the standard library and NumPy only.
+
+Endpoints (GET):
+    /api/posts?model=&homework=&author=&since=&until=&q=&sort=&page=&per_page=
+    /api/facets?<same filters>        post counts per model / homework / author
+    /api/analysis/<homework>/<model>  HW x Model analysis and its post count
+    /api/statistics                   analytics statistics, heatmap, timeline
+    /api/related/<post id>?k=         most similar posts (needs related_posts.py's index)
+    /api/related?q=&k=                posts most similar to free text
+    /api/health
+"""
+
+import os
+import re
+import json
+import gzip
+import asyncio
+import hashlib
+import argparse
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+
+from post_io import load_posts
+from post_store import ColumnarPostStore
+from related_posts import INDEX_PATH, TOP_K, RelatedIndex
+
+INDEXED_FIELDS = ('model', 'homework', 'author')
+SORTS = ('recent', 'oldest', 'popular', 'author')
+# Post fields never sent (the app does not read them)
+HIDDEN_FIELDS = ('content_raw',)
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 200
+MAX_RELATED = 50
+FACET_LIMIT = 50
+# Rendered responses kept for repeated queries
+RESPONSE_CACHE_SIZE = 512
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+
+WORD_PATTERN = re.compile(r'\w+')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class QueryError(Exception):
+    """A request the service cannot answer, with its HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def timestamp(value: Optional[str]) -> float:
+    """Seconds since the epoch of an ISO timestamp, -inf when missing or unparsable"""
+    try:
+        return datetime.fromisoformat(value).timestamp() if value else float('-inf')
+    except ValueError:
+        return float('-inf')
+
+
+def postings(codes: np.ndarray, categories: List[str]) -> Dict[str, np.ndarray]:
+    """category -> ascending rows holding it"""
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+    return {name: order[bounds[c]:bounds[c + 1]] for c, name in enumerate(categories)}
+
+
+def rank_of(order: np.ndarray) -> np.ndarray:
+    """Position of every row in a sort order"""
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+class QueryIndex:
+    """
+    In-memory indexes over a posts list (plus the analytics outputs).
+
+    Categorical fields and words map to ascending row arrays, dates are one
+    sorted array searched by range, and each sort order is precomputed as a
+    per-row rank, so a query intersects a few arrays and sorts only the rows
+    it matched.
+    """
+
+    def __init__(self, posts: List[Dict[str, Any]], analytics: Optional[Dict[str, Any]] = None,
+                 advanced: Optional[Dict[str, Any]] = None, related: Optional[RelatedIndex] = None):
+        self.posts = [{k: v for k, v in p.items() if k not in HIDDEN_FIELDS} for p in posts]
+        self.analytics = analytics or {}
+        self.advanced = advanced or {}
+        self.related_index = related
+        n = len(self.posts)
+        self.all_rows = np.arange(n, dtype=np.int64)
+        self.row_of_id = {str(p.get('id')): i for i, p in enumerate(self.posts)}
+
+        # Per field: category names (first-appearance order), row -> category code,
+        # and category -> ascending rows
+        self.categories: Dict[str, List[str]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.by: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in INDEXED_FIELDS:
+            ids: Dict[str, int] = {}
+            codes = [ids.setdefault(str(p.get(field) or 'Unknown'), len(ids)) for p in self.posts]
+            self.categories[field] = list(ids)
+            self.codes[field] = np.array(codes, dtype=np.int64)
+            self.by[field] = postings(self.codes[field], self.categories[field])
+
+        # Dates as written in the post (its own UTC offset), like the timeline
+        dates = np.array([(p.get('created_at') or '')[:10] for p in self.posts], dtype='<U10')
+        self.date_order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.date_order]
+
+        words: Dict[str, set] = {}
+        for i, p in enumerate(self.posts):
+            text = ' '.join([p.get('title') or '', TAG_PATTERN.sub(' ', p.get('content') or ''),
+                             p.get('author') or '', p.get('model') or '', p.get('homework') or ''])
+            for word in set(WORD_PATTERN.findall(text.lower())):
+                words.setdefault(word, set()).add(i)
+        self.words = {word: np.array(sorted(rows), dtype=np.int64) for word, rows in words.items()}
+
+        # Ties keep dataset order
+        stamps = np.array([timestamp(p.get('created_at')) for p in self.posts])
+        popularity = np.array([(p.get('likes') or 0) + (p.get('comments') or 0) for p in self.posts])
+        authors = np.array([p.get('author') or '' for p in self.posts])
+        self.ranks = {
+            'recent': rank_of(np.lexsort((self.all_rows, -stamps))),
+            'oldest': rank_of(np.lexsort((self.all_rows, stamps))),
+            'popular': rank_of(np.lexsort((self.all_rows, -popularity))),
+            'author': rank_of(np.lexsort((self.all_rows, np.char.lower(authors)))) if n else self.all_rows,
+        }
+
+    def filter(self, params: Dict[str, List[str]]) -> np.ndarray:
+        """Ascending rows matching every filter; repeated values of one field are alternatives"""
+        selections = []
+        for field in INDEXED_FIELDS:
+            if field in params:
+                found = [self.by[field].get(value) for value in params[field]]
+                found = [rows for rows in found if rows is not None]
+                selections.append(np.unique(np.concatenate(found)) if found else self.all_rows[:0])
+
+        since, until = params.get('since', [''])[0], params.get('until', [''])[0]
+        if since or until:
+            lo = np.searchsorted(self.sorted_dates, since, side='left') if since else 0
+            hi = np.searchsorted(self.sorted_dates, until, side='right') if until else len(self.sorted_dates)
+            # Posts without a date sort first ('') and never match a range
+            lo = max(lo, np.searchsorted(self.sorted_dates, '', side='right'))
+            selections.append(np.sort(self.date_order[lo:hi]))
+
+        for word in WORD_PATTERN.findall(' '.join(params.get('q', [])).lower()):
+            selections.append(self.words.get(word, self.all_rows[:0]))
+
+        if not selections:
+            return self.all_rows
+        selections.sort(key=len)
+        rows = selections[0]
+        for other in selections[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def query_posts(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        sort = params.get('sort', ['recent'])[0]
+        if sort not in SORTS:
+            raise QueryError(400, f"sort must be one of {', '.join(SORTS)}")
+        page = int_param(params, 'page', 1, 1)
+        per_page = min(int_param(params, 'per_page', DEFAULT_PER_PAGE, 1), MAX_PER_PAGE)
+
+        rows = self.filter(params)
+        start = (page - 1) * per_page
+        rank = self.ranks[sort][rows]
+        if start + per_page < len(rows):
+            # Only the requested page needs ordering
+            top = np.argpartition(rank, start + per_page - 1)[:start + per_page]
+            ordered = rows[top[np.argsort(rank[top])]]
+        else:
+            ordered = rows[np.argsort(rank)]
+        return {
+            'total': int(len(rows)),
+            'page': page,
+            'per_page': per_page,
+            'posts': [self.posts[i] for i in ordered[start:start + per_page]],
+        }
+
+    def facets(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        rows = self.filter(params)
+        facets = {}
+        for field in INDEXED_FIELDS:
+            counts = np.bincount(self.codes[field][rows], minlength=len(self.categories[field]))
+            # Most common first, ties in first-appearance order
+            top = np.lexsort((np.arange(len(counts)), -counts))[:FACET_LIMIT]
+            facets[field] = {self.categories[field][c]: int(counts[c]) for c in top if counts[c]}
+        return {'total': int(len(rows)), 'facets': facets}
+
+    def analysis(self, hw: str, model: str) -> Dict[str, Any]:
+        result = self.advanced.get('hw_model_analysis', {}).get(hw, {}).get(model)
+        if result is None:
+            raise QueryError(404, f"no analysis for {hw} x {model}")
+        posts = self.filter({'homework': [hw], 'model': [model]})
+        return {'homework': hw, 'model': model, 'posts': int(len(posts)), 'analysis': result}
+
+    def related(self, post_id: Optional[str], params: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Posts most similar to an indexed post, or to the text in q, best first"""
+        if self.related_index is None:
+            raise QueryError(404, "no related posts index; run related_posts.py")
+        k = min(int_param(params, 'k', TOP_K, 1), MAX_RELATED)
+        if post_id is not None:
+            if post_id not in self.related_index.row_of:
+                raise QueryError(404, f"post {post_id} is not in the related posts index")
+            found = self.related_index.related(post_id, k)
+        else:
+            text = ' '.join(params.get('q', []))
+            if not text.strip():
+                raise QueryError(400, "q or a post id is required")
+            found = self.related_index.query(text, k)
+        return {
+            'id': post_id,
+            'related': [{'score': round(score, 3), 'post': self.posts[self.row_of_id[pid]]}
+                        for pid, score in found if pid in self.row_of_id],
+        }
+
+    def statistics(self) -> Dict[str, Any]:
+        return {
+            'statistics': self.analytics.get('statistics', {}),
+            'insights': self.analytics.get('insights', {}),
+            'heatmap': self.advanced.get('heatmap', {}),
+            'timeline': self.advanced.get('timeline', {}),
+            'advanced_statistics': self.advanced.get('statistics', {}),
+        }
+
+
+def int_param(params: Dict[str, List[str]], name: str, default: int, minimum: int) -> int:
+    try:
+        value = int(params.get(name, [default])[0])
+    except ValueError:
+        raise QueryError(400, f"{name} must be an integer")
+    if value < minimum:
+        raise QueryError(400, f"{name} must be at least {minimum}")
+    return value
+
+
+class QueryService:
+    """
+    HTTP/1.1 front end for a QueryIndex on asyncio streams (GET and HEAD,
+    keep-alive). Rendered bodies, their gzip form and ETag are cached per
+    request target, since the data never changes while the server runs.
+    """
+
+    def __init__(self, index: QueryIndex):
+        self.index = index
+        self.cache: "OrderedDict[str, Tuple[int, bytes, str]]" = OrderedDict()
+        self.gzipped: Dict[str, bytes] = {}
+
+    def route(self, target: str) -> Any:
+        url = urlsplit(target)
+        params = {k: v for k, v in parse_qs(url.query).items()}
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if parts[:1] != ['api'] or len(parts) < 2:
+            raise QueryError(404, f"unknown path {url.path}")
+        endpoint = parts[1]
+        if endpoint == 'posts' and len(parts) == 2:
+            return self.index.query_posts(params)
+        if endpoint == 'facets' and len(parts) == 2:
+            return self.index.facets(params)
+        if endpoint == 'analysis' and len(parts) == 4:
+            return self.index.analysis(parts[2], parts[3])
+        if endpoint == 'related' and len(parts) in (2, 3):
+            return self.index.related(parts[2] if len(parts) == 3 else None, params)
+        if endpoint == 'statistics' and len(parts) == 2:
+            return self.index.statistics()
+        if endpoint == 'health' and len(parts) == 2:
+            return {'status': 'ok', 'posts': len(self.index.posts)}
+        raise QueryError(404, f"unknown path {url.path}")
+
+    def render(self, target: str) -> Tuple[int, bytes, str]:
+        """(status, JSON body, ETag) for a request target"""
+        cached = self.cache.get(target)
+        if cached is not None:
+            self.cache.move_to_end(target)
+            return cached
+        try:
+            status, value = 200, self.route(target)
+        except QueryError as e:
+            status, value = e.status, {'error': str(e)}
+        body = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        rendered = (status, body, '"' + hashlib.sha1(body).hexdigest() + '"')
+        self.cache[target] = rendered
+        if len(self.cache) > RESPONSE_CACHE_SIZE:
+            evicted, _ = self.cache.popitem(last=False)
+            self.gzipped.pop(evicted, None)
+        return rendered
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> bytes:
+        """Complete HTTP response bytes for one request"""
+        extra = {}
+        if method not in ('GET', 'HEAD'):
+            status, body, etag = 405, b'{"error":"only GET and HEAD are supported"}', ''
+            extra['Allow'] = 'GET, HEAD'
+        else:
+            status, body, etag = self.render(target)
+        compress = len(body) >= GZIP_MIN_BYTES and 'gzip' in headers.get('accept-encoding', '')
+        if etag:
+            # The gzip body is a different representation, so it gets its own tag
+            etag = etag[:-1] + '-gz"' if compress else etag
+            extra['ETag'] = etag
+            if status == 200 and etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+                status, body = 304, b''
+        if status != 304 and compress:
+            if target not in self.gzipped:
+                self.gzipped[target] = gzip.compress(body, 6, mtime=0)
+            body = self.gzipped[target]
+            extra['Content-Encoding'] = 'gzip'
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                 'Content-Type: application/json; charset=utf-8',
+                 f"Content-Length: {len(body)}",
+                 'Vary: Accept-Encoding',
+                 'Access-Control-Allow-Origin: *']
+        lines += [f"{k}: {v}" for k, v in extra.items()]
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return head if method == 'HEAD' or status == 304 else head + body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    writer.write(self.respond('BAD', '/', {}))
+                    break
+                writer.write(self.respond(method, target, headers))
+                await writer.drain()
+                connection = headers.get('connection', '').lower()
+                if connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive'):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving {len(self.index.posts)} posts on http://{host}:{port}/api/ (Ctrl+C to stop)")
+        async with server:
+            await server.serve_forever()
+
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        print(f"Note: {path} not found")
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve indexed post / analytics queries over HTTP (offline)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8182)
+    parser.add_argument('--posts', help="posts JSON / JSONL or .cols store (default: the merged dataset)")
+    parser.add_argument('--analytics', default="data/analytics.json")
+    parser.add_argument('--advanced', default="data/advanced_analytics.json")
+    parser.add_argument('--related', default=INDEX_PATH, help="index saved by related_posts.py")
+    args = parser.parse_args()
+
+    input_path = args.posts
+    if input_path is None:
+        # Same fallbacks as the analytics scripts
+        for candidate in ("data/special_participation_a_merged.json", "data/special_participation_a.json",
+                          "data/special_participation_a.jsonl"):
+            if os.path.exists(candidate):
+                input_path = candidate
+                break
+        else:
+            print("Error: No data file found!")
+            return
+    posts = list(ColumnarPostStore.open(input_path)) if os.path.isdir(input_path) else load_posts(input_path)
+
+    related = RelatedIndex.load(args.related)
+    if related is None:
+        print(f"Note: no usable related posts index at {args.related}")
+    index = QueryIndex(posts, load_json(args.analytics), load_json(args.advanced), related)
+    try:
+        asyncio.run(QueryService(index).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+CS182 Blue Team - Related posts index
+Finds the posts most similar to each post without a network or model
+download. Every post becomes a TF-IDF vector over hashed words (the hashing
+trick: a word's CRC-32 picks its bucket and sign, so there is no vocabulary
+to store), which a very sparse random projection reduces to DIM dense
+dimensions; cosine similarity of the unit-length projections approximates
+that of the TF-IDF vectors.
+
+Neighbours come from an inverted-file index: spherical k-means splits the
+vectors into lists of about LIST_SIZE posts, and a post is only compared
+with the members of the PROBES lists whose centroids are closest to it.
+Those comparisons are exact and done one list at a time as a matrix
+product. The top-k neighbours of every post are written to a compact JSON
+artifact, and the index is saved so ad-hoc text queries can be answered
+without rebuilding it.
+"""
+
+import os
+import re
+import json
+import zlib
+import argparse
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from text_normalize import NORMALIZER_VERSION, normalize_html
+
+INDEX_PATH = "data/.cache/related_index.npz"
+RELATED_PATH = "data/related_posts.json"
+
+# Bump when the vectors or neighbours computed for the same posts change
+RELATED_VERSION = 1
+
+HASH_BITS = 18               # 2^18 word buckets
+HASH_DIM = 1 << HASH_BITS
+DIM = 256                    # dimensions after random projection
+PROJECTION_NNZ = 4           # projected dimensions each bucket adds to
+LIST_SIZE = 256              # posts per inverted list, on average
+PROBES = 8                   # lists searched per post
+QUERY_PROBES = 16            # lists searched per ad-hoc query
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 64           # training posts per list (k-means runs on a sample)
+TOP_K = 10
+TITLE_WEIGHT = 2             # title words count this many times
+BLOCK = 8192                 # posts projected / assigned in one array operation
+
+# Bucket -> the projected dimensions it adds to and their signs (Achlioptas /
+# Li very sparse projection, scaled so projected norms match on average)
+_rng = np.random.RandomState(182)
+PROJECTION_DIMS = _rng.randint(0, DIM, size=(HASH_DIM, PROJECTION_NNZ)).astype(np.int64)
+PROJECTION_SIGNS = (_rng.randint(0, 2, size=(HASH_DIM, PROJECTION_NNZ)) * 2 - 1).astype(np.float32) \
+    / np.float32(np.sqrt(PROJECTION_NNZ))
+
+WORD_PATTERN = re.compile(r'[a-z]{3,}')
+
+STOP_WORDS = frozenset({
+    'the', 'and', 'but', 'for', 'with', 'from', 'was', 'are', 'were', 'been', 'have', 'has', 'had',
+    'does', 'did', 'will', 'would', 'should', 'could', 'may', 'might', 'can', 'this', 'that', 'these',
+    'those', 'you', 'she', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how', 'all', 'each',
+    'every', 'both', 'few', 'more', 'most', 'other', 'some', 'such', 'not', 'only', 'own', 'same', 'than',
+    'too', 'very', 'just', 'also', 'its', 'into', 'then', 'there', 'their', 'them', 'our', 'your', 'any',
+    'about', 'out', 'over', 'after', 'before', 'while', 'because', 'here', 'his', 'her', 'him', 'one',
+})
+
+
+class WordBuckets(dict):
+    """word -> signed hashed feature (bucket + 1, negated for a negative sign), computed on first lookup"""
+
+    def __missing__(self, word: str) -> int:
+        h = zlib.crc32(word.encode('utf-8'))
+        value = self[word] = ((h & (HASH_DIM - 1)) + 1) * (1 if h >> 31 else -1)
+        return value
+
+
+_word_buckets = WordBuckets()
+
+
+def post_text(post: Dict[str, Any]) -> str:
+    title = post.get('title') or ''
+    return ' '.join([title] * TITLE_WEIGHT + [normalize_html(post.get('content') or '')])
+
+
+def hashed_counts(text: str) -> Tuple[List[int], List[int]]:
+    """(signed features, counts) of the text's words, in first-appearance order"""
+    words = [w for w in WORD_PATTERN.findall(text.lower()) if w not in STOP_WORDS]
+    counts = Counter(map(_word_buckets.__getitem__, words))
+    return list(counts), list(counts.values())
+
+
+class HashedCorpus:
+    """
+    Hashed term counts of a corpus in CSR layout (a feature can repeat in a
+    row when two words share a bucket), with the smoothed idf
+    log((1 + N) / (1 + df)) + 1 of every bucket.
+    """
+
+    def __init__(self, texts: Iterable[str]):
+        features, counts, sizes = array('q'), array('q'), array('q')
+        for text in texts:
+            f, c = hashed_counts(text)
+            features.extend(f)
+            counts.extend(c)
+            sizes.append(len(f))
+        signed = np.frombuffer(features, dtype=np.int64)
+        self.buckets = np.abs(signed) - 1
+        self.weights = np.sign(signed) * (1 + np.log(np.frombuffer(counts, dtype=np.int64)))
+        self.sizes = np.frombuffer(sizes, dtype=np.int64)
+        self.indptr = np.concatenate(([0], np.cumsum(self.sizes)))
+        self.n_docs = len(self.sizes)
+        rows = np.repeat(np.arange(self.n_docs, dtype=np.int64), self.sizes)
+        df = np.bincount(np.unique(rows * HASH_DIM + self.buckets) % HASH_DIM, minlength=HASH_DIM)
+        self.idf = (np.log((1 + self.n_docs) / (1 + df)) + 1).astype(np.float32)
+
+
+def project(buckets: np.ndarray, weights: np.ndarray, sizes: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    """Unit-length DIM-dimensional projections of hashed TF-IDF rows (all-zero for empty rows)"""
+    n = len(sizes)
+    rows = np.repeat(np.arange(n, dtype=np.int64), sizes)
+    values = (weights * idf[buckets])[:, None] * PROJECTION_SIGNS[buckets]
+    cells = (rows[:, None] * DIM + PROJECTION_DIMS[buckets]).ravel()
+    vectors = np.bincount(cells, weights=values.ravel(), minlength=n * DIM).reshape(n, DIM).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def nearest_lists(vectors: np.ndarray, centroids: np.ndarray, probes: int) -> np.ndarray:
+    """(rows x probes) lists whose centroids are most similar to each row, most similar first"""
+    probes = min(probes, len(centroids))
+    nearest = np.empty((len(vectors), probes), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK):
+        similarity = vectors[start:start + BLOCK] @ centroids.T
+        top = np.argpartition(-similarity, probes - 1, axis=1)[:, :probes] if probes < len(centroids) else \
+            np.broadcast_to(np.arange(probes), similarity.shape).copy()
+        order = np.lexsort((top, -np.take_along_axis(similarity, top, axis=1)), axis=1)
+        nearest[start:start + BLOCK] = np.take_along_axis(top, order, axis=1)
+    return nearest
+
+
+def train_centroids(vectors: np.ndarray, lists: int) -> np.ndarray:
+    """
+    Spherical k-means centroids of a deterministic sample of the (non-zero)
+    vectors, seeded with evenly spaced sample rows; a list left empty keeps
+    its previous centroid.
+    """
+    sample = vectors[np.random.RandomState(182).permutation(len(vectors))[:lists * KMEANS_SAMPLE]]
+    centroids = sample[np.linspace(0, len(sample) - 1, lists).astype(np.int64)].copy()
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        assigned = nearest_lists(sample, centroids, 1)[:, 0]
+        if labels is not None and np.array_equal(assigned, labels):
+            break
+        labels = assigned
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+
+def top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Each line's k best (row, score) by score, ties by row; -1 / -inf entries are padding"""
+    if rows.shape[1] > k:
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        rows, scores = np.take_along_axis(rows, keep, axis=1), np.take_along_axis(scores, keep, axis=1)
+    order = np.lexsort((rows, -scores), axis=1)
+    return np.take_along_axis(rows, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+class RelatedIndex:
+    """
+    Projected post vectors (`ids` gives each row's post id), the inverted
+    lists' centroids and each post's list. Posts without words have an
+    all-zero vector, belong to no list and have no neighbours.
+    """
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, idf: np.ndarray,
+                 centroids: Optional[np.ndarray] = None, labels: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.row_of = {post_id: i for i, post_id in enumerate(ids)}
+        self.vectors = vectors
+        self.idf = idf
+        valid = np.flatnonzero(np.any(vectors != 0, axis=1))
+        if centroids is None:
+            lists = max(1, min(len(valid), round(len(valid) / LIST_SIZE)))
+            centroids = train_centroids(vectors[valid], lists) if len(valid) else np.zeros((0, DIM), np.float32)
+        if labels is None:
+            labels = np.full(len(ids), -1, dtype=np.int64)
+            if len(valid):
+                labels[valid] = nearest_lists(vectors[valid], centroids, 1)[:, 0]
+        self.centroids = centroids
+        self.labels = labels
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        self.members = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+
+    @classmethod
+    def build(cls, posts: List[Dict[str, Any]]) -> 'RelatedIndex':
+        corpus = HashedCorpus(post_text(post) for post in posts)
+        vectors = np.zeros((corpus.n_docs, DIM), dtype=np.float32)
+        for start in range(0, corpus.n_docs, BLOCK):
+            stop = min(start + BLOCK, corpus.n_docs)
+            lo, hi = corpus.indptr[start], corpus.indptr[stop]
+            vectors[start:stop] = project(corpus.buckets[lo:hi], corpus.weights[lo:hi],
+                                          corpus.sizes[start:stop], corpus.idf)
+        return cls([str(post.get('id', i)) for i, post in enumerate(posts)], vectors, corpus.idf)
+
+    # -- persistence ---------------------------------------------------
+
+    @staticmethod
+    def header() -> str:
+        return json.dumps({"version": RELATED_VERSION, "hash_bits": HASH_BITS, "dim": DIM,
+                           "nnz": PROJECTION_NNZ, "normalizer": NORMALIZER_VERSION})
+
+    def save(self, path: str = INDEX_PATH):
+        """Vectors as float16 (half the size; scores move by ~1e-3)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, header=np.array(self.header()), ids=np.array(self.ids, dtype=str),
+                 vectors=self.vectors.astype(np.float16), idf=self.idf, centroids=self.centroids,
+                 labels=self.labels)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> Optional['RelatedIndex']:
+        """The saved index, or None if missing or written with other settings"""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved['header']) != cls.header():
+                    return None
+                return cls(saved['ids'].tolist(), saved['vectors'].astype(np.float32), saved['idf'],
+                           saved['centroids'], saved['labels'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # -- neighbours ------------------------------------------------------
+
+    def all_neighbours(self, k: int = TOP_K, probes: int = PROBES) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (posts x k) neighbour rows (-1 padded) and cosine scores of every
+        indexed post. Every list is scored against all posts probing it in
+        one matrix product, and each post keeps its best k over its lists.
+        """
+        n = len(self.ids)
+        neighbours = np.full((n, k), -1, dtype=np.int64)
+        scores = np.full((n, k), -np.inf, dtype=np.float32)
+        valid = np.flatnonzero(self.labels >= 0)
+        if not len(valid):
+            return neighbours, np.zeros((n, k), dtype=np.float32)
+        probed = nearest_lists(self.vectors[valid], self.centroids, probes)
+        askers = np.repeat(valid, probed.shape[1])
+        lists = probed.ravel()
+        order = np.argsort(lists, kind='stable')
+        askers, lists = askers[order], lists[order]
+        bounds = np.searchsorted(lists, np.arange(len(self.centroids) + 1))
+
+        for c, members in enumerate(self.members):
+            rows = askers[bounds[c]:bounds[c + 1]]
+            if not len(rows) or not len(members):
+                continue
+            similarity = self.vectors[rows] @ self.vectors[members].T
+            similarity[rows[:, None] == members[None, :]] = -np.inf
+            found, found_scores = top_k(np.broadcast_to(members, similarity.shape), similarity, k)
+            merged = top_k(np.hstack([neighbours[rows], found]), np.hstack([scores[rows], found_scores]), k)
+            neighbours[rows], scores[rows] = merged
+        neighbours[~np.isfinite(scores)] = -1
+        return neighbours, np.where(np.isfinite(scores), scores, 0.0).astype(np.float32)
+
+    def embed(self, text: str) -> np.ndarray:
+        features, counts = hashed_counts(text)
+        signed = np.array(features, dtype=np.int64)
+        weights = np.sign(signed) * (1 + np.log(np.array(counts, dtype=np.float64)))
+        return project(np.abs(signed) - 1, weights, np.array([len(features)]), self.idf)[0]
+
+    def search(self, vector: np.ndarray, k: int, probes: int, exclude: int = -1) -> List[Tuple[str, float]]:
+        if not len(self.centroids) or not vector.any():
+            return []
+        lists = nearest_lists(vector[None, :], self.centroids, probes)[0]
+        candidates = np.concatenate([self.members[c] for c in lists])
+        candidates = candidates[candidates != exclude]
+        if not len(candidates):
+            return []
+        rows, scores = top_k(candidates[None, :], (self.vectors[candidates] @ vector)[None, :], k)
+        return [(self.ids[r], float(s)) for r, s in zip(rows[0], scores[0])]
+
+    def query(self, text: str, k: int = TOP_K, probes: int = QUERY_PROBES) -> List[Tuple[str, float]]:
+        """Posts most similar to free text, as (post id, cosine), best first"""
+        return self.search(self.embed(text), k, probes)
+
+    def related(self, post_id: str, k: int = TOP_K, probes: int = PROBES) -> List[Tuple[str, float]]:
+        """Neighbours of an indexed post, as (post id, cosine), best first"""
+        row = self.row_of.get(str(post_id))
+        if row is None:
+            return []
+        return self.search(self.vectors[row], k, probes, exclude=row)
+
+
+def describe_neighbours(index: RelatedIndex, neighbours: np.ndarray, scores: np.ndarray) -> Dict[str, Any]:
+    """
+    The artifact: post ids once, and per post its neighbours as rows into
+    that list with cosine scores (3 decimals), best first.
+    """
+    return {
+        'version': RELATED_VERSION,
+        'k': int(neighbours.shape[1]),
+        'ids': index.ids,
+        'neighbours': [[int(r) for r in row if r >= 0] for row in neighbours],
+        'scores': [[round(float(s), 3) for r, s in zip(row, row_scores) if r >= 0]
+                   for row, row_scores in zip(neighbours, scores)],
+    }
+
+
+def main():
+    from post_io import load_posts
+
+    parser = argparse.ArgumentParser(description="Precompute related posts (hashed TF-IDF, random projection, IVF)")
+    parser.add_argument('--input', help="posts JSON / JSONL (default: the merged dataset)")
+    parser.add_argument('--k', type=int, default=TOP_K, help="neighbours kept per post")
+    parser.add_argument('--probes', type=int, default=PROBES, help="inverted lists searched per post")
+    parser.add_argument('--query', help="print the posts most similar to this text using the saved index")
+    args = parser.parse_args()
+
+    if args.query:
+        index = RelatedIndex.load(INDEX_PATH)
+        if index is None:
+            print(f"No index at {INDEX_PATH}; run without --query first")
+            return
+        for post_id, score in index.query(args.query, args.k, max(args.probes, QUERY_PROBES)):
+            print(f"{score:.3f}  {post_id}")
+        return
+
+    input_path = args.input
+    if input_path is None:
+        for candidate in ("data/special_participation_a_merged.json", "data/special_participation_a.json",
+                          "data/special_participation_a.jsonl"):
+            if os.path.exists(candidate):
+                input_path = candidate
+                break
+        else:
+            print("Error: No data file found!")
+            return
+
+    posts = load_posts(input_path)
+    index = RelatedIndex.build(posts)
+    neighbours, scores = index.all_neighbours(args.k, args.probes)
+    index.save(INDEX_PATH)
+    with open(RELATED_PATH, 'w', encoding='utf-8') as f:
+        json.dump(describe_neighbours(index, neighbours, scores), f, ensure_ascii=False, separators=(',', ':'))
+    found = int((neighbours >= 0).sum())
+    print(f"{found} neighbours for {len(posts)} posts saved to {RELATED_PATH}; index saved to {INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
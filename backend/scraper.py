@@ -7,13 +7,39 @@ import os
 import json
 import csv
 import re
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set
 import requests
 from dotenv import load_dotenv
+import tracing
+from ed_transport import BASE_URL, EdTransport, parse_timestamp
+from title_classifier import get_classifier
+from post_io import CSV_FIELDS, read_jsonl, stream_to_disk
+from post_store import write_store, store_path_for
 
 load_dotenv()
 
+CURSOR_FILE = "scrape_cursor.json"
+
+# Listing order for incremental crawls: most recently active first (the
+# default, "new", is by creation, so edited old threads sit on late pages)
+ACTIVITY_SORT = "active"
+
+# Filter: Only include "Special Participation A" posts
+SPECIAL_PARTICIPATION_A = re.compile(r'special\s+participation\s+a', re.IGNORECASE)
+
+# Exclude meta-posts about the website/extra credit itself
+EXCLUDE_TITLE = re.compile('|'.join([
+    r'extra\s+credit\s+website',
+    r'blue\s+team.*website',
+    r'red\s+team.*website',
+    r'website.*blue\s+team',
+    r'website.*red\s+team'
+]), re.IGNORECASE)
+
 class EdScraper:
     def __init__(self, course_id: int = 84647):
         self.course_id = course_id
@@ -21,187 +47,211 @@ class EdScraper:
         if not self.api_token:
             raise ValueError("ED_API_TOKEN not found in environment variables")
 
-        self.base_url = "https://us.edstem.org/api"
-        self.headers = {
-            "Authorization": f"Bearer {self.api_token}",
-            "Content-Type": "application/json"
+        self.base_url = BASE_URL
+        self.transport = EdTransport(self.api_token, base_url=self.base_url)
+
+    def get_threads(self, query: str = "", cursor: Optional[Dict[str, Any]] = None,
+                    prefetch: int = 1) -> List[Dict[str, Any]]:
+        """
+        Fetch all threads from the course.
+
+        With a `cursor` (see build_cursor), the listing is requested most
+        recently active first, only threads updated after the high-water mark
+        are returned, and paging stops at the first page whose threads are all
+        at or below it. A failed page request then raises instead of ending
+        the listing early (a partial listing would let the cursor move past
+        threads on the pages never read). `prefetch` pages are requested in parallel.
+        """
+        with tracing.span('fetch_threads', prefetch=prefetch) as span:
+            threads = list(self.iter_threads(query, cursor, prefetch))
+            span.count(len(threads))
+        print(f"Total threads fetched: {len(threads)}")
+        return threads
+
+    def fetch_page(self, offset: int, limit: int = 30, query: str = "",
+                   sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fetch one page of the thread listing (Ed's default order unless `sort` is given)"""
+        url = f"{self.base_url}/courses/{self.course_id}/threads"
+        params = {
+            "limit": limit,
+            "offset": offset,
+            "filter": "all"
         }
 
-    def get_threads(self, query: str = "") -> List[Dict[str, Any]]:
-        """Fetch all threads from the course"""
+        # Only add query / sort if provided
+        if query:
+            params["query"] = query
+        if sort:
+            params["sort"] = sort
+
+        with tracing.span('http_fetch', cat='http', offset=offset) as span:
+            response = self.transport.get(url, "threads.list", params=params)
+            response.raise_for_status()
+            threads = response.json().get('threads', [])
+            span.count(len(threads))
+        return threads
+
+    def iter_threads(self, query: str = "", cursor: Optional[Dict[str, Any]] = None,
+                     prefetch: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Yield threads page by page as they arrive (same paging rules as get_threads).
+
+        With prefetch > 1, a sliding window of that many page requests is kept
+        in flight; pages are still consumed in offset order, and the window is
+        abandoned as soon as a short/empty page ends the listing. Threads that
+        shift across a page boundary while paging are de-duplicated by id.
+        """
         if query:
             print(f"Fetching threads with query: {query}")
+        elif cursor:
+            print(f"Fetching threads updated after {cursor.get('updated_at')}...")
         else:
             print("Fetching all threads from course...")
 
-        threads = []
-        offset = 0
+        fetched = 0
         limit = 30
+        next_offset = 0
+        sort = ACTIVITY_SORT if cursor else None
+        seen_ids: Set[int] = set()
+
+        with ThreadPoolExecutor(max_workers=max(1, prefetch)) as pool:
+            window = deque()
+
+            def request_next_page():
+                nonlocal next_offset
+                window.append(pool.submit(self.fetch_page, next_offset, limit, query, sort))
+                next_offset += limit
+
+            for _ in range(max(1, prefetch)):
+                request_next_page()
+
+            while window:
+                try:
+                    batch = window.popleft().result()
+                except requests.RequestException as e:
+                    print(f"Error fetching threads: {e}")
+                    if cursor:
+                        raise
+                    break
 
-        while True:
-            url = f"{self.base_url}/courses/{self.course_id}/threads"
-            params = {
-                "limit": limit,
-                "offset": offset,
-                "filter": "all"
-            }
-
-            # Only add query if provided
-            if query:
-                params["query"] = query
-
-            try:
-                response = requests.get(url, headers=self.headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                batch = data.get('threads', [])
                 if not batch:
                     break
 
-                threads.extend(batch)
-                print(f"Fetched {len(threads)} threads so far...")
-
-                offset += limit
+                fresh = [t for t in batch if t.get('id') not in seen_ids]
+                seen_ids.update(t.get('id') for t in fresh)
+
+                if cursor:
+                    newer = [t for t in fresh if self.is_after_cursor(t, cursor)]
+                    fetched += len(newer)
+                    print(f"Fetched {fetched} new/updated threads so far...")
+                    yield from newer
+                    # Everything on this page is already known: later pages are less recently active
+                    if not newer:
+                        break
+                else:
+                    fetched += len(fresh)
+                    print(f"Fetched {fetched} threads so far...")
+                    yield from fresh
 
                 # Check if we've fetched all threads
                 if len(batch) < limit:
                     break
 
-            except requests.RequestException as e:
-                print(f"Error fetching threads: {e}")
-                break
+                request_next_page()
+
+            # Speculative pages past the end are no longer needed
+            for future in window:
+                future.cancel()
+
+    @staticmethod
+    def is_after_cursor(thread: Dict[str, Any], cursor: Dict[str, Any]) -> bool:
+        """True if the thread changed after the cursor's updated_at high-water mark"""
+        mark = parse_timestamp(cursor.get('updated_at', ''))
+        updated = parse_timestamp(thread.get('updated_at') or thread.get('created_at', ''))
+        if mark is None or updated is None:
+            return True
+        if updated > mark:
+            return True
+        # Same instant: only threads we have not already seen at the mark
+        return updated == mark and thread.get('id') not in set(cursor.get('ids', []))
+
+    @staticmethod
+    def build_cursor(threads: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Advance the high-water mark to the newest updated_at among `threads`"""
+        mark = parse_timestamp(previous.get('updated_at', '')) if previous else None
+        ids: Set[int] = set(previous.get('ids', [])) if previous else set()
+        mark_raw = previous.get('updated_at', '') if previous else ''
 
-        print(f"Total threads fetched: {len(threads)}")
-        return threads
+        for thread in threads:
+            raw = thread.get('updated_at') or thread.get('created_at', '')
+            updated = parse_timestamp(raw)
+            if updated is None:
+                continue
+            if mark is None or updated > mark:
+                mark, mark_raw, ids = updated, raw, {thread.get('id')}
+            elif updated == mark:
+                ids.add(thread.get('id'))
+
+        if mark is None:
+            return previous
+        return {"updated_at": mark_raw, "ids": sorted(ids)}
+
+    def load_cursor(self, output_dir: str = "data") -> Optional[Dict[str, Any]]:
+        """Load the persisted cursor for this course, if any"""
+        path = os.path.join(output_dir, CURSOR_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            cursor = json.load(f)
+        if cursor.get('course_id') != self.course_id:
+            print(f"Ignoring cursor for course {cursor.get('course_id')}")
+            return None
+        return cursor
+
+    def save_cursor(self, cursor: Optional[Dict[str, Any]], output_dir: str = "data"):
+        """Persist the cursor next to the scraped data"""
+        if not cursor:
+            return
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, CURSOR_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"course_id": self.course_id, **cursor}, f, indent=2)
+        print(f"Saved cursor to {path} (updated_at={cursor['updated_at']})")
 
     def extract_metadata(self, title: str) -> Dict[str, str]:
-        """Extract model and homework info from title using flexible patterns"""
-        metadata = {
-            "model": "Unknown",
-            "homework": "Unknown"
-        }
+        """
+        Extract model and homework info from title using flexible patterns.
 
-        # Model patterns with normalized names (pattern, canonical_name)
-        # Order matters - more specific patterns first!
-        model_patterns = [
-            # GPT-5 variants (newest)
-            (r'gpt[-\s]?5[-\s]?\(?\s*thinking\s*\)?', 'GPT-5-Thinking'),
-            (r'gpt[-\s]?5\.?1[-\s]?thinking', 'GPT-5.1-Thinking'),
-            (r'gpt[-\s]?5\.?1', 'GPT-5.1'),
-            (r'gpt[-\s]?5', 'GPT-5'),
-            # GPT-4o variants
-            (r'gpt[-\s]?4o[-\s]?mini', 'GPT-4o-mini'),
-            (r'gpt[-\s]?4o', 'GPT-4o'),
-            # GPT-4 variants
-            (r'gpt[-\s]?4[-\s]?turbo', 'GPT-4-Turbo'),
-            (r'gpt[-\s]?4', 'GPT-4'),
-            # GPT-3.5
-            (r'gpt[-\s]?3\.?5[-\s]?turbo', 'GPT-3.5-Turbo'),
-            (r'gpt[-\s]?3\.?5', 'GPT-3.5'),
-            # ChatGPT variants
-            (r'chatgpt[-\s]?5', 'ChatGPT-5'),
-            (r'chatgpt', 'ChatGPT'),
-            # o1 series
-            (r'o1[-\s]?preview', 'o1-preview'),
-            (r'o1[-\s]?mini', 'o1-mini'),
-            (r'\bo1\b', 'o1'),  # Word boundary to avoid matching "201"
-            # Claude variants
-            (r'claude[-\s]?3\.?5[-\s]?sonnet', 'Claude-3.5-Sonnet'),
-            (r'claude[-\s]?3[-\s]?opus', 'Claude-3-Opus'),
-            (r'claude[-\s]?3[-\s]?sonnet', 'Claude-3-Sonnet'),
-            (r'claude[-\s]?sonnet', 'Claude-Sonnet'),
-            (r'claude[-\s]?opus', 'Claude-Opus'),
-            (r'claude', 'Claude'),
-            # Gemini variants
-            (r'gemini[-\s]?1\.?5[-\s]?pro', 'Gemini-1.5-Pro'),
-            (r'gemini[-\s]?1\.?5[-\s]?flash', 'Gemini-1.5-Flash'),
-            (r'gemini[-\s]?pro', 'Gemini-Pro'),
-            (r'gemini[-\s]?flash', 'Gemini-Flash'),
-            (r'gemma', 'Gemma'),
-            (r'gemini', 'Gemini'),
-            # DeepSeek variants
-            (r'deepseek[-\s]?v?3\.?2', 'DeepSeek-v3.2'),
-            (r'deepseek[-\s]?v?3', 'DeepSeek-v3'),
-            (r'deepseek', 'DeepSeek'),
-            # Llama variants
-            (r'llama[-\s]?3\.?1', 'Llama-3.1'),
-            (r'llama[-\s]?3', 'Llama-3'),
-            (r'llama[-\s]?2', 'Llama-2'),
-            (r'llama', 'Llama'),
-            # Grok
-            (r'grok', 'Grok'),
-            # Kimi variants
-            (r'kimi[-\s]?k2', 'Kimi-K2'),
-            (r'kimi', 'Kimi'),
-            # Perplexity variants
-            (r'perplexity[-\s]?sonar', 'Perplexity-Sonar'),
-            (r'perplexity', 'Perplexity'),
-            # GPT-OSS
-            (r'gpt[-\s]?oss', 'GPT-OSS'),
-            # Other models
-            (r'qwen[-\s]?2\.?5', 'Qwen-2.5'),
-            (r'qwen[-\s]?2', 'Qwen-2'),
-            (r'qwen', 'Qwen'),
-            (r'mistral', 'Mistral'),
-            (r'mixtral', 'Mixtral'),
-            (r'phi[-\s]?3', 'Phi-3'),
-            (r'phi', 'Phi'),
-        ]
-
-        for pattern, canonical_name in model_patterns:
-            if re.search(pattern, title, re.IGNORECASE):
-                metadata["model"] = canonical_name
-                break
-
-        # Homework patterns
-        hw_patterns = [
-            r'hwk[- ]?(\d+)',  # Handle "HWK" typo
-            r'hw[- ]?(\d+)',
-            r'homework[- ]?(\d+)',
-            r'h(\d+)',
-            r'assignment[- ]?(\d+)',
-        ]
-
-        for pattern in hw_patterns:
-            match = re.search(pattern, title, re.IGNORECASE)
-            if match:
-                # Normalize: remove leading zeros (HW02 -> HW2, HW08 -> HW8)
-                hw_num = match.group(1).lstrip('0') or '0'
-                metadata["homework"] = f"HW{hw_num}"
-                break
-
-        return metadata
+        Patterns live in data/title_patterns.json (most specific first) and are
+        compiled once per process; see title_classifier.TitleClassifier.
+        """
+        return get_classifier().classify(title)
 
     def process_threads(self, threads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process threads to extract relevant information"""
-        processed = []
+        with tracing.span('process_threads', threads=len(threads)) as span:
+            posts = list(self.iter_processed(threads))
+            span.count(len(posts))
+        return posts
 
+    def iter_processed(self, threads: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Filter and convert threads to post records one at a time"""
         for thread in threads:
             title = thread.get('title', '')
 
-            # Filter: Only include "Special Participation A" posts
-            if not re.search(r'special\s+participation\s+a', title, re.IGNORECASE):
+            if not SPECIAL_PARTICIPATION_A.search(title):
                 continue
 
-            # Exclude meta-posts about the website/extra credit itself
-            exclude_patterns = [
-                r'extra\s+credit\s+website',
-                r'blue\s+team.*website',
-                r'red\s+team.*website',
-                r'website.*blue\s+team',
-                r'website.*red\s+team'
-            ]
-
-            if any(re.search(pattern, title, re.IGNORECASE) for pattern in exclude_patterns):
+            if EXCLUDE_TITLE.search(title):
                 continue
 
             # Get the main post content
             document = thread.get('document', '')
 
-            metadata = self.extract_metadata(title)
+            with tracing.tally('extract_metadata'):
+                metadata = self.extract_metadata(title)
 
-            processed_thread = {
+            yield {
                 "id": thread.get('id'),
                 "title": thread.get('title', '').strip(),
                 "author": thread.get('user', {}).get('name', 'Unknown'),
@@ -215,9 +265,30 @@ class EdScraper:
                 "comments": thread.get('comment_count', 0)
             }
 
-            processed.append(processed_thread)
-
-        return processed
+    def merge_incremental(self, existing: List[Dict[str, Any]], threads: List[Dict[str, Any]],
+                          processed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge freshly processed posts into a previously saved dataset.
+
+        Changed posts are replaced in place, new posts are prepended (the API
+        returns newest first), and posts whose updated title no longer passes
+        the filter are dropped.
+        """
+        fresh = {p['id']: p for p in processed}
+        changed_ids = {t.get('id') for t in threads}
+
+        merged = []
+        seen = set()
+        for post in existing:
+            pid = post.get('id')
+            if pid in fresh:
+                merged.append(fresh[pid])
+                seen.add(pid)
+            elif pid not in changed_ids:
+                merged.append(post)
+
+        new_posts = [p for p in processed if p['id'] not in seen]
+        return new_posts + merged
 
     def save_data(self, data: List[Dict[str, Any]], output_dir: str = "data"):
         """Save processed data to JSON and CSV formats"""
@@ -225,15 +296,15 @@ class EdScraper:
 
         # Save as JSON
         json_path = os.path.join(output_dir, "special_participation_a.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
+        with tracing.span('serialize', cat='io', path=json_path), open(json_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         print(f"Saved JSON to {json_path}")
 
         # Save as CSV
         csv_path = os.path.join(output_dir, "special_participation_a.csv")
         if data:
-            keys = ["id", "title", "author", "model", "homework", "created_at", "url", "likes", "comments"]
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            keys = CSV_FIELDS
+            with tracing.span('write_csv', cat='io', path=csv_path), open(csv_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=keys)
                 writer.writeheader()
                 for item in data:
@@ -241,24 +312,99 @@ class EdScraper:
                     writer.writerow(row)
             print(f"Saved CSV to {csv_path}")
 
+        # Columnar, memory-mappable copy for the analytics stages
+        with tracing.span('write_columnar', cat='io'):
+            store_path = write_store(data, store_path_for(json_path))
+        print(f"Saved columnar store to {store_path}")
+
         return json_path, csv_path
 
+    def stream_data(self, threads: Iterable[Dict[str, Any]], output_dir: str = "data"):
+        """
+        Fetch, filter and write posts as they arrive.
+
+        Writes special_participation_a.jsonl and its own CSV
+        (special_participation_a_stream.csv) in one pass without holding the
+        thread list in memory. The JSON run's files and the incremental cursor,
+        which describes them, are left alone. Returns (jsonl_path, csv_path, count).
+        """
+        jsonl_path = os.path.join(output_dir, "special_participation_a.jsonl")
+        csv_path = os.path.join(output_dir, "special_participation_a_stream.csv")
+        with tracing.span('stream', cat='io', path=jsonl_path) as span:
+            jsonl_path, csv_path, count = stream_to_disk(self.iter_processed(threads), jsonl_path, csv_path)
+            span.count(count)
+        print(f"Streamed {count} posts to {jsonl_path} and {csv_path}")
+
+        # Second pass from disk (not memory) for the columnar copy
+        with tracing.span('write_columnar', cat='io'):
+            store_path = write_store(read_jsonl(jsonl_path), store_path_for(jsonl_path))
+        print(f"Saved columnar store to {store_path}")
+        return jsonl_path, csv_path, count
+
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Scrape Special Participation A posts from Ed")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only fetch threads updated since the last run and merge them into the existing data")
+    parser.add_argument('--stream', action='store_true',
+                        help="write posts to special_participation_a.jsonl + special_participation_a_stream.csv as "
+                             "they are fetched (flat memory; the incremental cursor is not moved)")
+    parser.add_argument('--prefetch', type=int, default=1,
+                        help="number of listing pages to request in parallel (default: 1, serial)")
+    parser.add_argument('--output-dir', default="data")
+    tracing.add_profile_argument(parser, 'scraper')
+    args = parser.parse_args()
+    if args.stream and args.incremental:
+        parser.error("--stream writes a fresh dataset; it cannot be combined with --incremental")
+
+    with tracing.profiled(args.profile, 'scraper'):
+        scrape(args)
+
+
+def scrape(args):
+
     print("=" * 60)
     print("CS182 Blue Team - Ed Discussion Scraper")
     print("=" * 60)
 
     try:
         scraper = EdScraper()
-        threads = scraper.get_threads()
 
-        if not threads:
-            print("No threads found!")
+        if args.stream:
+            jsonl_path, csv_path, count = scraper.stream_data(scraper.iter_threads(prefetch=args.prefetch), args.output_dir)
+            print(scraper.transport.report())
+            print("\n" + "=" * 60)
+            print(f"Successfully processed {count} posts")
+            print(f"Data saved to:")
+            print(f"  - {jsonl_path}")
+            print(f"  - {csv_path}")
+            print("=" * 60)
             return
 
-        processed = scraper.process_threads(threads)
-        json_path, csv_path = scraper.save_data(processed)
+        existing_path = os.path.join(args.output_dir, "special_participation_a.json")
+        cursor = scraper.load_cursor(args.output_dir) if args.incremental else None
+        if cursor and not os.path.exists(existing_path):
+            print(f"{existing_path} not found - falling back to a full crawl")
+            cursor = None
+
+        threads = scraper.get_threads(cursor=cursor, prefetch=args.prefetch)
+
+        if cursor:
+            with tracing.span('load', cat='io', path=existing_path), open(existing_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            if not threads:
+                print(f"No new or updated threads - {existing_path} is up to date")
+                return
+            processed = scraper.merge_incremental(existing, threads, scraper.process_threads(threads))
+        else:
+            if not threads:
+                print("No threads found!")
+                return
+            processed = scraper.process_threads(threads)
+
+        json_path, csv_path = scraper.save_data(processed, args.output_dir)
+        scraper.save_cursor(scraper.build_cursor(threads, cursor), args.output_dir)
+        print(scraper.transport.report())
 
         print("\n" + "=" * 60)
         print(f"Successfully processed {len(processed)} posts")
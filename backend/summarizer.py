@@ -0,0 +1,219 @@
+"""
+CS182 Blue Team - Post summarization engine
+Summarizes posts with an OpenAI-compatible chat completion API. Several
+posts are packed into one request (up to `batch_size` posts and
+`batch_chars` characters of post text), up to `concurrency` requests are in
+flight at once, and every summary is kept in a JSONL cache keyed by a hash
+of the post's title and content; the cache is invalidated as a whole when
+the model, prompt version or sampling settings change. A rerun over an
+unchanged archive therefore sends no requests at all.
+
+With deterministic=True requests use temperature 0 and a fixed seed, and
+summaries are assigned by post id whatever order the responses arrive in.
+Point OPENAI_BASE_URL (or base_url) at a local server, such as
+benchmarks/stub_llm_server.py, to run without an account.
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import openai
+import tracing
+from text_cache import RecordCache, content_key
+from text_normalize import NORMALIZER_VERSION, normalize_html
+
+SUMMARY_CACHE_PATH = "data/.cache/summaries.jsonl"
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Bump when the prompts or the expected response layout change
+PROMPT_VERSION = 2
+
+SYSTEM_PROMPT = ("You are a helpful assistant that creates concise, informative summaries of student posts "
+                 "about LLM performance on homework assignments.")
+BATCH_INSTRUCTIONS = ("Summarize each of the following posts in 1-2 sentences, focusing on key findings and "
+                      "observations. The posts are given as a JSON array of objects with \"id\" and \"text\". "
+                      "Reply with a JSON object {\"summaries\": [{\"id\": ..., \"summary\": ...}, ...]} "
+                      "holding one entry per post, with the post's id unchanged.\n\nPosts:\n")
+
+MAX_CHARS = 2000             # post text sent per post (title + content)
+BATCH_SIZE = 8               # posts per request
+BATCH_CHARS = 12000          # post text per request
+CONCURRENCY = 4              # requests in flight
+TOKENS_PER_SUMMARY = 150
+DETERMINISTIC_SEED = 182
+UNAVAILABLE = "Summary unavailable"
+
+
+def post_text(post: Dict[str, Any], max_chars: int = MAX_CHARS) -> str:
+    """Title and plain-text content of a post, cut to max_chars"""
+    title = post.get('title') or ""
+    content = normalize_html(post.get('content') or "")
+    return f"{title}\n{content}".strip()[:max_chars]
+
+
+def pack_batches(texts: Sequence[Tuple[str, str]], batch_size: int, batch_chars: int) -> List[List[Tuple[str, str]]]:
+    """Consecutive (id, text) pairs, at most batch_size / batch_chars per batch (a longer text goes alone)"""
+    batches: List[List[Tuple[str, str]]] = []
+    batch: List[Tuple[str, str]] = []
+    chars = 0
+    for item in texts:
+        if batch and (len(batch) >= batch_size or chars + len(item[1]) > batch_chars):
+            batches.append(batch)
+            batch, chars = [], 0
+        batch.append(item)
+        chars += len(item[1])
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def parse_summaries(reply: str) -> Dict[str, str]:
+    """id -> summary from a batch reply; entries without a usable id or summary are dropped"""
+    try:
+        value = json.loads(reply)
+    except ValueError:
+        # Models sometimes wrap JSON in a code fence
+        start, end = reply.find('{'), reply.rfind('}')
+        if start < 0 or end < start:
+            return {}
+        try:
+            value = json.loads(reply[start:end + 1])
+        except ValueError:
+            return {}
+    entries = value.get('summaries') if isinstance(value, dict) else value
+    summaries = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get('summary'), str) and entry['summary'].strip():
+            summaries[str(entry.get('id'))] = entry['summary'].strip()
+    return summaries
+
+
+class Summarizer:
+    """
+    Batched, concurrent, cached post summaries; see summarize(). Requests are
+    retried by the OpenAI client (429 / 5xx with backoff); posts a batch
+    reply leaves out are asked for again one at a time, and posts that still
+    fail get UNAVAILABLE and are not cached.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: str = DEFAULT_MODEL,
+                 batch_size: int = BATCH_SIZE, batch_chars: int = BATCH_CHARS, concurrency: int = CONCURRENCY,
+                 max_chars: int = MAX_CHARS, deterministic: bool = False,
+                 cache_path: Optional[str] = SUMMARY_CACHE_PATH, max_retries: int = 4, timeout: float = 60):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.batch_chars = batch_chars
+        self.concurrency = max(1, concurrency)
+        self.max_chars = max_chars
+        self.deterministic = deterministic
+        self.client = openai.OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'),
+                                    base_url=base_url or os.getenv('OPENAI_BASE_URL') or None,
+                                    max_retries=max_retries, timeout=timeout)
+        settings = {'model': model, 'prompt': PROMPT_VERSION, 'max_chars': max_chars,
+                    'deterministic': deterministic, 'normalizer': NORMALIZER_VERSION}
+        fingerprint = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+        self.cache = (RecordCache(cache_path, fingerprint=fingerprint, name="summary cache")
+                      if cache_path else None)
+        self.requests = 0
+        self.failures = 0
+
+    def sampling(self) -> Dict[str, Any]:
+        if self.deterministic:
+            return {'temperature': 0, 'seed': DETERMINISTIC_SEED}
+        return {'temperature': 0.7}
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, json_reply: bool) -> str:
+        extra = {'response_format': {'type': 'json_object'}} if json_reply else {}
+        with tracing.span('llm_request', cat='io', model=self.model):
+            response = self.client.chat.completions.create(model=self.model, messages=messages,
+                                                           max_tokens=max_tokens, **self.sampling(), **extra)
+        return (response.choices[0].message.content or "").strip()
+
+    def request(self, batch: List[Tuple[str, str]]) -> Dict[str, str]:
+        """Summaries for one batch of (id, text); a single post is asked for as plain text"""
+        if len(batch) == 1:
+            prompt = ("Summarize this post in 1-2 sentences, focusing on key findings and observations:\n\n"
+                      + batch[0][1])
+            messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+            reply = self.complete(messages, TOKENS_PER_SUMMARY, json_reply=False)
+            return {batch[0][0]: reply} if reply else {}
+        # Posts are numbered within the batch (short ids cost fewer tokens and
+        # are echoed back reliably) and mapped back to their keys here
+        keys = {str(i): key for i, (key, _) in enumerate(batch, 1)}
+        posts = json.dumps([{"id": i, "text": text} for i, (_, text) in zip(keys, batch)], ensure_ascii=False)
+        messages = [{"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": BATCH_INSTRUCTIONS + posts}]
+        reply = self.complete(messages, TOKENS_PER_SUMMARY * len(batch), json_reply=True)
+        return {keys[i]: summary for i, summary in parse_summaries(reply).items() if i in keys}
+
+    def run_batch(self, batch: List[Tuple[str, str]]) -> Tuple[Dict[str, str], int, int]:
+        """(summaries, requests sent, requests failed); missing posts are retried singly"""
+        sent, failed = 1, 0
+        try:
+            summaries = self.request(batch)
+        except openai.OpenAIError as e:
+            print(f"Error summarizing {len(batch)} post(s): {e}")
+            summaries, failed = {}, 1
+            if len(batch) == 1:
+                return summaries, sent, failed
+        if len(batch) > 1:
+            for item in batch:
+                if item[0] in summaries:
+                    continue
+                sent += 1
+                try:
+                    summaries.update(self.request([item]))
+                except openai.OpenAIError as e:
+                    print(f"Error summarizing post {item[0]}: {e}")
+                    failed += 1
+        return summaries, sent, failed
+
+    def summarize(self, posts: Sequence[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        One summary per post, in order (None for posts without content).
+        Cached posts are answered from the cache; the rest are sent in
+        batches of consecutive posts, so results do not depend on timing.
+        """
+        results: List[Optional[str]] = [None] * len(posts)
+        pending: Dict[str, List[int]] = {}
+        texts: List[Tuple[str, str]] = []
+        for i, post in enumerate(posts):
+            if not post.get('content'):
+                continue
+            key = content_key(post.get('title') or "", post['content'])
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[i] = cached['summary']
+            elif key in pending:
+                pending[key].append(i)
+            else:
+                pending[key] = [i]
+                texts.append((key, post_text(post, self.max_chars)))
+
+        batches = pack_batches(texts, self.batch_size, self.batch_chars)
+        with tracing.span('summarize', requests=len(batches)) as span, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            span.count(len(texts))
+            for summaries, sent, failed in pool.map(self.run_batch, batches):
+                self.requests += sent
+                self.failures += failed
+                for key, summary in summaries.items():
+                    if self.cache is not None:
+                        self.cache.put(key, {'summary': summary})
+                    for i in pending.pop(key):
+                        results[i] = summary
+        for indices in pending.values():
+            for i in indices:
+                results[i] = UNAVAILABLE
+
+        if self.cache is not None:
+            self.cache.save(prune=False)
+        return results
+
+    def report(self) -> str:
+        parts = [f"{self.requests} request(s)", f"{self.failures} failed"]
+        if self.cache is not None:
+            parts.append(self.cache.report())
+        return "Summaries: " + ", ".join(parts)
@@ -0,0 +1,154 @@
+"""
+CS182 Blue Team - Preprocessed post text cache
+Each post's clean text is stripped, tokenized and split into sentences once;
+the result is kept on disk keyed by a hash of the post's title and content,
+so unchanged posts cost nothing on the next run. The same record cache holds
+per HW x Model group results for incremental runs.
+"""
+
+import os
+import json
+import hashlib
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+CACHE_PATH = "data/.cache/preprocessed.jsonl"
+GROUP_CACHE_PATH = "data/.cache/groups.jsonl"
+
+# Bump when the preprocessed record layout changes
+CACHE_VERSION = 2
+
+# Evidence flags of a sentence (see AdvancedAnalytics.sentence_evidence)
+STRENGTH = 1
+WEAKNESS = 2
+
+
+def content_key(title: str, content: str) -> str:
+    """Stable hash of the text a post's preprocessing depends on"""
+    raw = json.dumps([title or "", content or ""], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def part_tokens(part: Dict[str, Any]) -> List[str]:
+    """All tokens of a text part (its sentences' tokens, in order)"""
+    return [token for tokens in part["tokens"] for token in tokens]
+
+
+def iter_sentences(parts: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, List[str], Optional[List[Optional[int]]], int]]:
+    """
+    Sentences of the parts' texts joined with ' ', as (sentence, tokens, evidence, j).
+
+    Each part holds its own sentence split ("sentences") with one token list
+    per sentence. Joining two parts with a space glues the last fragment of
+    one onto the first fragment of the next, exactly as splitting the joined
+    text would (and a space never joins two words, so the glued sentence's
+    tokens are the two token lists concatenated); glued sentences come back
+    with evidence=None. Interior sentences come back with their part's
+    "evidence" list and their slot j in it, which holds the sentence's
+    evidence hits (see EvidenceMatcher.evaluate).
+    """
+    carry = None
+    carry_tokens: List[str] = []
+    for part in parts:
+        sentences, tokens = part["sentences"], part["tokens"]
+        if carry is None:
+            first, first_tokens = sentences[0], tokens[0]
+        else:
+            first, first_tokens = carry + " " + sentences[0], carry_tokens + tokens[0]
+        if len(sentences) == 1:
+            carry, carry_tokens = first, first_tokens
+            continue
+        yield first, first_tokens, None, 0
+        evidence = part["evidence"]
+        for j in range(len(sentences) - 2):
+            yield sentences[j + 1], tokens[j + 1], evidence, j
+        carry, carry_tokens = sentences[-1], tokens[-1]
+    if carry is not None:
+        yield carry, carry_tokens, None, 0
+
+
+class RecordCache:
+    """
+    JSON records in one JSONL file, keyed by a hex content hash.
+
+    The first line records the cache version and a fingerprint of the
+    analyzer settings (stop words, evidence terms); if either differs the
+    whole file is ignored. The file is read on first use but each record is
+    only decoded when asked for, so a run that needs a handful of records
+    does not pay for parsing all of them. save() rewrites the file only when
+    something was added or changed, or (when pruning) some entries were not
+    used in this run; untouched records are copied verbatim.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, fingerprint: str = "", name: str = "preprocess cache"):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.name = name
+        # key -> raw JSON line (not decoded yet) or decoded record
+        self.entries: Optional[Dict[str, Any]] = None
+        self.used: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def _header(self) -> Dict[str, Any]:
+        return {"version": CACHE_VERSION, "fingerprint": self.fingerprint}
+
+    def _load(self):
+        self.entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                if json.loads(f.readline() or "{}") != self._header():
+                    return
+                for line in f:
+                    # Lines are '["<hex key>", {...}]'
+                    self.entries[line[2:line.index('"', 2)]] = line
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.entries is None:
+            self._load()
+        record = self.entries.get(key)
+        if record is None:
+            self.misses += 1
+            return None
+        if isinstance(record, str):
+            try:
+                record = self.entries[key] = json.loads(record)[1]
+            except ValueError:
+                del self.entries[key]
+                self.misses += 1
+                return None
+        self.hits += 1
+        self.used.add(key)
+        return record
+
+    def put(self, key: str, record: Dict[str, Any]):
+        if self.entries is None:
+            self._load()
+        self.entries[key] = record
+        self.used.add(key)
+        self.dirty = True
+
+    def save(self, prune: bool = True):
+        """Write back changes; with prune=False records unused in this run are kept"""
+        if self.entries is None or (not self.dirty and (not prune or len(self.used) == len(self.entries))):
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._header()) + "\n")
+            for key, record in self.entries.items():
+                if prune and key not in self.used:
+                    continue
+                if isinstance(record, str):
+                    f.write(record if record.endswith("\n") else record + "\n")
+                else:
+                    f.write(json.dumps([key, record], ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.name} hit rate {rate:.1%} (hits={self.hits}, misses={self.misses})"
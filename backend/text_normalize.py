@@ -0,0 +1,109 @@
+"""
+CS182 Blue Team - HTML / Ed document to plain text
+Turns HTML or Ed's document markup into plain text with one block element
+(Ed's paragraph, heading, list-item, ... or their HTML counterparts) per
+line. The work is a handful of whole-document regex substitutions, so the
+per-tag cost is paid in C rather than in parser callbacks: block tags become
+line breaks, all other tags are removed, and entities are decoded last, so
+an escaped "&lt;b&gt;" stays text. Inline elements (bold, link, code, math)
+never split a sentence, and text from adjacent blocks is never glued into
+one word. Normalizing the output again changes nothing unless the text
+itself contains tag-like sequences or entities (an escaped "&lt;SOS&gt;").
+"""
+
+import re
+from html import unescape
+from typing import List
+
+# Bump when the text produced for the same markup changes (cached
+# preprocessing depends on it)
+NORMALIZER_VERSION = 1
+
+# Elements that start and end a line
+BLOCK_TAGS = frozenset({
+    # Ed document markup
+    'document', 'paragraph', 'heading', 'list', 'list-item', 'blockquote', 'callout',
+    'figure', 'spoiler', 'table', 'tr', 'snippet', 'snippet-file', 'web-snippet', 'pre',
+    # HTML
+    'p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'section', 'article', 'header', 'footer', 'aside', 'nav', 'figcaption', 'hr',
+    'thead', 'tbody', 'tfoot', 'caption', 'td', 'th', 'address', 'details', 'summary',
+    # Line breaks inside a block
+    'break', 'br',
+})
+
+# Code blocks: whitespace kept verbatim, dropped entirely with drop_code=True
+CODE_BLOCK_TAGS = ('snippet', 'web-snippet', 'pre')
+
+# Never text
+SKIP_TAGS = ('script', 'style', 'template', 'head')
+
+# Attributes of a tag (quoted values may contain '>'); the second form stops
+# before a '/>' so self-closing tags can be told apart
+ATTRS = r'[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*'
+OPEN_ATTRS = r'(?:[^>"\'/]|/(?!>)|"[^"]*"|\'[^\']*\')*'
+
+
+def _element_pattern(names) -> str:
+    """An element with one of `names`, content in group 2 (to the end if unclosed)"""
+    return (r'<(' + '|'.join(map(re.escape, names)) + r')(?=[\s/>])' + OPEN_ATTRS
+            + r'(?:/>|>(.*?)(?:</\1\s*>|\Z))')
+
+
+# Comments and elements whose content is never text
+SKIP_PATTERN = re.compile(r'<!--.*?(?:-->|\Z)|' + _element_pattern(SKIP_TAGS), re.DOTALL | re.IGNORECASE)
+
+CODE_BLOCK_PATTERN = re.compile(_element_pattern(CODE_BLOCK_TAGS), re.DOTALL | re.IGNORECASE)
+
+BLOCK_TAG = r'</?(?:' + '|'.join(map(re.escape, sorted(BLOCK_TAGS, key=len, reverse=True))) + r')(?=[\s/>])' + ATTRS + '>'
+# Case-insensitive matching is about twice as slow and Ed markup is all lower
+# case, so it is only used for documents with upper-case tags
+BLOCK_TAG_PATTERN = re.compile(BLOCK_TAG)
+ANY_CASE_BLOCK_TAG_PATTERN = re.compile(BLOCK_TAG, re.IGNORECASE)
+UPPER_CASE_TAG_PATTERN = re.compile(r'</?[A-Z]')
+
+# Any other tag, doctype/CDATA or processing instruction. A '<' that does not
+# start one of these (as in "a < b") is text, as in a browser.
+TAG_PATTERN = re.compile(r'</?[a-zA-Z][\w:.-]*' + ATTRS + r'>|<![^>]*>|<\?[^>]*>')
+
+
+def _text(markup: str, blocks: re.Pattern) -> str:
+    """Block tags to line breaks, other tags removed, then entities decoded"""
+    text = TAG_PATTERN.sub('', blocks.sub('\n', markup))
+    return unescape(text) if '&' in text else text
+
+
+def _prose_lines(markup: str, blocks: re.Pattern) -> List[str]:
+    # str.split() collapses every run of whitespace (including &nbsp;) and strips
+    return [' '.join(line.split()) for line in _text(markup, blocks).split('\n')]
+
+
+def _code_lines(markup: str, blocks: re.Pattern) -> List[str]:
+    return [line.rstrip() for line in _text(markup, blocks).split('\n')]
+
+
+def normalize_html(html: str, drop_code: bool = False) -> str:
+    """
+    Plain text of HTML or Ed document markup, one block per line.
+
+    Entities are decoded, runs of whitespace collapse to one space, lines are
+    stripped and empty lines dropped; code blocks keep their lines and
+    indentation as-is, or are left out entirely when `drop_code` is set.
+    """
+    if not html:
+        return ""
+    blocks = BLOCK_TAG_PATTERN
+    if '<' in html:
+        html = SKIP_PATTERN.sub('', html)
+        if UPPER_CASE_TAG_PATTERN.search(html):
+            blocks = ANY_CASE_BLOCK_TAG_PATTERN
+
+    lines = []
+    pos = 0
+    for match in CODE_BLOCK_PATTERN.finditer(html):
+        lines.extend(_prose_lines(html[pos:match.start()], blocks))
+        if not drop_code and match.group(2):
+            lines.extend(_code_lines(match.group(2), blocks))
+        pos = match.end()
+    lines.extend(_prose_lines(html[pos:], blocks))
+    return '\n'.join(line for line in lines if line)
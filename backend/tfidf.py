@@ -0,0 +1,214 @@
+"""
+CS182 Blue Team - Sparse TF-IDF engine
+Maps the vocabulary to integer ids once and keeps the corpus as a CSR
+document-term matrix, so TF, IDF, TF-IDF and per-row top-k are NumPy array
+operations. Scores are bit-for-bit the ones the dict implementation produced.
+"""
+
+import math
+from array import array
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Dict, Tuple, Optional
+import numpy as np
+
+
+class Vocabulary:
+    """Term <-> integer id, ids assigned in order of first appearance"""
+
+    def __init__(self):
+        # An unseen term gets the next id on first lookup, so a whole token
+        # list is mapped by map(ids.__getitem__, tokens) without a Python loop
+        self.ids: Dict[str, int] = defaultdict()
+        self.ids.default_factory = self.ids.__len__
+        self._terms: List[str] = []
+
+    def encode(self, tokens: List[str]) -> Iterator[int]:
+        return map(self.ids.__getitem__, tokens)
+
+    @property
+    def terms(self) -> List[str]:
+        """Terms indexed by id"""
+        if len(self._terms) != len(self.ids):
+            self._terms = list(self.ids)
+        return self._terms
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.ids
+
+
+class TfidfMatrix:
+    """
+    CSR document-term matrix over tokenized documents.
+
+    Row i holds document i's distinct terms in order of first appearance
+    (the order Counter(tokens) would give), so dict views keep the key order
+    of the old nested-dict implementation. Arrays, all aligned with `indices`:
+      - counts: raw term counts
+      - tf:     count / document length
+      - tfidf:  tf * idf[term]
+    and `idf`/`df` are indexed by term id.
+    """
+
+    def __init__(self, documents: Iterable[List[str]]):
+        self.vocab = Vocabulary()
+        flat = array('q')
+        lengths = array('q')
+        for tokens in documents:
+            flat.extend(self.vocab.encode(tokens))
+            lengths.append(len(tokens))
+        term_ids = np.frombuffer(flat, dtype=np.int64)
+        self.lengths = np.frombuffer(lengths, dtype=np.int64)
+        self.n_docs = len(self.lengths)
+        n_terms = max(len(self.vocab), 1)
+
+        # One (document, term) key per token; unique keys are the non-zeros.
+        # Ordering them by first occurrence gives rows in document order with
+        # terms in first-appearance order inside each row.
+        keys = np.repeat(np.arange(self.n_docs, dtype=np.int64), self.lengths) * n_terms + term_ids
+        unique_keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        rows, self.indices = np.divmod(unique_keys[order], n_terms)
+        self.counts = counts[order]
+        self.row_sizes = np.bincount(rows, minlength=self.n_docs)
+        self.indptr = np.concatenate(([0], np.cumsum(self.row_sizes)))
+
+        self.tf = self.counts / np.repeat(self.lengths, self.row_sizes)
+        self.df = np.bincount(self.indices, minlength=len(self.vocab))
+        self.idf = self._idf(self.df, self.n_docs)
+        self.tfidf = self.tf * self.idf[self.indices]
+
+    @staticmethod
+    def _idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+        """
+        log(N / (1 + df)) per term.
+
+        math.log is evaluated once per distinct df value rather than np.log
+        per term: there are few distinct values, and it guarantees the same
+        last-bit result as the scalar implementation.
+        """
+        if not len(df):
+            return np.zeros(0)
+        unique_df, inverse = np.unique(df, return_inverse=True)
+        values = np.array([math.log(n_docs / (1 + int(f))) for f in unique_df])
+        return values[inverse]
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    # -- dict views ----------------------------------------------------
+
+    def row(self, i: int, values: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """{term: score} for document i (TF-IDF unless another aligned array is given)"""
+        values = self.tfidf if values is None else values
+        start, end = self.indptr[i], self.indptr[i + 1]
+        terms = self.vocab.terms
+        return {terms[t]: v for t, v in zip(self.indices[start:end].tolist(), values[start:end].tolist())}
+
+    def idf_dict(self) -> Dict[str, float]:
+        return dict(zip(self.vocab.terms, self.idf.tolist()))
+
+    # -- row reductions ------------------------------------------------
+
+    def row_sums(self, values: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Per-document sum of `values`, accumulated left to right like the
+        builtin sum() over the row dict (np.add.reduceat sums pairwise and can
+        differ in the last bit, which would reorder near-ties).
+        """
+        values = self.tfidf if values is None else values
+        sums = np.zeros(self.n_docs)
+        longest = int(self.row_sizes.max()) if self.n_docs else 0
+        for j in range(longest):
+            rows = np.flatnonzero(self.row_sizes > j)
+            sums[rows] += values[self.indptr[rows] + j]
+        return sums
+
+    def row_means(self, values: Optional[np.ndarray] = None) -> np.ndarray:
+        """Per-document mean of `values`; 0 for documents without terms"""
+        sums = self.row_sums(values)
+        means = np.zeros(self.n_docs)
+        nonempty = self.row_sizes > 0
+        means[nonempty] = sums[nonempty] / self.row_sizes[nonempty]
+        return means
+
+    # -- top-k ---------------------------------------------------------
+
+    def top_k(self, i: int, k: int, values: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        The k highest-scoring (term, score) pairs of document i, highest first.
+
+        Equal scores keep first-appearance order, exactly like a stable
+        sorted(row.items(), key=score, reverse=True)[:k], but only the k
+        survivors of an argpartition are sorted.
+        """
+        values = self.tfidf if values is None else values
+        start, end = int(self.indptr[i]), int(self.indptr[i + 1])
+        row = values[start:end]
+        if k <= 0 or not len(row):
+            return []
+        if k < len(row):
+            kth = row[np.argpartition(row, len(row) - k)[len(row) - k]]
+            above = np.flatnonzero(row > kth)
+            ties = np.flatnonzero(row == kth)[:k - len(above)]
+            keep = np.concatenate([above, ties])
+        else:
+            keep = np.arange(len(row))
+        order = keep[np.lexsort((keep, -row[keep]))]
+        terms = self.vocab.terms
+        return [(terms[t], v) for t, v in zip(self.indices[start + order].tolist(), row[order].tolist())]
+
+    def top_k_positions(self, k: int, values: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Positions (into indices/values) of every row's top k, row by row,
+        highest first, ties in first-appearance order; row i contributes
+        min(row_sizes[i], k) entries.
+
+        Rows longer than k are bucketed by length (powers of two), padded into
+        a 2-D block per bucket and cut to k entries with one partition per
+        block; only the surviving <= k entries per row are then sorted.
+        """
+        values = self.tfidf if values is None else values
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Rows with at most k terms keep every entry
+        short_rows = self.row_sizes <= k
+        keep = [np.flatnonzero(np.repeat(short_rows, self.row_sizes))]
+
+        long_rows = np.flatnonzero(~short_rows)
+        buckets = np.ceil(np.log2(self.row_sizes[long_rows] / k)).astype(np.int64)
+        for bucket in np.unique(buckets):
+            rows = long_rows[buckets == bucket]
+            sizes = self.row_sizes[rows]
+            width = np.arange(int(sizes.max()))
+            present = width < sizes[:, None]
+            positions = np.where(present, self.indptr[rows][:, None] + width, 0)
+            block = np.where(present, values[positions], -np.inf)
+
+            # k-th largest per row, then everything above it plus the
+            # earliest entries equal to it (first-appearance tie-break)
+            kth = -np.partition(-block, k - 1, axis=1)[:, k - 1:k]
+            above = block > kth
+            ties = block == kth
+            needed = k - above.sum(axis=1, keepdims=True)
+            chosen = above | (ties & (np.cumsum(ties, axis=1) <= needed))
+            keep.append(positions[chosen])
+
+        keep = np.concatenate(keep)
+        row_of = np.repeat(np.arange(self.n_docs), self.row_sizes)[keep]
+        return keep[np.lexsort((keep, -values[keep], row_of))]
+
+    def top_k_rows(self, k: int, values: Optional[np.ndarray] = None) -> List[List[Tuple[str, float]]]:
+        """top_k() for every document at once, with the same order and ties"""
+        values = self.tfidf if values is None else values
+        if k <= 0:
+            return [[] for _ in range(self.n_docs)]
+        keep = self.top_k_positions(k, values)
+
+        terms = np.array(self.vocab.terms, dtype=object)
+        pairs = list(zip(terms[self.indices[keep]].tolist(), values[keep].tolist()))
+        bounds = np.concatenate(([0], np.cumsum(np.minimum(self.row_sizes, k)))).tolist()
+        return [pairs[bounds[i]:bounds[i + 1]] for i in range(self.n_docs)]
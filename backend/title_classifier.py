@@ -0,0 +1,130 @@
+"""
+CS182 Blue Team - Compiled title classifier
+Maps post titles to canonical model and homework labels using the ordered
+pattern lists in data/title_patterns.json, compiled once per process.
+"""
+
+import os
+import re
+import json
+from typing import List, Dict, Optional, Tuple, Pattern
+
+PATTERNS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "title_patterns.json")
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """
+    Lowercase literal that every match of `pattern` must contain, or None.
+
+    Only the leading run of letters/digits is used (after any leading \\b), and
+    a final character made optional by ?, * or {..} is dropped. Patterns with a
+    top-level alternation, or that start with anything else, have no literal.
+    """
+    if "|" in pattern:
+        return None
+    body = pattern[2:] if pattern.startswith(r"\b") else pattern
+    m = re.match(r"[A-Za-z0-9]+", body)
+    if not m:
+        return None
+    literal = m.group(0)
+    if body[m.end():m.end() + 1] in ("?", "*", "{"):
+        literal = literal[:-1]
+    return literal.lower() or None
+
+
+class OrderedPatternSet:
+    """
+    An ordered list of case-insensitive patterns where the first one that
+    re.search()es the text wins (most-specific-first precedence).
+
+    Each pattern is compiled once and indexed by the literal it requires
+    (e.g. "gpt", "claude"). For ASCII text a literal that does not occur in
+    the lowercased text rules out every pattern that needs it, so only the
+    surviving patterns are searched, still in their original order. The
+    surviving list is memoized per combination of literals present, so the
+    per-title cost is a handful of substring checks plus a few regex calls.
+    Non-ASCII text, where re.IGNORECASE and str.lower() can disagree, falls
+    back to searching every pattern.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.compiled: List[Pattern] = [re.compile(p, re.IGNORECASE) for p in patterns]
+        literals = [required_literal(p) for p in patterns]
+        self.literals: Tuple[str, ...] = tuple(sorted({lit for lit in literals if lit}))
+        self.pattern_literals = literals
+        self.everything = tuple(enumerate(self.compiled))
+        self.candidates_by_key: Dict[Tuple[bool, ...], Tuple[Tuple[int, Pattern], ...]] = {}
+
+    def _candidates(self, text: str) -> Tuple[Tuple[int, Pattern], ...]:
+        if not text.isascii():
+            return self.everything
+        lower = text.lower()
+        key = tuple([lit in lower for lit in self.literals])
+        candidates = self.candidates_by_key.get(key)
+        if candidates is None:
+            present = {lit for lit, hit in zip(self.literals, key) if hit}
+            candidates = tuple(
+                (i, regex) for i, regex in self.everything
+                if self.pattern_literals[i] is None or self.pattern_literals[i] in present
+            )
+            self.candidates_by_key[key] = candidates
+        return candidates
+
+    def search(self, text: str) -> Tuple[Optional[int], Optional[re.Match]]:
+        """(index, match) of the first pattern that matches, or (None, None)"""
+        for i, regex in self._candidates(text):
+            m = regex.search(text)
+            if m:
+                return i, m
+        return None, None
+
+
+class TitleClassifier:
+    """Canonical model and homework labels for a post title"""
+
+    def __init__(self, model_patterns: List[Tuple[str, str]], homework_patterns: List[str]):
+        self.model_names = [name for _, name in model_patterns]
+        self.models = OrderedPatternSet([pattern for pattern, _ in model_patterns])
+        for pattern in homework_patterns:
+            if re.compile(pattern).groups < 1:
+                raise ValueError(f"Homework pattern needs a capture group for the number: {pattern!r}")
+        self.homeworks = OrderedPatternSet(homework_patterns)
+
+    @classmethod
+    def from_file(cls, path: str = PATTERNS_PATH) -> "TitleClassifier":
+        """Load the ordered pattern lists from a JSON data file"""
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        models = [(entry["pattern"], entry["name"]) for entry in spec["models"]]
+        return cls(models, spec["homework"])
+
+    def model(self, title: str) -> Optional[str]:
+        """Canonical model name, or None if no pattern matches"""
+        i, _ = self.models.search(title)
+        return self.model_names[i] if i is not None else None
+
+    def homework(self, title: str) -> Optional[str]:
+        """Normalized homework label (HW02 -> HW2), or None"""
+        _, m = self.homeworks.search(title)
+        if not m:
+            return None
+        # Normalize: remove leading zeros (HW02 -> HW2, HW08 -> HW8)
+        hw_num = m.group(1).lstrip('0') or '0'
+        return f"HW{hw_num}"
+
+    def classify(self, title: str) -> Dict[str, str]:
+        return {
+            "model": self.model(title) or "Unknown",
+            "homework": self.homework(title) or "Unknown",
+        }
+
+
+_default_classifier: Optional[TitleClassifier] = None
+
+
+def get_classifier() -> TitleClassifier:
+    """Process-wide classifier built from the default pattern file"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = TitleClassifier.from_file()
+    return _default_classifier
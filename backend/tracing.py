@@ -0,0 +1,290 @@
+"""
+CS182 Blue Team - Pipeline tracing
+Spans for the stages of a pipeline script (load, fetch, preprocess, group
+analysis, serialization ...) with their wall time, CPU time, resident size
+and item counts, written as a Chrome trace (chrome://tracing, Perfetto) by
+the scripts' --profile flag.
+
+Tracing is off unless a script enables it; span() and tally() then return a
+shared no-op object, so they can stay in hot code. tally() is for calls too
+frequent for a span each (HTML strip, tokenize): it adds the call's time and
+count to the innermost open span of its thread.
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import threading
+import contextlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+TRACE_DIR = "data/traces"
+
+
+# -- memory ------------------------------------------------------------
+
+def rss_mib() -> float:
+    """Current resident size (Linux /proc; 0 elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return 0.0
+
+
+def reset_peak() -> bool:
+    """Restart the kernel's peak-RSS counter for this process, if supported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_mib() -> float:
+    """Highest resident size since the process started (or the last reset_peak)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+# -- spans -------------------------------------------------------------
+
+class _NullSpan:
+    """What span() / tally() return while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, items: int = 1):
+        pass
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.items: Optional[int] = None
+        self.tallies: Dict[str, List[float]] = {}
+
+    def count(self, items: int = 1):
+        """Add to the number of items (posts, threads, groups ...) the span handled"""
+        self.items = (self.items or 0) + items
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.tid = threading.get_ident()
+        self.rss_start = rss_mib()
+        self.peak = self.rss_start
+        self.tracer.begin(self)
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        cpu = time.thread_time() - self.cpu_start
+        self.tracer.finish(self, duration, cpu)
+        return False
+
+
+class _Tally:
+    __slots__ = ('span', 'name', 'start')
+
+    def __init__(self, span: Span, name: str):
+        self.span = span
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        totals = self.span.tallies.get(self.name)
+        if totals is None:
+            totals = self.span.tallies[self.name] = [0.0, 0]
+        totals[0] += time.perf_counter() - self.start
+        totals[1] += 1
+        return False
+
+    def count(self, items: int = 1):
+        pass
+
+    def set(self, **args):
+        pass
+
+
+class Tracer:
+    """
+    Records finished spans as Chrome trace "complete" events. Peak RSS is
+    per span: the kernel counter is restarted when a span opens, after
+    folding the peak so far into every span still open, so nested and
+    concurrent spans each see the highest resident size of their own run.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self.open: List[Span] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.exact_peak = True
+
+    def stack(self) -> List[Span]:
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def begin(self, span: Span):
+        with self.lock:
+            if self.open:
+                peak = peak_mib()
+                for other in self.open:
+                    other.peak = max(other.peak, peak)
+            self.exact_peak = reset_peak() and self.exact_peak
+            self.open.append(span)
+        self.stack().append(span)
+
+    def current(self) -> Optional[Span]:
+        stack = self.stack()
+        return stack[-1] if stack else None
+
+    def finish(self, span: Span, duration: float, cpu: float):
+        self.stack().pop()
+        rss = rss_mib()
+        with self.lock:
+            span.peak = max(span.peak, peak_mib(), rss)
+            self.open.remove(span)
+            for other in self.open:
+                other.peak = max(other.peak, span.peak)
+        args = dict(span.args)
+        if span.items is not None:
+            args['items'] = span.items
+        args.update({
+            'cpu_ms': round(cpu * 1000, 3),
+            'rss_start_mib': round(span.rss_start, 1),
+            'rss_end_mib': round(rss, 1),
+            'peak_rss_mib': round(span.peak, 1),
+        })
+        for name, (seconds, calls) in span.tallies.items():
+            args[f'{name}_ms'] = round(seconds * 1000, 3)
+            args[f'{name}_calls'] = calls
+        end = span.start + duration
+        with self.lock:
+            self.events.append({
+                'name': span.name, 'cat': span.cat, 'ph': 'X', 'pid': self.pid, 'tid': span.tid,
+                'ts': round((span.start - self.origin) * 1e6, 1), 'dur': round(duration * 1e6, 1), 'args': args,
+            })
+            self.events.append({
+                'name': 'rss', 'ph': 'C', 'pid': self.pid, 'tid': span.tid,
+                'ts': round((end - self.origin) * 1e6, 1), 'args': {'mib': round(rss, 1)},
+            })
+
+    def trace(self, process_name: str) -> Dict[str, Any]:
+        main = threading.main_thread().ident
+        workers = sorted({e['tid'] for e in self.events} - {main})
+        names = {main: 'main', **{tid: f'worker-{i}' for i, tid in enumerate(workers, start=1)}}
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': process_name}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in names.items()]
+        return {
+            'traceEvents': metadata + sorted(self.events, key=lambda e: e['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': {'process': process_name, 'peak_rss_exact': self.exact_peak},
+        }
+
+    def report(self) -> str:
+        """Per span name: count, total wall / CPU time, largest peak RSS"""
+        totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        for event in self.events:
+            if event['ph'] != 'X':
+                continue
+            total = totals[event['name']]
+            total[0] += 1
+            total[1] += event['dur'] / 1000
+            total[2] += event['args']['cpu_ms']
+            total[3] = max(total[3], event['args']['peak_rss_mib'])
+        lines = [f"{'span':<24} {'count':>6} {'wall ms':>10} {'cpu ms':>10} {'peak MiB':>9}"]
+        lines += [f"{name:<24} {count:>6} {wall:>10.1f} {cpu:>10.1f} {peak:>9.1f}"
+                  for name, (count, wall, cpu, peak) in totals.items()]
+        return "\n".join(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, cat: str = "stage", **args):
+    """Context manager timing one stage; yields an object with count() / set()"""
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name, cat, args)
+
+
+def tally(name: str):
+    """Context manager adding its time to the enclosing span's `name` totals"""
+    if _tracer is None:
+        return NULL_SPAN
+    current = _tracer.current()
+    return _Tally(current, name) if current is not None else NULL_SPAN
+
+
+def default_trace_path(script: str) -> str:
+    return os.path.join(TRACE_DIR, f"{script}.trace.json")
+
+
+def add_profile_argument(parser, script: str):
+    path = default_trace_path(script)
+    parser.add_argument('--profile', nargs='?', const=path, metavar='TRACE_JSON',
+                        help=f"record stage timings / memory as a Chrome trace (default path: {path})")
+
+
+@contextlib.contextmanager
+def profiled(path: Optional[str], process_name: str):
+    """
+    Trace the block when `path` is set and write the trace there afterwards
+    (also when the block raises), with a per-span summary on stdout.
+    """
+    global _tracer
+    if not path:
+        yield
+        return
+    _tracer = Tracer()
+    try:
+        with span(process_name, cat="script"):
+            yield
+    finally:
+        tracer, _tracer = _tracer, None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(tracer.trace(process_name), f)
+        print(tracer.report())
+        print(f"Trace saved to {path} (open in chrome://tracing or ui.perfetto.dev)")
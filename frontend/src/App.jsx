@@ -4,6 +4,7 @@ import Browse from './pages/Browse'
 import Analytics from './pages/Analytics'
 import Insights from './pages/Insights'
 import Header from './components/Header'
+import { loadManifest, loadPosts, loadSection, loadShard } from './utils/dataShards'
 import './styles/App.css'
 
 function App() {
@@ -11,6 +12,7 @@ function App() {
   const [data, setData] = useState([])
   const [analytics, setAnalytics] = useState(null)
   const [advancedAnalytics, setAdvancedAnalytics] = useState(null)
+  const [manifest, setManifest] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
 
@@ -26,6 +28,14 @@ function App() {
       // Use base URL for GitHub Pages compatibility
       const baseUrl = import.meta.env.BASE_URL
 
+      // Prefer the sharded files from backend/artifacts.py when present
+      const manifest = await loadManifest(baseUrl)
+      if (manifest) {
+        await loadShardedData(baseUrl, manifest)
+        setManifest(manifest)
+        return
+      }
+
       // Load main data with better error handling
       const dataResponse = await fetch(`${baseUrl}data/special_participation_a.json`)
       if (!dataResponse.ok) {
@@ -64,9 +74,32 @@ function App() {
     }
   }
 
+  const loadShardedData = async (baseUrl, manifest) => {
+    // Posts and the core statistics are enough for the first render
+    const [core, posts] = await Promise.all([loadShard(baseUrl, manifest.core), loadPosts(baseUrl, manifest)])
+    setData(posts)
+    if (core.analytics) setAnalytics(core.analytics)
+    if (core.advanced_analytics) setAdvancedAnalytics(core.advanced_analytics)
+
+    // Per-model and per-homework detail arrives after it
+    if (manifest.model_comparison) {
+      loadSection(baseUrl, manifest, 'model_comparison')
+        .then(modelComparison => setAnalytics(prev => prev && {
+          ...prev,
+          insights: { ...prev.insights, model_comparison: modelComparison }
+        }))
+        .catch(err => console.warn('Model comparison not available:', err))
+    }
+    if (manifest.hw_model_analysis) {
+      loadSection(baseUrl, manifest, 'hw_model_analysis')
+        .then(hwModelAnalysis => setAdvancedAnalytics(prev => prev && { ...prev, hw_model_analysis: hwModelAnalysis }))
+        .catch(err => console.warn('Advanced analytics not available:', err))
+    }
+  }
+
   const pages = {
     dashboard: <Dashboard data={data} analytics={analytics} advancedAnalytics={advancedAnalytics} />,
-    browse: <Browse data={data} />,
+    browse: <Browse data={data} manifest={manifest} />,
     analytics: <Analytics data={data} analytics={analytics} />,
     insights: <Insights data={data} advancedAnalytics={advancedAnalytics} analytics={analytics} />
   }
@@ -1,11 +1,34 @@
 import { useState, useMemo } from 'react'
 import Fuse from 'fuse.js'
+import { loadRelated } from '../utils/dataShards'
 
-function Browse({ data }) {
+function Browse({ data, manifest }) {
   const [searchTerm, setSearchTerm] = useState('')
   const [selectedModel, setSelectedModel] = useState('all')
   const [selectedHomework, setSelectedHomework] = useState('all')
   const [sortBy, setSortBy] = useState('recent')
+  // post id -> [[related post id, cosine], ...] once its homework's shard is loaded
+  const [related, setRelated] = useState({})
+  const [openRelated, setOpenRelated] = useState(null)
+
+  const postsById = useMemo(() => new Map(data.map(post => [String(post.id), post])), [data])
+
+  const toggleRelated = (post) => {
+    const id = String(post.id)
+    if (openRelated === id) {
+      setOpenRelated(null)
+      return
+    }
+    setOpenRelated(id)
+    if (!related[id]) {
+      loadRelated(import.meta.env.BASE_URL, manifest, post.homework)
+        .then(group => setRelated(prev => ({ ...prev, [id]: group[id] || [] })))
+        .catch(err => {
+          console.warn('Related posts not available:', err)
+          setRelated(prev => ({ ...prev, [id]: [] }))
+        })
+    }
+  }
 
   // Extract unique models and homeworks
   const { models, homeworks } = useMemo(() => {
@@ -213,6 +236,28 @@ function Browse({ data }) {
                   </div>
                 )}
 
+                {openRelated === String(post.id) && (
+                  <div className="post-content">
+                    <strong>Similar posts:</strong>
+                    {!related[String(post.id)] ? (
+                      <p className="text-muted">Loading...</p>
+                    ) : related[String(post.id)].length === 0 ? (
+                      <p className="text-muted">No similar posts found</p>
+                    ) : (
+                      <ul style={{ margin: '0.5rem 0 0', paddingLeft: '1.25rem' }}>
+                        {related[String(post.id)].filter(([id]) => postsById.has(id)).map(([id, score]) => (
+                          <li key={id}>
+                            <a href={postsById.get(id).url} target="_blank" rel="noopener noreferrer">
+                              {postsById.get(id).title}
+                            </a>
+                            <span className="text-muted"> ({Math.round(score * 100)}% similar)</span>
+                          </li>
+                        ))}
+                      </ul>
+                    )}
+                  </div>
+                )}
+
                 <div className="post-actions">
                   <button
                     className="action-btn"
@@ -220,6 +265,11 @@ function Browse({ data }) {
                   >
                     View on Ed →
                   </button>
+                  {manifest?.related?.[post.homework] && (
+                    <button className="action-btn" onClick={() => toggleRelated(post)}>
+                      {openRelated === String(post.id) ? 'Hide similar' : 'Similar posts'}
+                    </button>
+                  )}
                 </div>
               </div>
             ))
@@ -0,0 +1,52 @@
+// Loader for the sharded data files written by backend/artifacts.py.
+// manifest.json maps each homework / model to a content-hashed shard, so a
+// shard never changes once published and is fetched at most once per visit.
+
+const shardCache = new Map()
+
+export async function loadManifest(baseUrl) {
+  try {
+    const response = await fetch(`${baseUrl}data/manifest.json`, { cache: 'no-cache' })
+    if (!response.ok) return null
+    return await response.json()
+  } catch (err) {
+    console.warn('Data manifest not available:', err)
+    return null
+  }
+}
+
+export function loadShard(baseUrl, path) {
+  if (!shardCache.has(path)) {
+    const request = fetch(`${baseUrl}data/${path}`).then(response => {
+      if (!response.ok) throw new Error(`Failed to load ${path}: ${response.status}`)
+      return response.json()
+    })
+    // A failed request may be retried later
+    request.catch(() => shardCache.delete(path))
+    shardCache.set(path, request)
+  }
+  return shardCache.get(path)
+}
+
+// Every post shard, reassembled in dataset order
+export async function loadPosts(baseUrl, manifest) {
+  const groups = await Promise.all(Object.values(manifest.posts).map(path => loadShard(baseUrl, path)))
+  const posts = new Array(manifest.total_posts)
+  for (const group of groups) {
+    group.rows.forEach((row, i) => { posts[row] = group.posts[i] })
+  }
+  return posts.filter(Boolean)
+}
+
+// { key: shard value } for a manifest section such as hw_model_analysis
+export async function loadSection(baseUrl, manifest, section) {
+  const entries = Object.entries(manifest[section] || {})
+  const values = await Promise.all(entries.map(([, path]) => loadShard(baseUrl, path)))
+  return Object.fromEntries(entries.map(([key], i) => [key, values[i]]))
+}
+
+// { post id: [[related post id, cosine], ...] } for one homework's posts
+export async function loadRelated(baseUrl, manifest, homework) {
+  const path = manifest.related?.[homework]
+  return path ? loadShard(baseUrl, path) : {}
+}
@@ -37,48 +37,19 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
-# Create data directory
-mkdir -p frontend/public/data
-
 # Create backend data directory
 mkdir -p backend/data
 
-# Run scraper
-echo ""
-echo "Step 1: Scraping Ed discussions..."
-echo "========================================"
-cd backend
-python scraper.py
-cd ..
-
-# Copy data to frontend
-echo ""
-echo "Copying data to frontend..."
-cp backend/data/special_participation_a.json frontend/public/data/
-cp backend/data/special_participation_a.csv frontend/public/data/
-
-# Run analytics
+# Scrape, then rebuild only the stages whose inputs changed (independent
+# stages run in parallel; see backend/pipeline.py). Extra arguments are
+# passed through, e.g. --no-scrape or --force.
 echo ""
-echo "Step 2: Running basic analytics..."
+echo "Running pipeline stages..."
 echo "========================================"
 cd backend
-python analytics.py
+python pipeline.py "$@"
 cd ..
 
-# Run advanced analytics
-echo ""
-echo "Step 3: Running advanced analytics (TF-IDF, clustering)..."
-echo "========================================"
-cd backend
-python advanced_analytics.py
-cd ..
-
-# Copy analytics to frontend
-echo ""
-echo "Copying analytics to frontend..."
-cp backend/data/analytics.json frontend/public/data/
-cp backend/data/advanced_analytics.json frontend/public/data/
-
 echo ""
 echo "========================================"
 echo "Pipeline completed successfully!"